@@ -0,0 +1,109 @@
+# batch_writer.py - Пакетне додавання фільмів у базу (для сканування каналу)
+
+import logging
+
+import database_async
+
+logger = logging.getLogger(__name__)
+
+
+class MovieBatchWriter:
+    """
+    Буферизує розпарсені пости і записує їх у базу пачками
+    через database.upsert_movies (одна транзакція на пачку).
+    
+    Використання:
+        writer = MovieBatchWriter(batch_size=500)
+        await writer.add(code, message_id, chat_id)
+        ...
+        await writer.flush()  # записати залишок
+    """
+    
+    def __init__(self, batch_size=500, overwrite=False, newest_wins=False):
+        """
+        Параметри:
+        - batch_size: скільки постів накопичувати перед записом
+        - overwrite: оновлювати існуючі коди (True) чи пропускати їх (False)
+        - newest_wins: код, який цей записувач уже додав, переходить на пост з більшим message_id
+          (порядок пачок не важливий); коди, що були в базі раніше, не чіпаються (див. database.upsert_movies)
+        """
+        self.batch_size = batch_size
+        self.overwrite = overwrite
+        self.own_codes = set() if newest_wins else None  # коди, додані цим записувачем
+        self.buffer = []
+        
+        # Статистика кожної пачки та загальні підсумки
+        self.batches = []
+        self.totals = {
+            'batches': 0,
+            'rows': 0,
+            'inserted': 0,
+            'updated': 0,
+            'skipped': 0,
+            'failed': 0,
+            'seconds': 0.0
+        }
+    
+    async def add(self, code, message_id, chat_id, link=None, title=None, year=None,
+                  description=None, post_date=None):
+        """
+        Додає пост у буфер. Коли буфер заповнено - записує пачку.
+        
+        Повертає:
+        - Статистику пачки, якщо вона була записана, інакше None
+        """
+        self.buffer.append({
+            'code': code,
+            'message_id': message_id,
+            'chat_id': chat_id,
+            'link': link,
+            'title': title,
+            'year': year,
+            'description': description,
+            'post_date': post_date
+        })
+        
+        if len(self.buffer) >= self.batch_size:
+            return await self.flush()
+        return None
+    
+    async def flush(self):
+        """
+        Записує все, що є в буфері.
+        
+        Повертає:
+        - Статистику пачки (rows, inserted, updated, skipped, failed, seconds) або None, якщо буфер порожній
+        """
+        if not self.buffer:
+            return None
+        
+        rows, self.buffer = self.buffer, []
+        
+        try:
+            stats = await database_async.upsert_movies(rows, self.overwrite, self.own_codes)
+            inserted_codes = stats.pop('inserted_codes')
+            if self.own_codes is not None:
+                self.own_codes.update(inserted_codes)
+            stats['failed'] = 0
+        except Exception as e:
+            logger.error(f"❌ Помилка запису пачки з {len(rows)} фільмів: {e}")
+            stats = {
+                'rows': len(rows),
+                'inserted': 0,
+                'updated': 0,
+                'skipped': 0,
+                'failed': len(rows),
+                'seconds': 0.0
+            }
+        
+        self.batches.append(stats)
+        self.totals['batches'] += 1
+        for key in ('rows', 'inserted', 'updated', 'skipped', 'failed', 'seconds'):
+            self.totals[key] += stats[key]
+        
+        logger.info(
+            f"BATCH Пачка {self.totals['batches']}: {stats['rows']} рядків, "
+            f"нових {stats['inserted']}, оновлено {stats['updated']}, "
+            f"пропущено {stats['skipped']}, помилок {stats['failed']} за {stats['seconds']} с"
+        )
+        return stats
@@ -0,0 +1 @@
+# benchmarks - Бенчмарки продуктивності бота (запуск: python -m benchmarks.<назва>)
@@ -0,0 +1,139 @@
+# benchmarks/bench_async_lookups.py - Паралельні пошуки через database_async
+#
+# Показує дві речі:
+# 1. Пошуки через database_async виконуються одночасно (перекриваються в часі),
+#    а не по черзі, як при прямому виклику синхронного database.find_movie
+# 2. Event loop залишається вільним: "серцебиття" не затримується, поки йдуть запити
+#
+# --latency імітує мережеву затримку PostgreSQL (на SQLite запити майже миттєві).
+#
+# Перевірка (з --latency > 0): через database_async найбільша затримка loop має бути меншою за
+# --max-stall-ratio від затримки при синхронних викликах, а пошуки - перекриватись (peak_in_flight > 1).
+# Якщо ні - бенчмарк завершується з помилкою.
+#
+# Запуск:
+#   python -m benchmarks.bench_async_lookups
+#   python -m benchmarks.bench_async_lookups --postgres --latency 0
+
+import asyncio
+import threading
+import time
+
+from benchmarks.common import make_parser, report, setup_database
+
+
+class InFlightCounter:
+    """Рахує, скільки пошуків виконується одночасно"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+async def heartbeat(stop, interval, stalls):
+    """Кожні interval секунд перевіряє, наскільки запізнився event loop"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - expected)
+
+
+async def run_variant(lookup, codes):
+    """Запускає всі пошуки одночасно і повертає (час, максимальна затримка loop)"""
+    stop = asyncio.Event()
+    stalls = []
+    beat = asyncio.create_task(heartbeat(stop, 0.005, stalls))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(lookup(code) for code in codes))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    return elapsed, max(stalls, default=0.0)
+
+
+def main():
+    parser = make_parser("Паралельні пошуки через database_async")
+    parser.add_argument('--lookups', type=int, default=200, help='скільки пошуків запустити одночасно')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='імітація мережевої затримки запиту, секунд')
+    parser.add_argument('--max-stall-ratio', type=float, default=0.1,
+                        help='допустима затримка loop через database_async як частка від синхронного варіанту')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+
+    import database
+    import database_async
+
+    database.init_database()
+    for i in range(100):
+        database.add_movie(f"A{i:03d}", 1000 + i, -100123)
+    codes = [f"A{i % 100:03d}" for i in range(args.lookups)]
+
+    counter = InFlightCounter()
+
+    def slow_find_movie(code):
+        with counter:
+            if args.latency:
+                time.sleep(args.latency)
+            return database.find_movie(code)
+
+    async def blocking_lookup(code):
+        # Як було раніше: синхронний виклик прямо в обробнику
+        return slow_find_movie(code)
+
+    async def async_lookup(code):
+        return await database_async.run(slow_find_movie, code)
+
+    async def bench():
+        results = {}
+        for name, lookup in (('blocking', blocking_lookup), ('database_async', async_lookup)):
+            counter.peak = 0
+            elapsed, max_stall = await run_variant(lookup, codes)
+            results[name] = {
+                'lookups': args.lookups,
+                'seconds': round(elapsed, 4),
+                'lookups_per_sec': round(args.lookups / elapsed, 1),
+                'peak_in_flight': counter.peak,
+                'max_loop_stall_ms': round(max_stall * 1000, 2),
+            }
+        return results
+
+    results = asyncio.run(bench())
+    report(f"Одночасні пошуки ({backend}, затримка {args.latency} с)", results, args.json)
+
+    database_async.shutdown()
+    database.close_pool()
+
+    if args.latency:
+        check(results, args.max_stall_ratio)
+
+
+def check(results, max_stall_ratio):
+    """database_async не блокує event loop і виконує пошуки одночасно - інакше SystemExit"""
+    blocking = results['blocking']['max_loop_stall_ms']
+    stall = results['database_async']['max_loop_stall_ms']
+    errors = []
+    if stall > blocking * max_stall_ratio:
+        errors.append(f"затримка loop {stall} мс, дозволено до {blocking * max_stall_ratio:.2f} мс "
+                      f"({max_stall_ratio:.1%} від {blocking} мс без database_async)")
+    if results['database_async']['peak_in_flight'] <= 1:
+        errors.append("пошуки виконувались по одному")
+    if errors:
+        raise SystemExit(f"❌ database_async: {'; '.join(errors)}")
+
+
+if __name__ == '__main__':
+    main()
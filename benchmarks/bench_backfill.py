@@ -0,0 +1,237 @@
+# benchmarks/bench_backfill.py - Повне сканування історії каналу з підробним клієнтом Pyrogram
+#
+# Підробний канал: --messages повідомлень, частина id видалена, більшість постів з кодом фільму;
+# кожен запит до Telegram чекає --api-latency секунд (мережа + MTProto).
+# Кожен 25-й пост повторює код поста на 299 id раніше (інший шматок get_messages): після сканування код має вести
+# на новіший пост (більший message_id), інакше бенчмарк завершується з помилкою. Перший такий код
+# записується в базу ще до сканування (як фільм, доданий ботом) - він має лишитись на своєму пості.
+# - serial_history - як було: get_chat_history сторінками по 100, одна за одною
+# - backfill_cN - scanner.scan_channel_history: get_messages по 200 id, N запитів одночасно
+#
+# З --flood-rate канал відповідає FloodWait, коли запитів за останню секунду більше за flood-rate:
+# видно, як RequestGovernor (scan_governor.py) зменшує швидкість і все одно дочитує історію.
+#
+# Запуск:
+#   python -m benchmarks.bench_backfill
+#   python -m benchmarks.bench_backfill --messages 50000 --api-latency 0.1
+#   python -m benchmarks.bench_backfill --flood-rate 15 --flood-wait 2
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from pyrogram.errors import FloodWait
+
+from benchmarks.common import make_parser, report, setup_database
+
+CHANNEL_ID = -1001234567890
+
+# get_chat_history Pyrogram читає історію сторінками по 100 повідомлень
+HISTORY_PAGE = 100
+
+
+# Пост з message_id % DUPLICATE_EVERY == 3 (після перших DUPLICATE_SHIFT) повторює код поста message_id - DUPLICATE_SHIFT
+DUPLICATE_EVERY = 25
+DUPLICATE_SHIFT = 299
+
+
+def movie_number(message_id):
+    """Номер у коді фільму поста (повторені пости - номер старішого поста)"""
+    if message_id > DUPLICATE_SHIFT and message_id % DUPLICATE_EVERY == 3:
+        return message_id - DUPLICATE_SHIFT
+    return message_id
+
+
+# Повторений пост, чий код уже є в базі до сканування
+PREEXISTING_ID = DUPLICATE_SHIFT + 4
+
+
+def add_preexisting(prefix):
+    """Фільм, який бот додав ще до сканування (старіший пост з повтореним кодом)"""
+    import database
+
+    number = movie_number(PREEXISTING_ID)
+    database.add_movie(f"{prefix}{number:06d}", number, CHANNEL_ID)
+
+
+def check_duplicates(prefix, messages):
+    """Повторені в скануванні коди ведуть на новіший пост, а фільм з бази не зрушив - інакше SystemExit"""
+    import database
+
+    errors = []
+    for message_id in range(PREEXISTING_ID, messages + 1, DUPLICATE_EVERY):
+        code = f"{prefix}{movie_number(message_id):06d}"
+        expected = movie_number(message_id) if message_id == PREEXISTING_ID else message_id
+        movie = database.find_movie(code)
+        if movie is None or movie['message_id'] != expected:
+            errors.append(f"{code}: {movie and movie['message_id']} замість {expected}")
+    if errors:
+        raise SystemExit(f"❌ Повторені коди ведуть не на той пост: {', '.join(errors[:10])}")
+
+
+class FakeChannelClient:
+    """
+    Замість pyrogram.Client: канал з message_id 1..messages, кожен запит - api_latency секунд.
+    flood_rate - більше запитів за секунду Telegram не терпить: FloodWait на flood_wait секунд (0 - без ліміту)
+    """
+
+    def __init__(self, prefix, messages, api_latency, deleted_every=10, flood_rate=0, flood_wait=1):
+        self.prefix = prefix
+        self.messages = messages
+        self.api_latency = api_latency
+        self.deleted_every = deleted_every
+        self.flood_rate = flood_rate
+        self.flood_wait = flood_wait
+        self.flood_waits = 0
+        self._recent = deque()     # час останніх запитів (для flood_rate)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._date = datetime.now(timezone.utc)
+
+    def _message(self, message_id):
+        if message_id > self.messages or message_id % self.deleted_every == 0:
+            return SimpleNamespace(id=message_id, empty=True, text=None, caption=None, date=None)
+        caption = None
+        if message_id % 5:
+            caption = (
+                f"Код: {self.prefix}{movie_number(message_id):06d}\nНазва: Фільм {message_id}\nРік: 2024\n\n"
+                f"Опис:\nОпис фільму {message_id}.\n\nПосилання: https://example.com/{message_id}"
+            )
+        return SimpleNamespace(id=message_id, empty=False, text=None if caption else "Анонс",
+                               caption=caption, date=self._date)
+
+    async def _request(self):
+        if self.flood_rate:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            self._recent.append(now)
+            if len(self._recent) > self.flood_rate:
+                self.flood_waits += 1
+                raise FloodWait(value=self.flood_wait)
+
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.api_latency)
+        finally:
+            self.in_flight -= 1
+
+    async def get_chat(self, username):
+        await self._request()
+        return SimpleNamespace(id=CHANNEL_ID, title=f"Bench {self.prefix}")
+
+    async def get_chat_history(self, chat_id, limit=0):
+        """Від нових до старих, сторінками по HISTORY_PAGE (видалені id Telegram не повертає)"""
+        returned = 0
+        high = self.messages
+        while high > 0:
+            await self._request()
+            page = [self._message(i) for i in range(high, max(0, high - HISTORY_PAGE), -1)]
+            high -= HISTORY_PAGE
+            for message in page:
+                if message.empty:
+                    continue
+                yield message
+                returned += 1
+                if limit and returned >= limit:
+                    return
+
+    async def get_messages(self, chat_id, message_ids, replies=1):
+        await self._request()
+        return [self._message(i) for i in message_ids]
+
+
+async def serial_history_scan(client):
+    """Сканування до паралельного читання: get_chat_history підряд, пачки в MovieBatchWriter"""
+    import config
+    from batch_writer import MovieBatchWriter
+    from post_parser import parse_post
+
+    channel = await client.get_chat(config.CHANNEL_USERNAME)
+    writer = MovieBatchWriter(batch_size=config.SCAN_BATCH_SIZE)
+    async for message in client.get_chat_history(channel.id):
+        text = message.text or message.caption
+        if text:
+            movie_info = parse_post(text)
+            if movie_info['code']:
+                await writer.add(
+                    code=movie_info['code'], message_id=message.id, chat_id=channel.id,
+                    link=movie_info['link'], title=movie_info['title'], year=movie_info['year'],
+                    description=movie_info['description'], post_date=message.date
+                )
+    await writer.flush()
+    return writer.totals['inserted']
+
+
+async def run(args):
+    import config
+    import database
+    from channel_scanner import ChannelScanner
+
+    database.init_database()
+    results = {}
+
+    variants = [('serial_history', None)] + [(f"backfill_c{n}", n) for n in args.concurrency]
+    for index, (name, concurrency) in enumerate(variants):
+        # Кожен варіант - свої коди, щоб усі фільми справді записувались у базу
+        client = FakeChannelClient(
+            chr(ord('A') + index), args.messages, args.api_latency,
+            flood_rate=args.flood_rate, flood_wait=args.flood_wait
+        )
+
+        if concurrency is not None:
+            add_preexisting(client.prefix)
+
+        start = time.perf_counter()
+        if concurrency is None:
+            try:
+                added = await serial_history_scan(client)
+            except FloodWait:
+                added = 'aborted (FloodWait)'
+        else:
+            config.SCAN_CONCURRENCY = concurrency
+            scanner = ChannelScanner()
+            scanner.client = client
+            added = await scanner.scan_channel_history(full=True)
+        elapsed = time.perf_counter() - start
+        if concurrency is not None and added:
+            check_duplicates(client.prefix, args.messages)
+
+        results[name] = {
+            'seconds': round(elapsed, 3),
+            'movies_added': added,
+            'requests': client.requests,
+            'max_in_flight': client.max_in_flight,
+            'flood_waits': client.flood_waits,
+            'messages_per_sec': round(args.messages / elapsed, 1),
+        }
+
+    database.close_pool()
+    return results
+
+
+def main():
+    parser = make_parser("Повне сканування історії каналу: get_chat_history vs паралельні get_messages")
+    parser.add_argument('--messages', type=int, default=20000, help='скільки повідомлень у каналі')
+    parser.add_argument('--api-latency', type=float, default=0.05, help='тривалість одного запиту до Telegram, с')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8],
+                        help='скільки запитів get_messages одночасно (кілька варіантів)')
+    parser.add_argument('--flood-rate', type=int, default=0,
+                        help='FloodWait, якщо запитів за секунду більше (0 - без ліміту)')
+    parser.add_argument('--flood-wait', type=int, default=1, help='скільки секунд просить чекати FloodWait')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+    results = asyncio.run(run(args))
+    report(f"Сканування каналу ({backend}, {args.messages} повідомлень, api_latency={args.api_latency}, "
+           f"flood_rate={args.flood_rate})",
+           results, args.json)
+
+
+if __name__ == '__main__':
+    main()
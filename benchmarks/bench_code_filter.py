@@ -0,0 +1,52 @@
+# benchmarks/bench_code_filter.py - Фільтр невідомих кодів: пам'ять, хибнопозитивні відповіді, швидкість
+#
+# Запуск:
+#   python -m benchmarks.bench_code_filter --codes 100000 --fp-rate 0.01
+
+import time
+
+from benchmarks.common import make_parser, report
+
+
+def main():
+    parser = make_parser("Фільтр невідомих кодів: пам'ять, хибнопозитивні відповіді, швидкість")
+    parser.add_argument('--codes', type=int, default=100000, help='скільки кодів у каталозі')
+    parser.add_argument('--probes', type=int, default=100000, help='скільки невідомих кодів перевірити')
+    parser.add_argument('--fp-rate', type=float, default=0.01, help='бажана частка хибнопозитивних')
+    args = parser.parse_args()
+
+    from code_filter import KnownCodesFilter
+
+    codes = [f"{i:06d}" for i in range(args.codes)]
+    unknown = [f"X{i:06d}" for i in range(args.probes)]
+
+    code_filter = KnownCodesFilter(fp_rate=args.fp_rate)
+    start = time.perf_counter()
+    code_filter.begin_rebuild(len(codes))
+    for code in codes:
+        code_filter.rebuild_add(code)
+    code_filter.finish_rebuild()
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    false_positives = sum(1 for code in unknown if code_filter.might_contain(code))
+    probe_seconds = time.perf_counter() - start
+
+    stats = code_filter.stats()
+    results = {
+        'bloom': {
+            'codes': args.codes,
+            'memory_bytes': stats['memory_bytes'],
+            'bytes_per_code': round(stats['memory_bytes'] / args.codes, 2),
+            'num_hashes': stats['num_hashes'],
+            'expected_fp_rate': round(stats['expected_fp_rate'], 5),
+            'measured_fp_rate': round(false_positives / args.probes, 5),
+            'build_seconds': round(build_seconds, 4),
+            'checks_per_sec': round(args.probes / probe_seconds, 1),
+        }
+    }
+    report(f"Фільтр невідомих кодів ({args.codes} кодів)", results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_database.py - Пропускна здатність find_movie / add_movie (SQLite або PostgreSQL)
+#
+# Запуск:
+#   python -m benchmarks.bench_database               # тимчасова SQLite
+#   python -m benchmarks.bench_database --postgres    # PostgreSQL з DATABASE_URL
+
+from benchmarks.common import make_parser, measure, report, setup_database
+
+
+def main():
+    parser = make_parser("Пропускна здатність find_movie / add_movie")
+    parser.add_argument('--movies', type=int, default=5000, help='скільки фільмів додати через add_movie')
+    parser.add_argument('--lookups', type=int, default=20000, help='скільки пошуків у кожному сценарії')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+
+    import database
+    from movie_cache import movie_index
+    database.init_database()
+
+    results = {
+        'add_movie': measure(
+            lambda i: database.add_movie(f"D{i:07d}", 100 + i, -100123, title=f"Фільм {i}", year=2000 + i % 25),
+            args.movies
+        ),
+    }
+
+    database.warm_cache()
+    codes = [f"D{(i * 7919) % args.movies:07d}" for i in range(args.lookups)]
+
+    # Звичайний режим: весь каталог у кеші пам'яті
+    results['find_movie_cached'] = measure(lambda i: database.find_movie(codes[i]), args.lookups)
+    results['find_movie_unknown_code'] = measure(lambda i: database.find_movie(f"N{i:07d}"), args.lookups)
+    results['find_movie_not_a_code'] = measure(lambda i: database.find_movie(f"привіт як справи {i}"), args.lookups)
+
+    # Запит до бази на кожен пошук (як для каталогу, більшого за MOVIE_CACHE_MAX_SIZE):
+    # кеш вважається неповним, і знайдений код перед кожним пошуком з нього прибирається
+    movie_index.complete = False
+
+    def find_uncached(i):
+        movie_index.discard(codes[i])
+        return database.find_movie(codes[i])
+
+    results['find_movie_database'] = measure(find_uncached, args.lookups)
+
+    report(f"find_movie / add_movie ({backend}, {args.movies} фільмів)", results, args.json)
+    database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
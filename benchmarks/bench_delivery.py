@@ -0,0 +1,119 @@
+# benchmarks/bench_delivery.py - Затримка надсилання фільму користувачу через підробний Bot API
+#
+# Справжній telegram.Bot ходить по HTTP у benchmarks/fake_telegram.py з імітацією мережі (--api-latency),
+# тому видно, скільки коштує кожен виклик Bot API на доставку фільму:
+# - copy_then_button - як було: copy_message, потім окреме повідомлення з кнопкою (2 виклики)
+# - copy_with_button - bot.deliver_movie: copy_message з кнопкою (1 виклик)
+# - cached_file_id - bot.deliver_movie для поста з post_cache: send_photo за file_id (1 виклик)
+#
+# Запуск:
+#   python -m benchmarks.bench_delivery
+#   python -m benchmarks.bench_delivery --api-latency 0.05 --deliveries 500
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from telegram import Bot, Chat, InlineKeyboardButton, InlineKeyboardMarkup, Message, PhotoSize
+
+from benchmarks.common import latency_summary, make_parser, report
+from benchmarks.fake_telegram import FakeTelegramServer
+from benchmarks.fakes import FakeApplication
+
+CHANNEL_ID = -1001234567890
+USER_ID = 10000000
+
+
+def make_movie(i):
+    code = f"D{i:05d}"
+    return {'code': code, 'chat_id': CHANNEL_ID, 'message_id': 100 + i, 'link': f"https://example.com/{code}"}
+
+
+def make_photo_post(movie):
+    """Пост каналу з фото, яким його бачить бот (channel_post)"""
+    return Message(
+        message_id=movie['message_id'],
+        date=datetime.now(timezone.utc),
+        chat=Chat(id=movie['chat_id'], type=Chat.CHANNEL),
+        photo=[PhotoSize(f"photo-{movie['code']}", f"u-{movie['code']}", 720, 1280)],
+        caption=f"Код: {movie['code']}\nНазва: Фільм\nРік: 2024\n\nПосилання: {movie['link']}"
+    )
+
+
+async def deliver_copy_then_button(context, chat_id, code, movie):
+    """Доставка до об'єднання викликів: копія поста і окреме повідомлення з кнопкою"""
+    await context.bot.copy_message(chat_id=chat_id, from_chat_id=movie['chat_id'], message_id=movie['message_id'])
+    keyboard = [[InlineKeyboardButton("🔗 Дивитись фільм", url=movie['link'])]]
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text="Натисніть кнопку щоб перейти до фільму:",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+    return True
+
+
+async def time_deliveries(server, deliver, context, movies):
+    """Доставляє фільми по черзі; повертає (тривалості, викликів Bot API на доставку)"""
+    calls_before = sum(server.calls.values())
+    latencies = []
+    for movie in movies:
+        start = time.perf_counter()
+        if not await deliver(context, USER_ID, movie['code'], movie):
+            raise RuntimeError(f"Фільм {movie['code']} не доставлено")
+        latencies.append(time.perf_counter() - start)
+    return latencies, (sum(server.calls.values()) - calls_before) / len(movies)
+
+
+async def run(args):
+    import bot
+    from post_cache import post_cache
+
+    server = FakeTelegramServer(api_latency=args.api_latency)
+    port = await server.start(port=0)
+    telegram_bot = Bot('123456:bench', base_url=f"http://127.0.0.1:{port}/bot")
+    await telegram_bot.initialize()
+    context = SimpleNamespace(bot=telegram_bot, args=[], application=FakeApplication(), bot_data={})
+
+    movies = [make_movie(i) for i in range(args.deliveries)]
+    results = {}
+
+    try:
+        post_cache.clear()
+        variants = {
+            'copy_then_button': deliver_copy_then_button,
+            'copy_with_button': bot.deliver_movie,
+        }
+        for name, deliver in variants.items():
+            latencies, calls = await time_deliveries(server, deliver, context, movies)
+            results[name] = latency_summary(latencies)
+            results[name]['api_calls_per_delivery'] = round(calls, 2)
+
+        # post_cache використовується лише поки працює моніторинг каналу - імітуємо його задачу
+        context.application.bot_data['monitor_task'] = asyncio.get_running_loop().create_future()
+        for movie in movies:
+            post_cache.remember(make_photo_post(movie))
+        latencies, calls = await time_deliveries(server, bot.deliver_movie, context, movies)
+        results['cached_file_id'] = latency_summary(latencies)
+        results['cached_file_id']['api_calls_per_delivery'] = round(calls, 2)
+        results['cached_file_id']['send_photo_calls'] = server.calls.get('sendPhoto', 0)
+    finally:
+        await telegram_bot.shutdown()
+        await server.stop()
+
+    return results
+
+
+def main():
+    parser = make_parser("Надсилання фільму користувачу (deliver_movie) через підробний Bot API")
+    parser.add_argument('--deliveries', type=int, default=300, help='скільки фільмів надіслати в кожному варіанті')
+    parser.add_argument('--api-latency', type=float, default=0.02,
+                        help='затримка кожного методу Bot API в секундах (мережа до Telegram)')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report(f"Доставка фільму (api_latency={args.api_latency})", results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_handlers.py - Затримка обробників бота від Update до відповіді (з підробним Bot)
+#
+# Запуск:
+#   python -m benchmarks.bench_handlers
+#   python -m benchmarks.bench_handlers --api-delay 0.05   # з імітацією мережі до Telegram
+
+import asyncio
+import random
+
+from benchmarks.common import latency_summary, make_parser, report, setup_database
+from benchmarks.fakes import FakeBot, make_channel_update, make_context, make_text_update, time_handler
+
+TITLES = ['Дюна', 'Інтерстеллар', 'Оппенгеймер', 'Тихе місце', 'Джон Вік', 'Темний лицар', 'Ла-Ла Ленд']
+
+
+def make_post(code, title, year):
+    return f"Код: {code}\nНазва: {title}\nРік: {year}\n\nОпис:\nОпис фільму {title}.\n\nПосилання: https://example.com/{code}"
+
+
+async def run(args):
+    import bot
+    import config
+    import database
+
+    database.init_database()
+    chat_id = -100123
+
+    fake_bot = FakeBot(api_delay=args.api_delay)
+    context = make_context(fake_bot)
+    rnd = random.Random(3)
+    results = {}
+
+    # Нові пости каналу: розбір + запис у базу + підтвердження адміну
+    posts = [
+        make_channel_update(
+            fake_bot, config.CHANNEL_USERNAME, chat_id, 10 + i,
+            make_post(f"H{i:05d}", f"{rnd.choice(TITLES)} {i}", rnd.randint(1990, 2025))
+        )
+        for i in range(args.movies)
+    ]
+    latencies = await time_handler(bot.handle_channel_post, posts, context)
+    await context.application.drain()  # підтвердження адміну надсилаються фоном
+    results['handle_channel_post'] = latency_summary(latencies)
+    results['handle_channel_post']['api_calls_per_update'] = round(len(fake_bot.calls) / len(posts), 2)
+
+    database.warm_cache()
+
+    # Пошук за кодом: існуючі коди, користувачі повторюються (кеш підписки працює)
+    scenarios = {
+        'search_movie_hit': lambda i: f"H{rnd.randrange(args.movies):05d}",
+        'search_movie_unknown_code': lambda i: f"Z{i:05d}",
+        'search_movie_by_title': lambda i: rnd.choice(TITLES).lower(),
+    }
+    for name, make_text in scenarios.items():
+        fake_bot.reset()
+        updates = [
+            make_text_update(fake_bot, 1000 + rnd.randrange(args.users), make_text(i))
+            for i in range(args.lookups)
+        ]
+        latencies = await time_handler(bot.search_movie, updates, context)
+        results[name] = latency_summary(latencies)
+        results[name]['api_calls_per_update'] = round(len(fake_bot.calls) / len(updates), 2)
+
+    database.close_pool()
+    return results
+
+
+def main():
+    parser = make_parser("Затримка обробників бота (search_movie, handle_channel_post) з підробним Bot")
+    parser.add_argument('--movies', type=int, default=2000, help='скільки постів каналу обробити')
+    parser.add_argument('--lookups', type=int, default=2000, help='скільки пошуків у кожному сценарії')
+    parser.add_argument('--users', type=int, default=300, help='скільки різних користувачів шукають')
+    parser.add_argument('--api-delay', type=float, default=0.0,
+                        help='штучна затримка кожного виклику Bot API в секундах')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+    results = asyncio.run(run(args))
+    report(f"Обробники бота ({backend}, api_delay={args.api_delay})", results, args.json)
+
+
+if __name__ == '__main__':
+    main()
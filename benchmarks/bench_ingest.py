@@ -0,0 +1,72 @@
+# benchmarks/bench_ingest.py - Запис фільмів: add_movie на кожен пост проти пачок upsert_movies
+#
+# Запуск:
+#   python -m benchmarks.bench_ingest
+#   python -m benchmarks.bench_ingest --postgres --rows 20000
+
+import time
+
+from benchmarks.common import make_parser, report, setup_database
+
+
+def make_rows(count, prefix):
+    return [
+        {'code': f"{prefix}{i:07d}", 'message_id': 10 + i, 'chat_id': -100123, 'link': None}
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = make_parser("Запис фільмів: add_movie на кожен пост проти пачок upsert_movies")
+    parser.add_argument('--rows', type=int, default=5000, help='скільки постів записати')
+    parser.add_argument('--batch-size', type=int, default=500, help='розмір пачки')
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help='частка постів, які вже є в базі (як при повторному скануванні)')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+
+    import database
+    database.init_database()
+
+    results = {}
+    for variant in ('add_movie_per_row', 'upsert_batches'):
+        prefix = 'P' if variant == 'add_movie_per_row' else 'U'
+        rows = make_rows(args.rows, prefix)
+
+        # Частина рядків вже є в базі - як при повторному скануванні каналу
+        existing = rows[:int(args.rows * args.duplicates)]
+        database.upsert_movies(existing)
+
+        start = time.perf_counter()
+        if variant == 'add_movie_per_row':
+            inserted = sum(
+                database.add_movie(r['code'], r['message_id'], r['chat_id'], r['link']) for r in rows
+            )
+            batches = len(rows)
+        else:
+            inserted = 0
+            batches = 0
+            for i in range(0, len(rows), args.batch_size):
+                stats = database.upsert_movies(rows[i:i + args.batch_size])
+                inserted += stats['inserted']
+                batches += 1
+        elapsed = time.perf_counter() - start
+
+        results[variant] = {
+            'rows': len(rows),
+            'inserted': inserted,
+            'transactions': batches,
+            'seconds': round(elapsed, 4),
+            'rows_per_sec': round(len(rows) / elapsed, 1),
+        }
+
+    results['upsert_batches']['speedup'] = round(
+        results['upsert_batches']['rows_per_sec'] / results['add_movie_per_row']['rows_per_sec'], 2
+    )
+    report(f"Запис постів ({backend}, пачка {args.batch_size})", results, args.json)
+    database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
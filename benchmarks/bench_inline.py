@@ -0,0 +1,70 @@
+# benchmarks/bench_inline.py - Inline-запити "по літері": кеш результатів vs пошук на кожен запит
+#
+# Запуск:
+#   python -m benchmarks.bench_inline --titles 50000 --users 500
+
+import random
+import time
+
+from benchmarks.bench_title_search import make_titles, make_words
+from benchmarks.common import make_parser, report
+
+
+def make_keystrokes(titles, users, rnd):
+    """Кожен користувач набирає одну з популярних назв по літері (як приходять inline-запити)"""
+    popular = [title for _, title, _ in rnd.sample(titles, 50)]
+    queries = []
+    for _ in range(users):
+        title = rnd.choice(popular)
+        for end in range(1, len(title) + 1):
+            queries.append(title[:end])
+    return queries
+
+
+def main():
+    parser = make_parser("Inline-запити по літері: кеш результатів vs пошук на кожен запит")
+    parser.add_argument('--titles', type=int, default=50000, help='скільки назв у каталозі')
+    parser.add_argument('--users', type=int, default=500, help='скільки користувачів набирають запит')
+    args = parser.parse_args()
+
+    from inline_cache import InlineResultsCache
+    from title_search import TitleIndex, search_key
+
+    rnd = random.Random(7)
+    titles = make_titles(args.titles, make_words(20000, rnd), rnd)
+    index = TitleIndex()
+    for code, title, year in titles:
+        index.add(code, title, year)
+    queries = make_keystrokes(titles, args.users, rnd)
+
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, limit=50)
+    uncached_seconds = time.perf_counter() - start
+
+    cache = InlineResultsCache(ttl=60, max_size=5000)
+    start = time.perf_counter()
+    for query in queries:
+        key = search_key(query)
+        if key and cache.get(key, 0) is None:
+            cache.set(key, 0, index.search(query, limit=50))
+    cached_seconds = time.perf_counter() - start
+
+    stats = cache.stats()
+    results = {
+        'no_cache': {
+            'queries': len(queries),
+            'queries_per_sec': round(len(queries) / uncached_seconds, 1),
+        },
+        'results_cache': {
+            'queries': len(queries),
+            'queries_per_sec': round(len(queries) / cached_seconds, 1),
+            'hit_rate': round(stats['hit_rate'], 3),
+            'cached_queries': stats['size'],
+        },
+    }
+    report(f"Inline-запити ({args.users} користувачів, {args.titles} назв)", results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_iter_memory.py - Пам'ять при проході по всьому каталогу:
+# get_all_movies (весь список словників) проти iter_movies (потоковий генератор)
+#
+# Запуск:
+#   python -m benchmarks.bench_iter_memory                 # 1 000 000 рядків у тимчасовій SQLite
+#   python -m benchmarks.bench_iter_memory --rows 100000 --fetch-size 5000
+
+import time
+import tracemalloc
+
+from benchmarks.common import make_parser, report, setup_database
+
+
+def fill_table(database, rows, batch_size=10000):
+    """Заповнює таблицю синтетичними фільмами пачками"""
+    for start in range(0, rows, batch_size):
+        database.upsert_movies([
+            {'code': f"M{i:08d}", 'message_id': i, 'chat_id': -100123, 'link': f"https://example.com/{i}"}
+            for i in range(start, min(start + batch_size, rows))
+        ])
+
+
+def measure_memory(func):
+    """Повертає (результат, пікова пам'ять у МБ, секунди)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(peak / 1024 / 1024, 2), round(elapsed, 3)
+
+
+def main():
+    parser = make_parser("Пам'ять при проході по всьому каталогу")
+    parser.add_argument('--rows', type=int, default=1000000, help='скільки рядків у синтетичній таблиці')
+    parser.add_argument('--fetch-size', type=int, default=2000, help='розмір порції iter_movies')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+
+    import database
+    database.init_database()
+    fill_table(database, args.rows)
+
+    def with_list():
+        return sum(movie['message_id'] for movie in database.get_all_movies())
+
+    def with_iterator():
+        return sum(row.message_id for row in database.iter_movies(fetch_size=args.fetch_size))
+
+    results = {}
+    for name, func in (('get_all_movies', with_list), ('iter_movies', with_iterator)):
+        checksum, peak_mb, seconds = measure_memory(func)
+        results[name] = {
+            'rows': args.rows,
+            'peak_mb': peak_mb,
+            'seconds': seconds,
+            'rows_per_sec': round(args.rows / seconds, 1),
+            'checksum': checksum,
+        }
+
+    report(f"Прохід по каталогу ({backend}, {args.rows} рядків)", results, args.json)
+    database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+# benchmarks/bench_monitor.py - Моніторинг нових постів: add_movie на кожен пост vs мікропачки
+#
+# Підробний клієнт Pyrogram розсилає оновлення обробникам так само, як Dispatcher:
+# --workers задач, кожне оновлення - перевірка фільтрів обробника і виклик callback.
+# Канал публікує --bursts серій по --burst постів з паузою --pause с; ще стільки ж
+# повідомлень приходить з інших чатів (їх моніторинг має відкидати).
+# - per_message - як було: on_message() без фільтра, database.add_movie на кожен пост
+# - micro_batch - ChannelMonitor (channel_monitor.py): фільтр каналу при реєстрації, запис пачками
+#
+# Затримка - від публікації поста до запису фільму в базу.
+#
+# deleted_posts - перевірка видалення: канал видаляє кожен другий з --deleted*2 постів (DeletedMessagesHandler),
+# фільми цих постів мають зникнути з бази (find_movie) і post_cache, решта - лишитись.
+# Якщо ні - бенчмарк завершується з помилкою.
+#
+# Запуск:
+#   python -m benchmarks.bench_monitor
+#   python -m benchmarks.bench_monitor --bursts 20 --burst 500 --batch-size 200
+
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from benchmarks.common import latency_summary, make_parser, report, setup_database
+
+CHANNEL_ID = -1001234567890
+OTHER_CHAT_ID = 777000
+
+
+class FakeDispatchClient:
+    """Замість pyrogram.Client: add_handler / remove_handler і розсилка оновлень workers задачами"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.handlers = []
+        self.updates = asyncio.Queue()
+        self.dispatched = 0
+
+    def add_handler(self, handler, group=0):
+        self.handlers.append(handler)
+        return handler, group
+
+    def remove_handler(self, handler, group=0):
+        self.handlers.remove(handler)
+
+    async def _worker(self):
+        from pyrogram.handlers import DeletedMessagesHandler, MessageHandler
+
+        while True:
+            message = await self.updates.get()
+            try:
+                # Нові повідомлення - обробникам MessageHandler, список видалених - DeletedMessagesHandler
+                # (як у Dispatcher Pyrogram)
+                kind = DeletedMessagesHandler if isinstance(message, list) else MessageHandler
+                for handler in [h for h in self.handlers if isinstance(h, kind)]:
+                    if await handler.check(self, message):
+                        self.dispatched += 1
+                        await handler.callback(self, message)
+                        break
+            finally:
+                self.updates.task_done()
+
+    def start(self):
+        return [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+
+def make_message(prefix, number, chat_id):
+    """Пост каналу з кодом фільму або повідомлення з іншого чату; published - коли опубліковано"""
+    text = (
+        f"Код: {prefix}{number:06d}\nНазва: Фільм {number}\nРік: 2024\n\n"
+        f"Опис:\nОпис фільму {number}.\n\nПосилання: https://example.com/{number}"
+    )
+    return SimpleNamespace(
+        id=number, chat=SimpleNamespace(id=chat_id, username=None), from_user=None, outgoing=False,
+        text=None, caption=text, date=datetime.now(), published=time.perf_counter()
+    )
+
+
+def deleted_message(number):
+    """Видалене повідомлення каналу, як його віддає Pyrogram: тільки id і чат"""
+    return SimpleNamespace(id=number, chat=SimpleNamespace(id=CHANNEL_ID, username=None), from_user=None,
+                           outgoing=False)
+
+
+def bot_api_post(number):
+    """Текстовий пост каналу, який бот бачив через channel_post (для post_cache)"""
+    return SimpleNamespace(chat_id=CHANNEL_ID, message_id=number, photo=None, video=None, animation=None,
+                           document=None, text=f"Пост {number}", entities=None)
+
+
+def per_message_handler(lags):
+    """Обробник до ChannelMonitor: без фільтра, перевірка чату в коді, add_movie на кожен пост"""
+    from pyrogram.handlers import MessageHandler
+
+    import database_async
+    from post_parser import parse_post
+
+    async def handle_new_message(client, message):
+        if message.chat.id == CHANNEL_ID:
+            if message.text or message.caption:
+                movie_info = parse_post(message.text or message.caption)
+                if movie_info['code']:
+                    await database_async.add_movie(
+                        code=movie_info['code'], message_id=message.id, chat_id=CHANNEL_ID,
+                        link=movie_info['link'], title=movie_info['title'], year=movie_info['year'],
+                        description=movie_info['description'], post_date=message.date
+                    )
+                    lags.append(time.perf_counter() - message.published)
+
+    return MessageHandler(handle_new_message)
+
+
+async def run_variant(name, prefix, args):
+    from channel_monitor import ChannelMonitor
+
+    client = FakeDispatchClient(args.workers)
+    workers = client.start()
+    lags = []
+
+    monitor = None
+    if name == 'per_message':
+        client.add_handler(per_message_handler(lags))
+    else:
+        class MeasuredMonitor(ChannelMonitor):
+            async def _write(self, batch):
+                await super()._write(batch)
+                written = time.perf_counter()
+                lags.extend(written - message.published for _, message, _ in batch)
+
+        monitor = MeasuredMonitor(
+            client, CHANNEL_ID, batch_size=args.batch_size, flush_interval=args.flush_interval
+        )
+        await monitor.start()
+
+    start = time.perf_counter()
+    number = 0
+    for _ in range(args.bursts):
+        for _ in range(args.burst):
+            number += 1
+            client.updates.put_nowait(make_message(prefix, number, CHANNEL_ID))
+            client.updates.put_nowait(make_message(prefix, number, OTHER_CHAT_ID))
+        await asyncio.sleep(args.pause)
+
+    await client.updates.join()
+    if monitor is not None:
+        await monitor.stop()
+    elapsed = time.perf_counter() - start
+
+    for task in workers:
+        task.cancel()
+
+    result = latency_summary(lags)
+    result.update({
+        'seconds': round(elapsed, 3),
+        'posts': number,
+        'written': len(lags),
+        'handler_calls': client.dispatched,
+    })
+    if monitor is not None:
+        result['transactions'] = monitor.writer.totals['batches']
+    return result
+
+
+async def run_deleted_posts(prefix, args):
+    """Видалення постів через ChannelMonitor: фільми зникають з бази і post_cache, інакше - SystemExit"""
+    import database
+    from channel_monitor import ChannelMonitor
+    from post_cache import post_cache
+
+    client = FakeDispatchClient(args.workers)
+    workers = client.start()
+    monitor = ChannelMonitor(client, CHANNEL_ID, batch_size=args.batch_size, flush_interval=args.flush_interval)
+    await monitor.start()
+
+    # id після постів попередніх варіантів (той самий канал)
+    posts = args.deleted * 2
+    numbers = range(args.bursts * args.burst + 1, args.bursts * args.burst + posts + 1)
+    for number in numbers:
+        client.updates.put_nowait(make_message(prefix, number, CHANNEL_ID))
+        post_cache.remember(bot_api_post(number))
+    await client.updates.join()
+
+    # Пости ще можуть чекати в черзі монітора - видалення має застосуватись після їх запису
+    deleted_ids = set(numbers[::2])
+    start = time.perf_counter()
+    client.updates.put_nowait([deleted_message(number) for number in sorted(deleted_ids)])
+    await client.updates.join()
+    await monitor.stop()
+    elapsed = time.perf_counter() - start
+
+    for task in workers:
+        task.cancel()
+
+    errors = []
+    for number in numbers:
+        code = f"{prefix}{number:06d}"
+        expected_gone = number in deleted_ids
+        if (database.find_movie(code) is None) != expected_gone:
+            errors.append(f"{code}: find_movie")
+        if (post_cache.get(CHANNEL_ID, number) is None) != expected_gone:
+            errors.append(f"{code}: post_cache")
+    if errors:
+        raise SystemExit(f"❌ Видалення постів не застосовано: {', '.join(errors[:10])}")
+
+    return {
+        'seconds': round(elapsed, 3),
+        'posts': posts,
+        'deleted': monitor.deleted,
+        'kept': posts - len(deleted_ids),
+    }
+
+
+async def run(args):
+    import database
+
+    database.init_database()
+    results = {}
+    for index, name in enumerate(('per_message', 'micro_batch')):
+        # Кожен варіант - свої коди, щоб усі фільми справді записувались у базу
+        results[name] = await run_variant(name, chr(ord('A') + index), args)
+    results['deleted_posts'] = await run_deleted_posts('D', args)
+    database.close_pool()
+    return results
+
+
+def main():
+    parser = make_parser("Моніторинг нових постів: add_movie на кожен пост vs запис мікропачками")
+    parser.add_argument('--bursts', type=int, default=10, help='скільки серій постів')
+    parser.add_argument('--burst', type=int, default=200, help='постів в одній серії')
+    parser.add_argument('--pause', type=float, default=0.2, help='пауза між серіями, с')
+    parser.add_argument('--workers', type=int, default=4, help='задач розсилки оновлень (workers Pyrogram)')
+    parser.add_argument('--batch-size', type=int, default=100, help='MONITOR_BATCH_SIZE')
+    parser.add_argument('--deleted', type=int, default=100, help='скільки постів видалити в перевірці видалення')
+    parser.add_argument('--flush-interval', type=float, default=0.25, help='MONITOR_FLUSH_INTERVAL, с')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+    results = asyncio.run(run(args))
+    report(f"Моніторинг нових постів ({backend}, {args.bursts}x{args.burst} постів)", results, args.json)
+
+
+if __name__ == '__main__':
+    main()
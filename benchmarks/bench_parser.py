@@ -0,0 +1,156 @@
+# benchmarks/bench_parser.py - Розбір постів: окремі re.search на кожне поле vs post_parser за один прохід
+#
+# Запуск:
+#   python -m benchmarks.bench_parser --posts 20000 --repeat 5
+
+import random
+import re
+import time
+
+from benchmarks.common import make_parser, report
+
+TITLES = [
+    'Голови держав', 'Дюна: Частина друга', 'Інтерстеллар', 'Оппенгеймер', 'Тихе місце',
+    'Гаррі Поттер і таємна кімната', 'Джон Вік 4', 'Месники: Фінал', 'Темний лицар', 'Ла-Ла Ленд',
+]
+
+SENTENCES = [
+    'Головний герой опиняється в епіцентрі подій, які змінять його життя назавжди.',
+    'Неймовірна історія про дружбу, зраду та пошук себе.',
+    'Фільм зібрав понад мільярд доларів у світовому прокаті.',
+    'Режисер знову поєднує гостросюжетний трилер з драмою.',
+    'Ідеально для вечора з друзями 🍿',
+    'Не пропустіть фінальну сцену - вона вас здивує!',
+]
+
+
+def make_posts(count, rnd):
+    """Корпус постів, схожих на справжні: різний порядок полів, емодзі, довгі описи, пости без коду"""
+    posts = []
+    for i in range(count):
+        description = ' '.join(rnd.choice(SENTENCES) for _ in range(rnd.randint(2, 12)))
+        lines = [
+            rnd.choice(['🎬 ФІЛЬМ ДНЯ', '🔥 Новинка!', '🍿 Що подивитись ввечері?', '']),
+            f"{rnd.choice(['Код', 'КОД', 'код'])}: {i:05d}",
+            f"Назва: {rnd.choice(TITLES)}",
+            f"Рік: {rnd.randint(1980, 2025)}",
+            '',
+            'Опис:',
+            description,
+        ]
+        if rnd.random() < 0.6:
+            lines += ['', f"Посилання: https://example.com/watch/{i}"]
+        if rnd.random() < 0.3:
+            lines += ['', '#кіно #фільм #щоподивитись']
+        if rnd.random() < 0.1:
+            # Підписи посеред рядка: все в одному рядку або посилання після іншого тексту
+            lines = [
+                f"{rnd.choice(['🎬 Фільм дня.', '🔥 Новинка!'])} Код: {i:05d} Назва: {rnd.choice(TITLES)}. "
+                f"Рік: {rnd.randint(1980, 2025)} Посилання: https://example.com/watch/{i}",
+                description,
+            ]
+            if rnd.random() < 0.5:
+                lines = [f"Код: {i:05d}", description, f"Дивись тут -> Посилання: https://example.com/watch/{i}"]
+        if rnd.random() < 0.1:
+            # Звичайний пост каналу без фільму
+            lines = [description, '#анонс']
+        posts.append('\n'.join(lines))
+    return posts
+
+
+def legacy_parse(text):
+    """Старий розбір: окремий re.search (з пошуком у кеші шаблонів re) на кожне поле"""
+    movie_info = {'code': None, 'title': None, 'year': None, 'description': None, 'link': None}
+
+    code_match = re.search(r'[Кк][Оо][Дд]:\s*([A-Za-z0-9]+)', text)
+    if code_match:
+        movie_info['code'] = code_match.group(1).upper()
+
+    title_match = re.search(r'[Нн][Аа][Зз][Вв][Аа]:\s*(.+)', text)
+    if title_match:
+        movie_info['title'] = title_match.group(1).strip()
+
+    year_match = re.search(r'[Рр][Іі][Кк]:\s*(\d{4})', text)
+    if year_match:
+        movie_info['year'] = year_match.group(1)
+
+    desc_match = re.search(r'[Оо][Пп][Ии][Сс]:\s*(.+)', text, re.DOTALL)
+    if desc_match:
+        movie_info['description'] = desc_match.group(1).strip()
+
+    link_match = re.search(r'(?:[Пп][Оо][Сс][Ии][Лл][Аа][Нн][Нн][Яя]|[Лл][Ии][Нн][Кк]|[Сс][Сс][Ыы][Лл][Кк][Аа]):\s*(https?://[^\s]+)', text)
+    if link_match:
+        movie_info['link'] = link_match.group(1)
+
+    return movie_info
+
+
+def field_mismatches(posts, parse):
+    """
+    Розбіжності з legacy_parse по кожному полю.
+    code, year, link - мають збігатись; title і description - legacy читав до кінця рядка/тексту,
+    а post_parser зупиняється перед наступним підписом, тому його значення має бути початком legacy.
+    """
+    mismatches = {field: 0 for field in ('code', 'title', 'year', 'description', 'link')}
+    examples = []
+    for text in posts:
+        old, new = legacy_parse(text), parse(text)
+        for field in mismatches:
+            if field in ('title', 'description'):
+                same = (old[field] is None) == (new[field] is None) and (
+                    old[field] is None or old[field].startswith(new[field])
+                )
+            else:
+                same = old[field] == new[field]
+            if not same:
+                mismatches[field] += 1
+                if len(examples) < 5:
+                    examples.append((field, text, old[field], new[field]))
+    return mismatches, examples
+
+
+def run(parse, posts, repeat):
+    """Найкращий з repeat проходів по корпусу (секунди)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in posts:
+            parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = make_parser("Розбір постів: окремі re.search vs post_parser за один прохід")
+    parser.add_argument('--posts', type=int, default=20000, help='скільки постів у корпусі')
+    parser.add_argument('--repeat', type=int, default=5, help='скільки разів пройти корпус (береться найкращий)')
+    args = parser.parse_args()
+
+    from post_parser import parse_post
+
+    posts = make_posts(args.posts, random.Random(13))
+
+    # Перевірка, що post_parser знаходить усі поля, які знаходив старий розбір
+    mismatches, examples = field_mismatches(posts, parse_post)
+
+    results = {}
+    for name, parse in (('legacy_re_search', legacy_parse), ('post_parser', parse_post)):
+        seconds = run(parse, posts, args.repeat)
+        results[name] = {
+            'posts': args.posts,
+            'posts_per_sec': round(args.posts / seconds, 1),
+            'us_per_post': round(seconds / args.posts * 1e6, 2),
+        }
+    results['post_parser'].update({f"{field}_mismatches": count for field, count in mismatches.items()})
+
+    report(f"Розбір постів ({args.posts} постів)", results, args.json)
+
+    if examples:
+        for field, text, old, new in examples:
+            print(f"❌ {field}: legacy={old!r} post_parser={new!r}\n{text}\n")
+        raise SystemExit("❌ post_parser розходиться зі старим розбором")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_pool.py - Пошук за кодом: пул з'єднань проти з'єднання на кожен виклик
+#
+# Запуск:
+#   python -m benchmarks.bench_pool               # тимчасова SQLite
+#   python -m benchmarks.bench_pool --postgres    # PostgreSQL з DATABASE_URL
+
+from benchmarks.common import make_parser, measure, report, setup_database
+
+
+def find_movie_connect_per_call(database, code):
+    """Стара поведінка find_movie: нове з'єднання на кожен пошук"""
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    placeholder = '%s' if database.get_database_url() else '?'
+    cursor.execute(
+        f'SELECT code, message_id, chat_id, link FROM movies WHERE code = {placeholder}',
+        (code,)
+    )
+    result = cursor.fetchone()
+    conn.close()
+    return result
+
+
+def main():
+    parser = make_parser("Пошук за кодом: пул з'єднань проти з'єднання на кожен виклик")
+    parser.add_argument('--movies', type=int, default=1000, help='скільки фільмів у базі')
+    parser.add_argument('--lookups', type=int, default=5000, help='скільки пошуків виконати')
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+
+    import database
+    database.init_database()
+    for i in range(args.movies):
+        database.add_movie(f"B{i:06d}", 1000 + i, -100123)
+
+    codes = [f"B{i % args.movies:06d}" for i in range(args.lookups)]
+
+    results = {
+        'connect_per_call': measure(
+            lambda i: find_movie_connect_per_call(database, codes[i]), args.lookups
+        ),
+        'pooled': measure(lambda i: database.find_movie(codes[i]), args.lookups),
+    }
+    results['pooled']['speedup'] = round(
+        results['pooled']['ops_per_sec'] / results['connect_per_call']['ops_per_sec'], 2
+    )
+
+    report(f"find_movie lookups/sec ({backend}, {args.movies} фільмів)", results, args.json)
+    database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
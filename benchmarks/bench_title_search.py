@@ -0,0 +1,177 @@
+# benchmarks/bench_title_search.py - Пошук за назвою: триграмний індекс vs повний перебір назв
+#
+# Назви складаються зі слів за законом Ципфа: кілька десятків частих слів + довгий хвіст,
+# як у справжньому каталозі. Ціль - "кілька мілісекунд" на запит для 100k назв: p95 порівнюється
+# з --target-ms (meets_target у звіті). common_words - найгірший випадок: запит з одного
+# частого слова ("the", "ніч"), якому відповідає кожна десята назва.
+#
+# Запуск:
+#   python -m benchmarks.bench_title_search --titles 100000 --queries 2000
+
+import itertools
+import random
+import time
+
+from benchmarks.common import make_parser, report
+
+# Словник, схожий на справжній каталог: часті слова назв (українські та англійські,
+# перші - найчастіші) + довгий хвіст рідкісних слів (імена, місця, вигадані назви).
+# Слова вибираються за законом Ципфа - як у справжніх назвах, де "людина" чи "the"
+# трапляються в тисячах фільмів, а більшість слів - в одиницях.
+COMMON_WORDS = [
+    'the', 'of', 'and', 'a', 'in', 'man', 'love', 'night', 'last', 'dead', 'story', 'day', 'life',
+    'world', 'war', 'black', 'house', 'king', 'city', 'return', 'lost', 'dark', 'girl', 'secret',
+    'blood', 'star', 'time', 'home', 'big', 'game', 'new', 'american', 'little', 'death', 'red',
+    'і', 'в', 'на', 'та', 'людина', 'ніч', 'кохання', 'останній', 'війна', 'світ', 'день', 'дім',
+    'життя', 'таємниця', 'місто', 'король', 'повернення', 'темний', 'дівчина', 'зоряні', 'великий',
+    'чорний', 'гра', 'історія', 'мертві', 'пригоди', 'втеча', 'острів', 'сонце', 'місія', 'легенда',
+]
+
+# Частоти літер для слів довгого хвоста: українські й англійські слова мають різні триграми
+LETTERS_UK = 'оааннииіеттрвсклдмупзяьбгчйхжцшюєщфїґ'
+LETTERS_EN = 'eeettaaooiinnsshhrrdlcumwfgypbvkjxqz'
+VOWELS = set('оаиіеуяюєїeaoiuy')
+
+
+def make_word(rnd):
+    """Слово довгого хвоста: 3-10 літер, приголосні чергуються з голосними (вимовні слова)"""
+    letters = LETTERS_UK if rnd.random() < 0.6 else LETTERS_EN
+    length = rnd.choice((3, 4, 5, 5, 6, 6, 7, 7, 8, 9, 10))
+    word = []
+    while len(word) < length:
+        letter = rnd.choice(letters)
+        if word and (letter in VOWELS) == (word[-1] in VOWELS) and rnd.random() < 0.7:
+            continue
+        word.append(letter)
+    return ''.join(word)
+
+
+def make_words(count, rnd):
+    """Словник з count слів: спершу часті слова, далі довгий хвіст (у порядку рангу)"""
+    words = list(COMMON_WORDS)
+    seen = set(words)
+    while len(words) < count:
+        word = make_word(rnd)
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def make_titles(count, words, rnd):
+    """Назви з 1-5 слів (частота слова ~ 1/ранг) і роком"""
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    titles = []
+    for i in range(count):
+        title_words = rnd.choices(words, cum_weights=cum_weights, k=rnd.choice((1, 2, 2, 3, 3, 3, 4, 4, 5)))
+        titles.append((f"{i:06d}", ' '.join(title_words).capitalize(), rnd.randint(1950, 2025)))
+    return titles
+
+
+def make_queries(titles, count, rnd):
+    """
+    Запити: префікси назв, окремі слова з опечатками, латиниця замість кирилиці.
+
+    За одним словом шукають найпримітніше слово назви (найдовше), а не "the" чи "на" -
+    запити з самих частих слів міряються окремо (common_words).
+    """
+    from title_search import search_key
+
+    queries = []
+    for _ in range(count):
+        _, title, _ = rnd.choice(titles)
+        kind = rnd.random()
+        if kind < 0.4:
+            queries.append(title[:max(4, len(title) // 2)])
+        elif kind < 0.7:
+            word = max(title.split(), key=len)
+            pos = rnd.randrange(len(word))
+            queries.append(word[:pos] + word[pos + 1:] if len(word) > 4 else word)
+        else:
+            queries.append(search_key(title))
+    return queries
+
+
+def measure(index, queries):
+    """Час кожного запиту (відсортований) і скільки запитів щось знайшли"""
+    latencies = []
+    found = 0
+    for query in queries:
+        started = time.perf_counter()
+        if index.search(query, limit=10):
+            found += 1
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies, found
+
+
+def full_scan(titles, query, limit):
+    """Базовий варіант без індексу: підрядок у кожній нормалізованій назві"""
+    from text_utils import normalize_title
+
+    needle = normalize_title(query) or ''
+    found = []
+    for code, title, year in titles:
+        if needle in (normalize_title(title) or ''):
+            found.append(code)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def main():
+    parser = make_parser("Пошук за назвою: триграмний індекс vs повний перебір назв")
+    parser.add_argument('--titles', type=int, default=100000, help='скільки назв в індексі')
+    parser.add_argument('--queries', type=int, default=2000, help='скільки запитів виконати')
+    parser.add_argument('--words', type=int, default=50000, help='розмір словника для назв')
+    parser.add_argument('--target-ms', type=float, default=5.0, help='ціль: p95 одного запиту, мс')
+    args = parser.parse_args()
+
+    from title_search import TitleIndex
+
+    rnd = random.Random(42)
+    titles = make_titles(args.titles, make_words(args.words, rnd), rnd)
+    queries = make_queries(titles, args.queries, rnd)
+
+    index = TitleIndex()
+    start = time.perf_counter()
+    for code, title, year in titles:
+        index.add(code, title, year)
+    build_seconds = time.perf_counter() - start
+
+    latencies, found = measure(index, queries)
+    common_latencies, _ = measure(index, COMMON_WORDS)
+
+    scan_queries = queries[:max(1, args.queries // 20)]
+    start = time.perf_counter()
+    for query in scan_queries:
+        full_scan(titles, query, 10)
+    scan_seconds = time.perf_counter() - start
+
+    results = {
+        'trigram_index': {
+            'titles': args.titles,
+            'trigrams': index.stats()['trigrams'],
+            'build_seconds': round(build_seconds, 3),
+            'queries_per_sec': round(len(queries) / sum(latencies), 1),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+            'found_rate': round(found / len(queries), 3),
+            'target_ms': args.target_ms,
+            'meets_target': latencies[int(len(latencies) * 0.95)] * 1000 <= args.target_ms,
+        },
+        'common_words': {
+            'queries': len(COMMON_WORDS),
+            'p50_ms': round(common_latencies[len(common_latencies) // 2] * 1000, 3),
+            'max_ms': round(common_latencies[-1] * 1000, 3),
+        },
+        'full_scan': {
+            'queries': len(scan_queries),
+            'queries_per_sec': round(len(scan_queries) / scan_seconds, 1),
+        },
+    }
+    report(f"Пошук за назвою ({args.titles} назв)", results, args.json)
+
+
+if __name__ == '__main__':
+    main()
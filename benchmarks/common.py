@@ -0,0 +1,95 @@
+# benchmarks/common.py - Спільні функції для бенчмарків
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def make_parser(description):
+    """
+    Створює парсер аргументів зі спільними опціями:
+    --postgres - використовувати DATABASE_URL замість тимчасової SQLite
+    --json     - вивести результати у форматі JSON
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--postgres', action='store_true',
+                        help='використовувати PostgreSQL з DATABASE_URL')
+    parser.add_argument('--json', action='store_true',
+                        help='вивести результати у форматі JSON')
+    return parser
+
+
+def setup_database(use_postgres=False):
+    """
+    Готує базу для бенчмарку.
+
+    За замовчуванням - тимчасовий файл SQLite (щоб не чіпати movies.db).
+    З --postgres - база з DATABASE_URL (ТАБЛИЦЯ movies БУДЕ ЗМІНЕНА!).
+
+    Повертає назву бекенду: 'sqlite' або 'postgres'.
+    """
+    if use_postgres:
+        if not os.getenv('DATABASE_URL'):
+            raise SystemExit("❌ Для --postgres потрібна змінна DATABASE_URL")
+        return 'postgres'
+
+    os.environ.pop('DATABASE_URL', None)
+    tmp_dir = tempfile.mkdtemp(prefix='tg_films_bench_')
+    os.environ['SQLITE_PATH'] = os.path.join(tmp_dir, 'movies.db')
+    return 'sqlite'
+
+
+def measure(func, iterations):
+    """
+    Викликає func(i) iterations разів і повертає статистику:
+    кількість операцій, час і операцій за секунду.
+    """
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'ops': iterations,
+        'seconds': round(elapsed, 4),
+        'ops_per_sec': round(iterations / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def latency_summary(latencies):
+    """p50/p95/p99 та середнє в мілісекундах + кількість викликів за секунду"""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {
+        'calls': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 3),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'calls_per_sec': round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def report(name, results, as_json=False):
+    """
+    Виводить результати бенчмарку.
+
+    Параметри:
+    - name: назва бенчмарку
+    - results: словник {назва варіанту: словник з метриками}
+    - as_json: True - один JSON-рядок, False - читабельна таблиця
+    """
+    if as_json:
+        print(json.dumps({'benchmark': name, 'results': results}, ensure_ascii=False))
+        return
+
+    print(f"\n📊 {name}")
+    for variant, metrics in results.items():
+        values = ', '.join(f"{key}={value}" for key, value in metrics.items())
+        print(f"  • {variant}: {values}")
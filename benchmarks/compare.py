@@ -0,0 +1,76 @@
+# benchmarks/compare.py - Порівняння двох запусків benchmarks.run_all
+#
+# Запуск:
+#   python -m benchmarks.compare bench-before.json bench-after.json
+#   python -m benchmarks.compare bench-before.json bench-after.json --threshold 10
+
+import argparse
+import json
+
+# Метрики, де більше - краще; для решти (час, затримка, пам'ять) краще менше
+HIGHER_IS_BETTER = ('per_sec', 'speedup', 'hit_rate', 'found_rate')
+
+# Метрики-параметри (розмір даних тощо) - не порівнюються
+SKIP = ('ops', 'rows', 'calls', 'posts', 'titles', 'codes', 'queries', 'lookups', 'users')
+
+
+def is_higher_better(metric):
+    return any(part in metric for part in HIGHER_IS_BETTER)
+
+
+def compare(old, new, threshold):
+    """
+    Повертає рядки (бенчмарк, варіант, метрика, було, стало, зміна у %, позначка).
+    Позначка: ✅ покращення, ❌ погіршення (більше threshold %), пусто - без суттєвих змін.
+    """
+    rows = []
+    for name, new_bench in new['benchmarks'].items():
+        old_bench = old['benchmarks'].get(name)
+        if not old_bench:
+            continue
+
+        for variant, new_metrics in new_bench['results'].items():
+            old_metrics = old_bench['results'].get(variant, {})
+
+            for metric, new_value in new_metrics.items():
+                old_value = old_metrics.get(metric)
+                if metric in SKIP or not isinstance(new_value, (int, float)) or not isinstance(old_value, (int, float)):
+                    continue
+                if isinstance(new_value, bool) or not old_value:
+                    continue
+
+                change = (new_value - old_value) / abs(old_value) * 100
+                better = change > 0 if is_higher_better(metric) else change < 0
+                mark = ''
+                if abs(change) >= threshold:
+                    mark = '✅' if better else '❌'
+                rows.append((name, variant, metric, old_value, new_value, change, mark))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівняння двох запусків benchmarks.run_all")
+    parser.add_argument('old', help='JSON з попереднього запуску')
+    parser.add_argument('new', help='JSON з нового запуску')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='з якої зміни (у %%) позначати покращення/погіршення')
+    args = parser.parse_args()
+
+    with open(args.old, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"📊 {old.get('commit')} → {new.get('commit')} ({new.get('backend')})")
+    regressions = 0
+    for name, variant, metric, old_value, new_value, change, mark in compare(old, new, args.threshold):
+        print(f"{mark or '  '} {name}.{variant}.{metric}: {old_value} → {new_value} ({change:+.1f}%)")
+        if mark == '❌':
+            regressions += 1
+
+    if regressions:
+        print(f"\n⚠️ Погіршень більше {args.threshold}%: {regressions}")
+
+
+if __name__ == '__main__':
+    main()
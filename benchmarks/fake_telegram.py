@@ -0,0 +1,241 @@
+# benchmarks/fake_telegram.py - Підробний сервер Bot API для навантажувального тесту
+#
+# Реалізує стільки Bot API, скільки потрібно справжньому Application з bot.py:
+# getMe, getUpdates (long polling), sendMessage, copyMessage, sendPhoto/sendVideo/sendAnimation/sendDocument,
+# getChatMember, answerCallbackQuery, editMessageText, answerInlineQuery. Інші методи повертають ok.
+#
+# Окремий запуск (бот підключається через TELEGRAM_API_URL=http://127.0.0.1:8081):
+#   python -m benchmarks.fake_telegram --port 8081
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from urllib.parse import parse_qsl
+
+# Методи, на які діє ліміт flood_limit (як ліміт Telegram на надсилання повідомлень)
+SEND_METHODS = (
+    'sendMessage', 'copyMessage', 'forwardMessage', 'sendPhoto', 'sendVideo', 'sendAnimation', 'sendDocument',
+    'editMessageText',
+)
+
+BOT_USER = {'id': 1000000001, 'is_bot': True, 'first_name': 'Films Bench', 'username': 'films_bench_bot'}
+
+
+class FakeTelegramServer:
+    """
+    HTTP-сервер з підробним Bot API (тільки стандартна бібліотека, asyncio).
+
+    - push_update(update) - додає оновлення, яке бот отримає через getUpdates
+    - on_call(method, params, received_at) - викликається на кожен запит бота (для вимірювань)
+    - api_latency - штучна затримка відповіді на кожен метод (імітація мережі до Telegram)
+    - member_status - статус користувачів у каналі для getChatMember
+    - flood_limit - скільки повідомлень за секунду приймати; понад це - 429 з retry_after
+      (0 - без обмеження)
+    """
+
+    def __init__(self, api_latency=0.0, member_status='member', on_call=None, flood_limit=0):
+        self.api_latency = api_latency
+        self.member_status = member_status
+        self.on_call = on_call
+        self.flood_limit = flood_limit
+
+        self._window_start = 0.0       # поточна секунда для flood_limit
+        self._window_sent = 0
+        self.flood_errors = 0
+
+        self._updates = []             # всі оновлення (update_id зростає)
+        self._new_update = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1000000)
+        self._server = None
+
+        self.calls = {}                # метод -> кількість викликів
+
+    # ---------- Керування ----------
+
+    async def start(self, host='127.0.0.1', port=8081):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def push_update(self, update):
+        """Додає оновлення в чергу (update_id проставляється автоматично) і повертає його id"""
+        update_id = next(self._update_ids)
+        self._updates.append({'update_id': update_id, **update})
+        self._new_update.set()
+        return update_id
+
+    def next_message_id(self):
+        return next(self._message_ids)
+
+    # ---------- HTTP ----------
+
+    async def _handle_connection(self, reader, writer):
+        """Обробляє запити одного з'єднання (httpx тримає з'єднання відкритими - keep-alive)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = b''
+                length = int(headers.get('content-length', 0))
+                if length:
+                    body = await reader.readexactly(length)
+
+                path = request_line.decode('latin-1').split(' ')[1]
+                method = path.rstrip('/').rsplit('/', 1)[-1]
+                params = self._parse_params(body, headers.get('content-type', ''))
+
+                if self._flooded(method):
+                    status = b'429 Too Many Requests'
+                    payload = json.dumps({
+                        'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry after 1',
+                        'parameters': {'retry_after': 1}
+                    }).encode()
+                else:
+                    status = b'200 OK'
+                    result = await self._dispatch(method, params)
+                    payload = json.dumps({'ok': True, 'result': result}).encode()
+
+                writer.write(
+                    b'HTTP/1.1 ' + status + b'\r\n'
+                    b'Content-Type: application/json\r\n'
+                    b'Content-Length: ' + str(len(payload)).encode() + b'\r\n'
+                    b'\r\n' + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Бот закрив з'єднання або сервер зупиняється посеред long polling
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_params(body, content_type):
+        """Параметри запиту: JSON або form-urlencoded (складні значення - JSON-рядки)"""
+        if not body:
+            return {}
+        if 'multipart/form-data' in content_type:
+            return {}  # файли (sendDocument) - вміст не потрібен
+        if 'application/json' in content_type:
+            return json.loads(body)
+
+        params = {}
+        for key, value in parse_qsl(body.decode(), keep_blank_values=True):
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        return params
+
+    def _flooded(self, method):
+        """Чи перевищено flood_limit повідомлень у поточній секунді"""
+        if not self.flood_limit or method not in SEND_METHODS:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start = now
+            self._window_sent = 0
+        self._window_sent += 1
+        if self._window_sent > self.flood_limit:
+            self.flood_errors += 1
+            return True
+        return False
+
+    # ---------- Методи Bot API ----------
+
+    async def _dispatch(self, method, params):
+        received_at = time.perf_counter()
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == 'getUpdates':
+            return await self._get_updates(params)
+
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        if self.on_call:
+            self.on_call(method, params, received_at)
+
+        if method == 'getMe':
+            return BOT_USER
+        if method in ('sendMessage', 'editMessageText'):
+            return self._message(params.get('chat_id'), params.get('text'))
+        if method in ('sendPhoto', 'sendVideo', 'sendAnimation', 'sendDocument'):
+            return self._message(params.get('chat_id'), params.get('caption'))
+        if method == 'copyMessage':
+            return {'message_id': self.next_message_id()}
+        if method == 'getChatMember':
+            user_id = int(params.get('user_id', 0))
+            return {
+                'status': self.member_status,
+                'user': {'id': user_id, 'is_bot': False, 'first_name': f"User{user_id}"}
+            }
+        return True
+
+    async def _get_updates(self, params):
+        """Long polling: чекає нові оновлення до timeout секунд"""
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+
+        # Підтверджені оновлення (update_id < offset) більше не потрібні
+        if offset:
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+
+        deadline = time.monotonic() + timeout
+        while not self._updates:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), remaining)
+            except asyncio.TimeoutError:
+                return []
+
+        return self._updates[:limit]
+
+    def _message(self, chat_id, text):
+        """Повідомлення від бота (результат sendMessage / editMessageText / sendPhoto ...)"""
+        chat_id = int(chat_id) if chat_id is not None else 0
+        return {
+            'message_id': self.next_message_id(),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'channel'},
+            'from': BOT_USER,
+            'text': text or ''
+        }
+
+
+async def _serve(port, api_latency):
+    server = FakeTelegramServer(api_latency=api_latency)
+    port = await server.start(port=port)
+    print(f"🤖 Підробний Bot API: http://127.0.0.1:{port} (TELEGRAM_API_URL)")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Підробний сервер Bot API")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--api-latency', type=float, default=0.0, help='затримка кожного методу в секундах')
+    args = parser.parse_args()
+    asyncio.run(_serve(args.port, args.api_latency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/fakes.py - Підробний Bot і готові Update для запуску обробників без Telegram
+
+import asyncio
+import itertools
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from telegram import Chat, Message, Update, User
+
+
+class FakeBot:
+    """
+    Замість telegram.Bot: нічого не надсилає, а записує виклики.
+
+    - calls: список (назва методу, аргументи)
+    - api_delay: штучна затримка кожного виклику в секундах (імітація мережі до Telegram)
+    - member_status: що повертає get_chat_member ('member', 'left', ...)
+    """
+
+    def __init__(self, username='films_bench_bot', api_delay=0.0, member_status='member'):
+        self.username = username
+        self.api_delay = api_delay
+        self.member_status = member_status
+        self.calls = []
+        self._message_ids = itertools.count(1)
+
+    async def _call(self, method, kwargs):
+        self.calls.append((method, kwargs))
+        if self.api_delay:
+            await asyncio.sleep(self.api_delay)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._call('send_message', {'chat_id': chat_id, 'text': text, **kwargs})
+        return SimpleNamespace(message_id=next(self._message_ids), chat_id=chat_id)
+
+    async def copy_message(self, chat_id, from_chat_id, message_id, **kwargs):
+        await self._call('copy_message', {
+            'chat_id': chat_id, 'from_chat_id': from_chat_id, 'message_id': message_id, **kwargs
+        })
+        return SimpleNamespace(message_id=next(self._message_ids))
+
+    async def get_chat_member(self, chat_id, user_id, **kwargs):
+        await self._call('get_chat_member', {'chat_id': chat_id, 'user_id': user_id})
+        return SimpleNamespace(status=self.member_status)
+
+    def count(self, method):
+        """Скільки разів викликано метод"""
+        return sum(1 for name, _ in self.calls if name == method)
+
+    def reset(self):
+        self.calls.clear()
+
+
+class FakeApplication:
+    """Замість Application: create_task для фонових задач обробників (наприклад, повідомлень адміну) і bot_data"""
+
+    def __init__(self):
+        self.tasks = set()
+        self.bot_data = {}
+
+    def create_task(self, coroutine, update=None):
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def drain(self):
+        """Чекає завершення всіх фонових задач"""
+        while self.tasks:
+            await asyncio.gather(*self.tasks)
+
+
+def make_context(bot):
+    """Мінімальний context для обробників: context.bot, context.args і context.application"""
+    return SimpleNamespace(bot=bot, args=[], application=FakeApplication(), bot_data={})
+
+
+_update_ids = itertools.count(1)
+
+
+def make_text_update(bot, user_id, text):
+    """Update з текстовим повідомленням користувача в приватному чаті"""
+    user = User(id=user_id, first_name=f"User{user_id}", is_bot=False)
+    message = Message(
+        message_id=next(_update_ids),
+        date=datetime.now(timezone.utc),
+        chat=Chat(id=user_id, type=Chat.PRIVATE),
+        from_user=user,
+        text=text
+    )
+    message.set_bot(bot)
+    return Update(update_id=message.message_id, message=message)
+
+
+def make_channel_update(bot, channel_username, chat_id, message_id, text):
+    """Update з новим постом каналу (channel_post)"""
+    message = Message(
+        message_id=message_id,
+        date=datetime.now(timezone.utc),
+        chat=Chat(id=chat_id, type=Chat.CHANNEL, username=channel_username.lstrip('@')),
+        caption=text
+    )
+    message.set_bot(bot)
+    return Update(update_id=next(_update_ids), channel_post=message)
+
+
+async def time_handler(handler, updates, context):
+    """
+    Викликає handler(update, context) для кожного update по черзі.
+
+    Повертає список тривалостей у секундах.
+    """
+    latencies = []
+    for update in updates:
+        start = time.perf_counter()
+        await handler(update, context)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
@@ -0,0 +1,409 @@
+# benchmarks/load_test.py - Навантажувальний тест бота без справжнього Telegram
+#
+# Запускає справжній бот (bot.py, окремим процесом) проти підробного Bot API
+# (benchmarks/fake_telegram.py), заповнює каталог постами каналу і подає оновлення із заданою частотою:
+# пошуки за кодом (існуючі та невідомі), натискання "Я підписався ✓", нові пости каналу.
+#
+# Запуск:
+#   python -m benchmarks.load_test --rate 200 --duration 30
+#   python -m benchmarks.load_test --rate 500 --duration 60 --api-latency 0.03 --users 20000
+#   python -m benchmarks.load_test --postgres --json
+#   python -m benchmarks.load_test --webhook        # оновлення POST-запитами на webhook бота замість getUpdates
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import latency_summary, make_parser, report, setup_database
+from benchmarks.fake_telegram import FakeTelegramServer
+
+CHANNEL_ID = -1001234567890
+ADMIN_ID = 999000
+FIRST_USER_ID = 10000000
+WEBHOOK_SECRET = 'load-test-secret'
+WEBHOOK_PATH = '/load-test-webhook'
+
+# Скільки з'єднань Telegram одночасно тримає з webhook (як WEBHOOK_MAX_CONNECTIONS за замовчуванням)
+WEBHOOK_CONNECTIONS = 40
+
+# Код фільму у відповіді адміну на пост каналу
+ADMIN_CODE_RE = re.compile(r'Код:?\s+([A-Za-z0-9]+)')
+
+# Методи, якими бот відповідає користувачу (перший з них завершує запит)
+RESPONSE_METHODS = ('sendMessage', 'copyMessage', 'sendPhoto', 'editMessageText')
+
+
+class LoadGenerator:
+    """
+    Подає оновлення у підробний сервер і міряє час до першої відповіді бота.
+
+    Кожен користувач має щонайбільше один запит "в польоті", тому відповідь
+    зіставляється із запитом за chat_id; пости каналу - за кодом у підтвердженні адміну.
+    """
+
+    def __init__(self, server, args, codes, channel_username, webhook=None):
+        self.server = server
+        self.webhook = webhook   # WebhookSender (None - оновлення через getUpdates)
+        self.args = args
+        self.codes = codes
+        self.channel_username = channel_username.lstrip('@')
+        self.rnd = random.Random(args.seed)
+
+        self.pending = {}     # ключ -> (вид запиту, час відправки)
+        self.latencies = {}   # вид запиту -> список тривалостей
+        self.sent = {}
+        self.skipped = 0      # всі користувачі зайняті - запит пропущено
+        self._post_ids = iter(range(1, 10 ** 9))
+        self._update_ids = itertools.count(1)
+
+        server.on_call = self.on_call
+
+    # ---------- Відповіді бота ----------
+
+    def on_call(self, method, params, received_at):
+        if method not in RESPONSE_METHODS:
+            return
+
+        chat_id = int(params.get('chat_id', 0))
+        if chat_id == ADMIN_ID:
+            # Відповідь адміну на пост каналу: "Код: XXX" (додано) або "Код XXX вже існує"
+            match = ADMIN_CODE_RE.search(params.get('text', ''))
+            key = ('post', match.group(1)) if match else None
+        else:
+            key = ('chat', chat_id)
+
+        item = self.pending.pop(key, None)
+        if item is not None:
+            kind, sent_at = item
+            self.latencies.setdefault(kind, []).append(received_at - sent_at)
+
+    # ---------- Запити ----------
+
+    def push(self, update):
+        """Доставляє оновлення боту: через getUpdates підробного сервера або POST на webhook"""
+        if self.webhook is None:
+            self.server.push_update(update)
+        else:
+            self.webhook.send({'update_id': next(self._update_ids), **update})
+
+    def _free_user(self):
+        """Випадковий користувач без запиту в польоті (кілька спроб)"""
+        for _ in range(10):
+            user_id = FIRST_USER_ID + self.rnd.randrange(self.args.users)
+            if ('chat', user_id) not in self.pending:
+                return user_id
+        return None
+
+    def send_one(self):
+        roll = self.rnd.random()
+        if roll < self.args.channel_posts:
+            self._send_channel_post()
+            return
+
+        user_id = self._free_user()
+        if user_id is None:
+            self.skipped += 1
+            return
+
+        roll = self.rnd.random()
+        if roll < self.args.callbacks:
+            kind = 'callback_check_subscription'
+            update = self._callback_update(user_id, 'check_subscription')
+        elif roll < self.args.callbacks + self.args.unknown:
+            kind = 'search_unknown_code'
+            update = self._text_update(user_id, f"X{self.rnd.randrange(10 ** 6):06d}")
+        else:
+            kind = 'search_code'
+            update = self._text_update(user_id, self.rnd.choice(self.codes))
+
+        self.pending[('chat', user_id)] = (kind, time.perf_counter())
+        self.sent[kind] = self.sent.get(kind, 0) + 1
+        self.push(update)
+
+    def _send_channel_post(self):
+        post_id = next(self._post_ids)
+        self._push_post(500000 + post_id, f"LT{post_id:07d}", f"Навантажувальний тест {post_id}", 'channel_post')
+
+    def _push_post(self, message_id, code, title, kind):
+        update = {'channel_post': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': CHANNEL_ID, 'type': 'channel', 'username': self.channel_username},
+            'photo': [{'file_id': f"photo-{code}", 'file_unique_id': f"u-{code}", 'width': 720, 'height': 1280}],
+            'caption': f"Код: {code}\nНазва: {title}\nРік: 2024\n\nОпис:\nТест"
+        }}
+        self.pending[('post', code)] = (kind, time.perf_counter())
+        self.sent[kind] = self.sent.get(kind, 0) + 1
+        self.push(update)
+
+    async def seed(self):
+        """
+        Заповнює каталог постами каналу через сам бот (як при публікації в канал),
+        щоб фільми потрапили і в базу, і в кеші бота. Чекає підтвердження всіх постів.
+        """
+        for i, code in enumerate(self.codes):
+            self._push_post(100 + i, code, f"Фільм {i}", 'seed')
+
+        deadline = time.perf_counter() + 60 + len(self.codes) / 100
+        while self.pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+
+        seeded = len(self.latencies.pop('seed', []))
+        self.sent.pop('seed', None)
+        self.pending.clear()
+        return seeded
+
+    def _user(self, user_id):
+        return {'id': user_id, 'is_bot': False, 'first_name': f"User{user_id}"}
+
+    def _text_update(self, user_id, text):
+        return {'message': {
+            'message_id': self.server.next_message_id(),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self._user(user_id),
+            'text': text
+        }}
+
+    def _callback_update(self, user_id, data):
+        return {'callback_query': {
+            'id': str(self.server.next_message_id()),
+            'from': self._user(user_id),
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': self.server.next_message_id(),
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'text': 'Щоб користуватись ботом, потрібно підписатись на наш канал!'
+            }
+        }}
+
+    async def run(self):
+        """Подає запити рівномірно з частотою rate протягом duration секунд (відкритий цикл)"""
+        interval = 1.0 / self.args.rate
+        started = time.perf_counter()
+        total = int(self.args.rate * self.args.duration)
+
+        for i in range(total):
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.send_one()
+
+        # Чекаємо відповіді на запити в польоті
+        deadline = time.perf_counter() + self.args.timeout
+        while self.pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+        return time.perf_counter() - started
+
+
+class WebhookSender:
+    """
+    Надсилає оновлення на webhook бота так, як це робить Telegram: кілька постійних
+    з'єднань (keep-alive), у кожному - наступний запит після відповіді на попередній.
+    """
+
+    def __init__(self, port, path, secret, connections=WEBHOOK_CONNECTIONS):
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.queue = asyncio.Queue()
+        self.errors = 0
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(connections)]
+
+    def send(self, update):
+        self.queue.put_nowait(json.dumps(update).encode())
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _worker(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            while True:
+                body = await self.queue.get()
+                writer.write(
+                    f"POST {self.path} HTTP/1.1\r\n"
+                    f"Host: 127.0.0.1\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"X-Telegram-Bot-Api-Secret-Token: {self.secret}\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+
+                status = await reader.readline()
+                length = 0
+                while (line := await reader.readline()) not in (b'\r\n', b''):
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':', 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                if b' 200 ' not in status:
+                    self.errors += 1
+        finally:
+            writer.close()
+
+
+def free_port():
+    """Вільний локальний порт (для webhook-сервера бота)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_bot(port, log_path, webhook_port=None, send_rate=0.0):
+    """
+    Запускає bot.py окремим процесом, налаштованим на підробний сервер
+    (з webhook_port - у webhook-режимі на цьому порту, send_rate - загальний ліміт надсилання бота)
+    """
+    import config
+
+    env = dict(os.environ)
+    env.update({
+        'TELEGRAM_API_URL': f"http://127.0.0.1:{port}",
+        'BOT_TOKEN': '123456:LOAD-TEST-TOKEN',
+        'ADMIN_ID': str(ADMIN_ID),
+        'CHANNEL_USERNAME': config.CHANNEL_USERNAME,
+        'BOT_LOCK_FILE': os.path.join(os.path.dirname(log_path), 'bot.lock'),
+        # Pyrogram-сканер у тесті не потрібен
+        'API_ID': 'YOUR_API_ID',
+        'API_HASH': 'YOUR_API_HASH',
+        # Ліміт на один чат тест не перевіряє (у кожного користувача один запит у польоті),
+        # а підтвердження адміну на заповнення каталогу інакше йшли б по одному за секунду
+        'SEND_RATE_GLOBAL': str(send_rate),
+        'SEND_RATE_PER_CHAT': '0',
+    })
+    if webhook_port:
+        env.update({
+            'WEBHOOK_URL': f"http://127.0.0.1:{webhook_port}",
+            'WEBHOOK_PORT': str(webhook_port),
+            'WEBHOOK_PATH': WEBHOOK_PATH,
+            'WEBHOOK_HOST': '127.0.0.1',
+            'WEBHOOK_SECRET': WEBHOOK_SECRET,
+        })
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    log = open(log_path, 'w')
+    return subprocess.Popen([sys.executable, 'bot.py'], cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def run(args):
+    import config
+
+    codes = [f"L{i:06d}" for i in range(args.movies)]
+
+    server = FakeTelegramServer(api_latency=args.api_latency, flood_limit=args.flood_limit)
+    port = await server.start(port=args.port)
+
+    log_path = os.path.join(tempfile.mkdtemp(prefix='tg_films_load_'), 'bot.log')
+    webhook_port = free_port() if args.webhook else None
+    bot_process = start_bot(port, log_path, webhook_port, args.send_rate)
+    webhook = None
+
+    try:
+        # Бот готовий, коли почав опитувати getUpdates (або зареєстрував webhook)
+        ready_call = 'setWebhook' if args.webhook else 'getUpdates'
+        deadline = time.monotonic() + 60
+        while not server.calls.get(ready_call):
+            if bot_process.poll() is not None or time.monotonic() > deadline:
+                raise SystemExit(f"❌ Бот не запустився, лог: {log_path}")
+            await asyncio.sleep(0.1)
+
+        if args.webhook:
+            webhook = WebhookSender(webhook_port, WEBHOOK_PATH, WEBHOOK_SECRET)
+
+        generator = LoadGenerator(server, args, codes, config.CHANNEL_USERNAME, webhook)
+        seeded = await generator.seed()
+        if seeded < len(codes):
+            print(f"⚠️ Каталог заповнено не повністю: {seeded} з {len(codes)}", file=sys.stderr)
+        server.calls.clear()
+        server.flood_errors = 0
+        elapsed = await generator.run()
+    finally:
+        if webhook is not None:
+            await webhook.close()
+        bot_process.send_signal(signal.SIGINT)
+        try:
+            bot_process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            bot_process.kill()
+        await server.stop()
+
+    results = {}
+    all_latencies = []
+    for kind, sent in sorted(generator.sent.items()):
+        latencies = generator.latencies.get(kind, [])
+        all_latencies += latencies
+        results[kind] = {'sent': sent, 'timeouts': sent - len(latencies)}
+        if latencies:
+            results[kind].update(latency_summary(latencies))
+            del results[kind]['calls_per_sec']
+
+    total_sent = sum(generator.sent.values())
+    results['total'] = {
+        'target_rate': args.rate,
+        'sent': total_sent,
+        'completed': len(all_latencies),
+        'timeouts': total_sent - len(all_latencies),
+        'skipped_busy_users': generator.skipped,
+        'throughput_per_sec': round(len(all_latencies) / elapsed, 1),
+        'api_calls': sum(count for method, count in server.calls.items() if method != 'getUpdates'),
+        'get_updates_calls': server.calls.get('getUpdates', 0),
+        'catalog': seeded,
+        'flood_errors': server.flood_errors,
+    }
+    if webhook is not None:
+        results['total']['webhook_errors'] = webhook.errors
+    if all_latencies:
+        summary = latency_summary(all_latencies)
+        results['total'].update({key: summary[key] for key in ('p50_ms', 'p95_ms', 'p99_ms')})
+
+    return results, log_path
+
+
+def main():
+    parser = make_parser("Навантажувальний тест бота з підробним Bot API")
+    parser.add_argument('--rate', type=float, default=200, help='оновлень за секунду')
+    parser.add_argument('--duration', type=float, default=20, help='тривалість подачі навантаження, секунд')
+    parser.add_argument('--users', type=int, default=5000, help='скільки різних користувачів')
+    parser.add_argument('--movies', type=int, default=5000, help='скільки фільмів у базі')
+    parser.add_argument('--unknown', type=float, default=0.2, help='частка пошуків невідомих кодів')
+    parser.add_argument('--callbacks', type=float, default=0.05, help='частка натискань "Я підписався ✓"')
+    parser.add_argument('--channel-posts', type=float, default=0.01, help='частка нових постів каналу')
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help='затримка кожного методу Bot API в секундах (мережа до Telegram)')
+    parser.add_argument('--timeout', type=float, default=10, help='скільки чекати відповіді після подачі')
+    parser.add_argument('--port', type=int, default=0, help='порт підробного сервера (0 - будь-який вільний)')
+    parser.add_argument('--send-rate', type=float, default=0,
+                        help='ліміт бота на надсилання повідомлень за секунду (SEND_RATE_GLOBAL), 0 - без ліміту')
+    parser.add_argument('--flood-limit', type=int, default=0,
+                        help='підробний сервер відповідає 429 понад стільки повідомлень за секунду (0 - ніколи)')
+    parser.add_argument('--webhook', action='store_true',
+                        help='бот у webhook-режимі: оновлення POST-запитами замість getUpdates')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    backend = setup_database(args.postgres)
+    results, log_path = asyncio.run(run(args))
+
+    mode = 'webhook' if args.webhook else 'polling'
+    report(f"Навантажувальний тест ({backend}, {mode}, {args.rate:g} оновлень/с, api_latency={args.api_latency})",
+           results, args.json)
+    if not args.json:
+        print(f"  📄 Лог бота: {log_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/run_all.py - Запуск усіх бенчмарків і збереження результатів у JSON
+#
+# Запуск:
+#   python -m benchmarks.run_all --output bench-before.json
+#   python -m benchmarks.run_all --quick --only database,handlers,parser
+#   python -m benchmarks.run_all --postgres --output bench-pg.json
+#
+# Порівняння двох запусків (наприклад, до і після коміту):
+#   python -m benchmarks.compare bench-before.json bench-after.json
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Назва -> (модуль, аргументи для --quick, чи підтримує --postgres)
+BENCHMARKS = {
+    'database': ('benchmarks.bench_database', ['--movies', '1000', '--lookups', '5000'], True),
+    'pool': ('benchmarks.bench_pool', ['--lookups', '2000'], True),
+    'ingest': ('benchmarks.bench_ingest', ['--rows', '2000'], True),
+    'backfill': ('benchmarks.bench_backfill', ['--messages', '5000'], True),
+    'monitor': ('benchmarks.bench_monitor', ['--bursts', '3'], True),
+    'handlers': ('benchmarks.bench_handlers', ['--movies', '500', '--lookups', '500'], True),
+    'delivery': ('benchmarks.bench_delivery', ['--deliveries', '100'], False),
+    'async_lookups': ('benchmarks.bench_async_lookups', [], True),
+    'parser': ('benchmarks.bench_parser', ['--posts', '5000', '--repeat', '3'], False),
+    'code_filter': ('benchmarks.bench_code_filter', ['--codes', '20000', '--probes', '20000'], False),
+    'title_search': ('benchmarks.bench_title_search', ['--titles', '20000', '--queries', '500'], False),
+    'inline': ('benchmarks.bench_inline', ['--titles', '10000', '--users', '50'], False),
+    'iter_memory': ('benchmarks.bench_iter_memory', ['--rows', '100000'], False),
+}
+
+
+def git_revision():
+    """Коміт, на якому запускались бенчмарки (і чи є незакомічені зміни)"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True
+        ).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def run_benchmark(module, extra_args):
+    """
+    Запускає бенчмарк окремим процесом (чиста пам'ять і кеші) з --json.
+
+    Повертає розібраний JSON-рядок результату або None при помилці.
+    """
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-m', module, '--json', *extra_args],
+        capture_output=True, text=True
+    )
+    elapsed = round(time.perf_counter() - started, 2)
+
+    # Бот і база пишуть у stdout власні повідомлення - беремо тільки рядок результату
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith('{"benchmark"'):
+            result = json.loads(line)
+            result['wall_seconds'] = elapsed
+            return result
+
+    print(f"❌ {module} завершився з кодом {process.returncode}:\n{process.stderr[-2000:]}", file=sys.stderr)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск усіх бенчмарків з результатами в JSON")
+    parser.add_argument('--only', help='через кому: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='менші обсяги даних (швидка перевірка)')
+    parser.add_argument('--postgres', action='store_true',
+                        help='бенчмарки бази - на PostgreSQL з DATABASE_URL (ТАБЛИЦЯ movies БУДЕ ЗМІНЕНА!)')
+    parser.add_argument('--output', help='файл для результатів (за замовчуванням - тільки вивід)')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"❌ Невідомі бенчмарки: {', '.join(unknown)}")
+
+    run = {
+        **git_revision(),
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'backend': 'postgres' if args.postgres else 'sqlite',
+        'benchmarks': {},
+    }
+
+    for name in names:
+        module, quick_args, supports_postgres = BENCHMARKS[name]
+        extra_args = list(quick_args) if args.quick else []
+        if args.postgres and supports_postgres:
+            extra_args.append('--postgres')
+
+        print(f"⏱️ {name}...", file=sys.stderr)
+        result = run_benchmark(module, extra_args)
+        if result is not None:
+            run['benchmarks'][name] = result
+
+    text = json.dumps(run, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"✅ Результати збережено: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,31 @@
 # bot.py - Головний файл Telegram бота для пошуку фільмів
 
 # Імпортуємо необхідні бібліотеки
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, InlineQueryHandler, filters, ContextTypes
+from telegram.error import BadRequest, TelegramError
+import asyncio
+import base64
+import binascii
+import io
 import logging
-import re  # Для пошуку коду в тексті
+import re
+import time
 
 # Імпортуємо наші власні файли
 import config
 import database
+import database_async
+import metrics
+from telegram_request import InstrumentedRequest
 from channel_scanner import scanner
+from subscription_cache import subscription_cache
+from inline_cache import inline_cache
+from post_cache import post_cache
+from title_search import search_key
+from post_parser import parse_post
+from profiler import profiler, CPROFILE, SAMPLE
+from rate_limiter import send_limiter, ADMIN_REPORT
 
 # Налаштування логування (щоб бачити що відбувається)
 logging.basicConfig(
@@ -21,18 +37,25 @@ logger = logging.getLogger(__name__)
 
 # ========== ФУНКЦІЯ ПЕРЕВІРКИ ПІДПИСКИ ==========
 
-async def check_subscription(user_id: int, context: ContextTypes.DEFAULT_TYPE) -> bool:
+async def check_subscription(user_id: int, context: ContextTypes.DEFAULT_TYPE, use_cache: bool = True) -> bool:
     """
     Перевіряє, чи користувач підписаний на канал.
     
     Параметри:
     - user_id: Telegram ID користувача
     - context: контекст бота (для доступу до API)
+    - use_cache: False - завжди питати Telegram (кнопка "Я підписався ✓")
     
     Повертає:
     - True: якщо підписаний
     - False: якщо НЕ підписаний
     """
+    # Спочатку кеш - не робимо get_chat_member на кожне повідомлення користувача
+    if use_cache:
+        cached = subscription_cache.get(user_id)
+        if cached is not None:
+            return cached
+    
     try:
         # Отримуємо інформацію про користувача в каналі
         member = await context.bot.get_chat_member(
@@ -44,10 +67,12 @@ async def check_subscription(user_id: int, context: ContextTypes.DEFAULT_TYPE) -
         # Статуси: 'creator' (власник), 'administrator' (адмін), 'member' (учасник)
         # 'left' (вийшов), 'kicked' (забанений)
         
-        if member.status in ['creator', 'administrator', 'member']:
-            return True  # Користувач підписаний
-        else:
-            return False  # Користувач НЕ підписаний
+        is_subscribed = member.status in ['creator', 'administrator', 'member']
+        
+        # Запам'ятовуємо результат (помилки не кешуємо)
+        subscription_cache.set(user_id, is_subscribed)
+        
+        return is_subscribed
             
     except Exception as e:
         # Якщо виникла помилка (наприклад, канал не знайдено)
@@ -57,6 +82,24 @@ async def check_subscription(user_id: int, context: ContextTypes.DEFAULT_TYPE) -
 
 # ========== КОМАНДА /START ==========
 
+def notify_admin(context: ContextTypes.DEFAULT_TYPE, text: str):
+    """
+    Надсилає повідомлення адміну фоном і з низьким пріоритетом (rate_limiter.ADMIN_REPORT).
+    
+    Обробник не чекає на відправку: в особистий чат адміна Telegram дозволяє ~1 повідомлення/с,
+    і при масовій публікації постів підтвердження мають стояти в черзі надсилання,
+    а не затримувати обробку наступних постів і відповіді користувачам.
+    """
+    async def send():
+        try:
+            await context.bot.send_message(chat_id=config.ADMIN_ID, text=text, rate_limit_args=ADMIN_REPORT)
+        except Exception as e:
+            logger.error(f"Не вдалося надіслати повідомлення адміну: {e}")
+    
+    context.application.create_task(send())
+
+
+@metrics.timed_handler
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обробник команди /start
@@ -67,6 +110,23 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Перевіряємо підписку
     is_subscribed = await check_subscription(user.id, context)
     
+    if is_subscribed and context.args and context.args[0] != "help":
+        # Посилання t.me/бот?start=КОД (кнопка з inline-результату) - одразу надсилаємо фільм
+        code = decode_start_payload(context.args[0])
+        if code is None:
+            await update.message.reply_text("❌ Посилання на фільм пошкоджене. Надішліть код фільму повідомленням")
+            return
+        
+        movie = await database_async.find_movie(code)
+        
+        if movie:
+            if await deliver_movie(context, update.effective_chat.id, code, movie):
+                logger.info(f"Користувач {user.id} отримав фільм {code} за посиланням")
+            return
+        
+        await update.message.reply_text(f"Фільм з кодом \"{code}\" не знайдено 😔")
+        return
+    
     if is_subscribed:
         # Якщо підписаний - показуємо привітання
         welcome_text = f"""
@@ -108,6 +168,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ========== ОБРОБКА НАТИСКАННЯ КНОПКИ "Я ПІДПИСАВСЯ" ==========
 
+@metrics.timed_handler
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обробляє натискання на кнопки (callback queries)
@@ -119,8 +180,8 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Користувач натиснув "Я підписався"
         user = query.from_user
         
-        # Перевіряємо підписку ще раз
-        is_subscribed = await check_subscription(user.id, context)
+        # Перевіряємо підписку ще раз (без кешу - користувач міг щойно підписатись)
+        is_subscribed = await check_subscription(user.id, context, use_cache=False)
         
         if is_subscribed:
             # Підписка підтверджена!
@@ -152,55 +213,45 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             await query.edit_message_text(error_text, reply_markup=reply_markup)
     
-    elif query.data == "refresh_database":
-        # Користувач натиснув "Оновити" в панелі бази даних
+    elif query.data == "refresh_database" or query.data.startswith(("db:", "ls:")):
+        # Перегортання сторінок /list та /database (і кнопка "Оновити")
         user = query.from_user
         
         if user.id != config.ADMIN_ID:
             await query.edit_message_text("Ця функція доступна тільки адміністратору!")
             return
         
-        # Оновлюємо список фільмів
-        movies = database.get_all_movies()
+        if query.data == "refresh_database":
+            # Кнопка зі старих повідомлень - показуємо першу сторінку
+            view, action, code = "db", "", None
+        else:
+            view, action, code = query.data.split(":", 2)
         
-        if not movies:
+        text, reply_markup = await build_movies_page(view, action, code)
+        
+        if view == "db":
+            await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+        else:
+            await query.edit_message_text(text, reply_markup=reply_markup)
+    
+    elif query.data.startswith("movie:"):
+        # Користувач обрав фільм зі списку результатів пошуку за назвою
+        user = query.from_user
+        
+        if not await check_subscription(user.id, context):
             await query.edit_message_text(
-                "База даних порожня!\n\n"
-                "Публікуйте пости в канал з текстом 'Код: 001'"
+                f"Щоб користуватись ботом, потрібно підписатись на канал {config.CHANNEL_USERNAME}!"
             )
             return
         
-        # Формуємо новий список
-        text = f"📊 База даних фільмів ({len(movies)} фільмів)\n\n"
-        
-        # Словник з назвами фільмів
-        movie_titles = {
-            '001': 'Ніхто2',
-            '002': 'Голови держав'
-        }
+        code = query.data.split(":", 1)[1]
+        movie = await database_async.find_movie(code)
         
-        for i, movie in enumerate(movies, 1):
-            # Отримуємо назву з нашого словника
-            title = movie_titles.get(movie['code'], 'Невідома назва')
-            text += f"{i}. **{movie['code']}** - {title}\n"
-        
-        # Створюємо кнопки
-        keyboard = []
-        for i in range(0, len(movies), 2):
-            row = []
-            for j in range(2):
-                if i + j < len(movies):
-                    movie = movies[i + j]
-                    row.append(InlineKeyboardButton(
-                        f"🗑️ {movie['code']}", 
-                        callback_data=f"delete_{movie['code']}"
-                    ))
-            keyboard.append(row)
-        
-        keyboard.append([InlineKeyboardButton("🔄 Оновити", callback_data="refresh_database")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+        if movie:
+            if await deliver_movie(context, query.message.chat_id, code, movie):
+                logger.info(f"Користувач {user.id} знайшов фільм {code} за назвою")
+        else:
+            await query.edit_message_text(f"❌ Фільм з кодом {code} більше не доступний")
     
     elif query.data.startswith("delete_"):
         # Користувач натиснув кнопку видалення фільму
@@ -214,7 +265,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         code = query.data.replace("delete_", "")
         
         # Видаляємо фільм
-        success = database.delete_movie(code)
+        success = await database_async.delete_movie(code)
         
         if success:
             await query.edit_message_text(f"✅ Фільм з кодом {code} видалено!")
@@ -273,6 +324,9 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             success, message = await scanner.complete_auth(current_code)
             
             if success:
+                # Клієнт готовий - слухаємо нові й видалені пости каналу
+                start_channel_monitor(context.application)
+                
                 await query.edit_message_text(
                     f"✅ **Авторизація успішна!**\n\n"
                     f"{message}\n\n"
@@ -334,6 +388,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ========== АВТОМАТИЧНЕ ЗЧИТУВАННЯ ПОСТІВ З КАНАЛУ ==========
 
+@metrics.timed_handler
 async def handle_channel_post(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     ОПТИМІЗОВАНА ФУНКЦІЯ! Автоматично зчитує пости з каналу.
@@ -374,34 +429,35 @@ async def handle_channel_post(update: Update, context: ContextTypes.DEFAULT_TYPE
         logger.info("⚠️ Пост без тексту, пропускаємо")
         return
     
-    # Шукаємо код в тексті: "Код: 001" (регістр не важливий)
-    match = re.search(r'[Кк][Оо][Дд]:\s*([A-Za-z0-9]+)', text)
+    # Розбираємо пост за один прохід: код, назва, рік, опис, посилання
+    movie_info = parse_post(text)
     
-    if match:
-        code = match.group(1).upper()  # 001
+    if movie_info['code']:
+        code = movie_info['code']  # 001
         message_id = post.message_id
         chat_id = post.chat_id
-        
-        # Додатково шукаємо назву (опціонально, для логів)
-        title_match = re.search(r'[Нн][Аа][Зз][Вв][Аа]:\s*(.+)', text)
-        title = title_match.group(1).strip() if title_match else "Невідома"
-        
-        # Шукаємо посилання в тексті
-        # Формати: "Посилання: https://...", "Link: https://...", "Ссылка: https://..."
-        link_match = re.search(r'(?:[Пп][Оо][Сс][Ии][Лл][Аа][Нн][Нн][Яя]|[Лл][Ии][Нн][Кк]|[Сс][Сс][Ыы][Лл][Кк][Аа]):\s*(https?://[^\s]+)', text)
-        link = link_match.group(1) if link_match else None
+        link = movie_info['link']
+        title = movie_info['title'] or "Невідома"  # для логів і підтвердження адміну
         
         # Зберігаємо в базу
-        success = database.add_movie(code, message_id, chat_id, link)
+        success = await database_async.add_movie(
+            code, message_id, chat_id, link,
+            title=movie_info['title'],
+            year=movie_info['year'],
+            description=movie_info['description'],
+            post_date=post.date
+        )
         
         if success:
+            # Запам'ятовуємо file_id і підпис - фільм надсилатиметься без copy_message
+            post_cache.remember(post)
+            
             # Формуємо повідомлення для логу
             log_message = f"Автоматично додано: {code} - {title} (msg_id: {message_id})"
             logger.info(log_message)
             
-            # 🔔 НАДСИЛАЄМО ПІДТВЕРДЖЕННЯ АДМІНУ
-            try:
-                confirmation_text = f"""
+            # 🔔 НАДСИЛАЄМО ПІДТВЕРДЖЕННЯ АДМІНУ (фоном, див. notify_admin)
+            confirmation_text = f"""
 Фільм успішно додано в базу!
 
 Код: {code}
@@ -411,31 +467,90 @@ Message ID: {message_id}
 
 Користувачі тепер можуть знайти його за кодом {code}
 """
-                await context.bot.send_message(
-                    chat_id=config.ADMIN_ID,
-                    text=confirmation_text
-                )
-            except Exception as e:
-                logger.error(f"Не вдалося надіслати підтвердження адміну: {e}")
+            notify_admin(context, confirmation_text)
                 
         else:
+            # Цей самий пост вже додав моніторинг каналу (Pyrogram) - це не дублікат
+            existing = await database_async.find_movie(code)
+            if existing and (existing['chat_id'], existing['message_id']) == (chat_id, message_id):
+                post_cache.remember(post)
+                logger.info(f"Фільм {code} вже додано моніторингом каналу (msg_id: {message_id})")
+                return
+            
             # Код вже існує
             logger.warning(f"Код {code} вже існує в базі! Пост НЕ додано.")
             
             # Повідомляємо адміну про дублікат
-            try:
-                await context.bot.send_message(
-                    chat_id=config.ADMIN_ID,
-                    text=f"Помилка! Код {code} вже існує в базі.\n\nВиберіть інший код або видаліть старий: /delete {code}"
-                )
-            except Exception as e:
-                logger.error(f"Не вдалося надіслати попередження адміну: {e}")
+            notify_admin(
+                context,
+                f"Помилка! Код {code} вже існує в базі.\n\nВиберіть інший код або видаліть старий: /delete {code}"
+            )
     else:
         logger.info("Код не знайдено в пості (не має 'Код: ...')")
 
 
+@metrics.timed_handler
+async def handle_edited_channel_post(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Пост каналу відредаговано: фільм у базі оновлюється за message_id поста.
+    
+    - змінили посилання/назву/опис - оновлюються в базі й кеші
+    - змінили код - фільм переходить на новий код (якщо його не має інший пост)
+    - прибрали код - фільм видаляється
+    Вміст поста в post_cache теж оновлюється, щоб користувачі не отримували стару версію.
+    """
+    post = update.edited_channel_post
+    
+    if not post:
+        return
+    
+    # Перевіряємо чи це наш канал
+    if post.chat.username != config.CHANNEL_USERNAME.replace("@", ""):
+        return
+    
+    movie_info = parse_post(post.caption or post.text or "")
+    result, old_codes = await database_async.update_movie_post(
+        post.chat_id,
+        post.message_id,
+        movie_info['code'],
+        movie_info['link'],
+        title=movie_info['title'],
+        year=movie_info['year'],
+        description=movie_info['description'],
+        post_date=post.date
+    )
+    
+    # Кеш вмісту поста: нова версія або нічого
+    if result in ('updated', 'added'):
+        post_cache.remember(post)
+    else:
+        post_cache.discard(post.chat_id, post.message_id)
+    
+    code = movie_info['code']
+    old = ', '.join(old_codes)
+    if result == 'updated' and old_codes == [code]:
+        logger.info(f"EDIT Оновлено фільм {code} (msg_id: {post.message_id})")
+    elif result == 'updated':
+        logger.info(f"EDIT Код змінено: {old} → {code} (msg_id: {post.message_id})")
+        notify_admin(context, f"✏️ Пост відредаговано: код {old} змінено на {code}")
+    elif result == 'added':
+        logger.info(f"EDIT Додано фільм {code} з відредагованого поста (msg_id: {post.message_id})")
+        notify_admin(context, f"✏️ Пост відредаговано: фільм {code} додано в базу")
+    elif result == 'removed':
+        logger.info(f"EDIT З поста прибрано код, видалено: {old} (msg_id: {post.message_id})")
+        notify_admin(context, f"✏️ З поста прибрано код - фільм {old} видалено з бази")
+    elif result == 'conflict':
+        logger.warning(f"Код {code} з відредагованого поста вже має інший пост (msg_id: {post.message_id})")
+        notify_admin(
+            context,
+            f"Помилка! Код {code} з відредагованого поста вже існує в базі.\n\n"
+            f"Виберіть інший код або видаліть старий: /delete {code}"
+        )
+
+
 # ========== ПОШУК ФІЛЬМУ ЗА КОДОМ ==========
 
+@metrics.timed_handler
 async def search_movie(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обробляє текстові повідомлення від користувача
@@ -471,54 +586,29 @@ async def search_movie(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Шукаємо фільм в базі даних
-    movie = database.find_movie(message_text)
+    movie = await database_async.find_movie(message_text)
     
     if movie:
         # Фільм знайдено! Пересилаємо пост з каналу
-        try:
-            # Копіюємо повідомлення з каналу (з фото, текстом, всім!)
-            await context.bot.copy_message(
-                chat_id=update.effective_chat.id,
-                from_chat_id=movie['chat_id'],
-                message_id=movie['message_id']
-            )
-            
-            # Якщо є посилання - додаємо кнопку
-            if movie.get('link'):
-                keyboard = [
-                    [InlineKeyboardButton("🔗 Дивитись фільм", url=movie['link'])]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await update.message.reply_text(
-                    "Натисніть кнопку щоб перейти до фільму:",
-                    reply_markup=reply_markup
-                )
-            
+        if await deliver_movie(context, update.effective_chat.id, message_text, movie):
             logger.info(f"Користувач {user.id} знайшов фільм {message_text}")
-            
-        except Exception as e:
-            # Якщо виникла помилка (наприклад, пост видалено або неправильний message_id)
-            logger.error(f"Помилка при копіюванні поста: {e}")
-            
-            # Видаляємо фільм з бази даних, бо він невалідний
-            database.delete_movie(message_text)
-            
-            await update.message.reply_text(
-                f"❌ Помилка! Пост для фільму {message_text} не знайдено в каналі.\n\n"
-                f"Фільм видалено з бази даних.\n\n"
-                f"Адміністратор має опублікувати його заново в канал {config.CHANNEL_USERNAME}"
-            )
-            
-            # Повідомляємо адміну
-            try:
-                await context.bot.send_message(
-                    chat_id=config.ADMIN_ID,
-                    text=f"⚠️ Користувач спробував знайти фільм {message_text}, але пост не знайдено!\n\n"
-                         f"Фільм видалено з бази. Опублікуйте його заново в канал."
-                )
-            except:
-                pass
+        return
+    
+    # Коду немає - можливо, користувач написав назву фільму
+    matches = await database_async.search_titles(update.message.text)
+    
+    if matches:
+        keyboard = [
+            [InlineKeyboardButton(format_movie_title(match), callback_data=f"movie:{match['code']}")]
+            for match in matches
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await update.message.reply_text(
+            "Знайдено фільми з такою назвою - оберіть потрібний:",
+            reply_markup=reply_markup
+        )
+        logger.info(f"Користувач {user.id} шукав за назвою: знайдено {len(matches)}")
     else:
         # Фільм не знайдено
         not_found_text = f"""
@@ -533,8 +623,327 @@ async def search_movie(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(not_found_text)
 
 
+def format_movie_title(movie: dict) -> str:
+    """Підпис кнопки з фільмом: 🎬 Назва (рік)"""
+    if movie.get('year'):
+        return f"🎬 {movie['title']} ({movie['year']})"
+    return f"🎬 {movie['title']}"
+
+
+async def deliver_movie(context: ContextTypes.DEFAULT_TYPE, chat_id: int, code: str, movie: dict) -> bool:
+    """
+    Надсилає користувачу пост з фільмом одним викликом Bot API:
+    копія поста з каналу (або той самий вміст за file_id з post_cache) разом з кнопкою посилання.
+    
+    Якщо поста в каналі більше немає - фільм видаляється з бази,
+    адміністратор отримує попередження. Інші помилки (ліміти, мережа) фільм не чіпають -
+    користувач отримує прохання спробувати пізніше.
+    
+    Повертає:
+    - True якщо пост надіслано
+    """
+    # Якщо є посилання - кнопка йде в тому ж повідомленні, що й пост
+    reply_markup = None
+    if movie.get('link'):
+        keyboard = [
+            [InlineKeyboardButton("🔗 Дивитись фільм", url=movie['link'])]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    # Пост, який бот бачив сам - надсилаємо за file_id, без звернення до каналу.
+    # Лише поки працює моніторинг каналу: без нього бот не дізнається про видалені пости,
+    # і кеш надсилав би їх далі (copy_message натомість перевіряє, що пост ще є)
+    payload = None
+    if channel_monitor_running(context.application):
+        payload = post_cache.get(movie['chat_id'], movie['message_id'])
+    if payload is not None:
+        try:
+            await send_cached_post(context, chat_id, payload, reply_markup)
+            return True
+        except BadRequest as e:
+            # file_id міг застаріти - пробуємо звичайну копію поста
+            logger.warning(f"Не вдалося надіслати пост {code} з кешу: {e}")
+            post_cache.discard(movie['chat_id'], movie['message_id'], failed=True)
+        except TelegramError as e:
+            return await reply_delivery_failed(context, chat_id, code, e)
+    
+    try:
+        # Копіюємо повідомлення з каналу (з фото, текстом, всім!)
+        await context.bot.copy_message(
+            chat_id=chat_id,
+            from_chat_id=movie['chat_id'],
+            message_id=movie['message_id'],
+            reply_markup=reply_markup
+        )
+        
+        return True
+        
+    except BadRequest as e:
+        if not is_missing_post_error(e):
+            return await reply_delivery_failed(context, chat_id, code, e)
+        
+        # Пост видалено з каналу або неправильний message_id
+        logger.error(f"Помилка при копіюванні поста: {e}")
+        
+        # Видаляємо фільм з бази даних, бо він невалідний
+        await database_async.delete_movie(code)
+        
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=f"❌ Помилка! Пост для фільму {code} не знайдено в каналі.\n\n"
+                 f"Фільм видалено з бази даних.\n\n"
+                 f"Адміністратор має опублікувати його заново в канал {config.CHANNEL_USERNAME}"
+        )
+        
+        # Повідомляємо адміну
+        notify_admin(
+            context,
+            f"⚠️ Користувач спробував знайти фільм {code}, але пост не знайдено!\n\n"
+            f"Фільм видалено з бази. Опублікуйте його заново в канал."
+        )
+        
+        return False
+        
+    except TelegramError as e:
+        return await reply_delivery_failed(context, chat_id, code, e)
+
+
+# Тексти BadRequest, якими Telegram відповідає на copy_message для відсутнього поста
+MISSING_POST_ERRORS = ('message to copy not found', 'message_id_invalid')
+
+
+def is_missing_post_error(error: BadRequest) -> bool:
+    """Чи означає помилка, що поста в каналі більше немає (а не інша проблема запиту)"""
+    text = error.message.lower()
+    return any(marker in text for marker in MISSING_POST_ERRORS)
+
+
+async def reply_delivery_failed(context: ContextTypes.DEFAULT_TYPE, chat_id: int, code: str, error: Exception) -> bool:
+    """
+    Тимчасова помилка надсилання (RetryAfter, TimedOut, NetworkError ...):
+    фільм лишається в базі, користувач отримує прохання спробувати пізніше.
+    
+    Повертає False - фільм не надіслано
+    """
+    logger.warning(f"Не вдалося надіслати фільм {code}: {error}")
+    
+    try:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=f"⚠️ Не вдалося надіслати фільм {code}. Спробуйте ще раз трохи пізніше."
+        )
+    except TelegramError as e:
+        logger.warning(f"Не вдалося повідомити користувача {chat_id}: {e}")
+    
+    return False
+
+
+async def send_cached_post(context: ContextTypes.DEFAULT_TYPE, chat_id: int, payload: tuple, reply_markup=None):
+    """Надсилає вміст поста з post_cache (file_id + підпис з форматуванням) одним викликом"""
+    kind, file_id, text, entities = payload
+    
+    # Текстовий пост - без файлу
+    if file_id is None:
+        return await context.bot.send_message(
+            chat_id=chat_id, text=text, entities=entities, reply_markup=reply_markup
+        )
+    
+    # send_photo / send_video / send_animation / send_document
+    send = getattr(context.bot, f"send_{kind}")
+    return await send(chat_id, file_id, caption=text, caption_entities=entities, reply_markup=reply_markup)
+
+
+# ========== INLINE-ПОШУК (@бот назва) ==========
+
+@metrics.timed_handler
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Відповідає на inline-запити "@бот назва" списком фільмів.
+    
+    Запит приходить на кожну набрану літеру, тому:
+    - результати шукаються тільки в пам'яті (database.search_catalog, у пулі потоків) і кешуються за нормалізованим запитом
+    - Telegram теж кешує відповідь (cache_time), однакову для всіх користувачів
+    - сторінки віддаються через next_offset
+    """
+    query = update.inline_query
+    key = search_key(query.query)
+    
+    if not key:
+        # Порожній запит - підказка з переходом у бота
+        await query.answer(
+            [],
+            cache_time=config.INLINE_CACHE_TIME,
+            switch_pm_text="Введіть назву або код фільму",
+            switch_pm_parameter="help"
+        )
+        return
+    
+    version = database.get_catalog_version()
+    movies = inline_cache.get(key, version)
+    if movies is None:
+        movies = await database_async.search_catalog(query.query, limit=config.INLINE_MAX_RESULTS)
+        inline_cache.set(key, version, movies)
+    
+    try:
+        offset = int(query.offset or 0)
+    except ValueError:
+        offset = 0
+    page = movies[offset:offset + config.INLINE_PAGE_SIZE]
+    next_offset = offset + len(page)
+    
+    results = [build_inline_result(movie, context.bot.username) for movie in page]
+    
+    await query.answer(
+        results,
+        cache_time=config.INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=str(next_offset) if next_offset < len(movies) else ""
+    )
+
+
+def build_inline_result(movie: dict, bot_username: str) -> InlineQueryResultArticle:
+    """Inline-результат: назва фільму + кнопка, що відкриває бота і надсилає пост з фільмом"""
+    code = movie['code']
+    title = format_movie_title(movie) if movie.get('title') else f"🎬 Фільм {code}"
+    
+    # Код, який не вміщується в параметр start, - без кнопки (код є в тексті повідомлення)
+    reply_markup = None
+    payload = encode_start_payload(code)
+    if payload is not None:
+        keyboard = [
+            [InlineKeyboardButton("▶️ Отримати фільм", url=f"https://t.me/{bot_username}?start={payload}")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    return InlineQueryResultArticle(
+        id=code,
+        title=title,
+        description=f"Код фільму: {code}",
+        input_message_content=InputTextMessageContent(f"{title}\nКод фільму: {code}"),
+        reply_markup=reply_markup
+    )
+
+
+# Параметр start у посиланні t.me/бот?start=... - лише такі символи, до 64
+START_PAYLOAD = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+# Початок параметра start з кодом у base64: коди завжди у верхньому регістрі, тож із ним не плутаються
+ENCODED_PAYLOAD_PREFIX = 'b-'
+
+
+def encode_start_payload(code: str):
+    """
+    Параметр start для коду фільму.
+    
+    Повертає:
+    - сам код, якщо він складається з дозволених символів (латиниця, цифри, _ і -)
+    - 'b-' + код у urlsafe base64 без '=' (кирилиця, інші символи)
+    - None, якщо і так довший за 64 символи
+    """
+    if START_PAYLOAD.fullmatch(code):
+        return code
+    
+    encoded = base64.urlsafe_b64encode(code.encode()).decode().rstrip('=')
+    payload = ENCODED_PAYLOAD_PREFIX + encoded
+    return payload if START_PAYLOAD.fullmatch(payload) else None
+
+
+def decode_start_payload(payload: str):
+    """Код фільму з параметра start (encode_start_payload); None, якщо параметр пошкоджений"""
+    if not payload.startswith(ENCODED_PAYLOAD_PREFIX):
+        return payload.upper()
+    
+    encoded = payload[len(ENCODED_PAYLOAD_PREFIX):]
+    try:
+        code = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    return code or None
+
+
+# ========== СТОРІНКИ СПИСКУ ФІЛЬМІВ ==========
+
+async def build_movies_page(view: str, action: str = "", code: str = None):
+    """
+    Формує одну сторінку списку фільмів для /list (view="ls") або /database (view="db").
+    
+    З бази читаються тільки фільми цієї сторінки (keyset-пагінація за кодом).
+    
+    Параметри:
+    - view: "ls" - список кодів, "db" - панель з кнопками видалення
+    - action: "" - перша сторінка, "n" - після code, "p" - перед code, "r" - оновити сторінку, що починається з code
+    - code: код-курсор для action
+    
+    Повертає:
+    - (текст, кнопки)
+    """
+    page_size = config.ADMIN_PAGE_SIZE
+    
+    if action == "n":
+        page = await database_async.get_movies_page(after_code=code, limit=page_size)
+    elif action == "p":
+        page = await database_async.get_movies_page(before_code=code, limit=page_size)
+    elif action == "r":
+        page = await database_async.get_movies_page(after_code=code, limit=page_size, inclusive=True)
+    else:
+        page = await database_async.get_movies_page(limit=page_size)
+    
+    # Сторінка могла спорожніти (фільми видалили) - показуємо першу
+    if not page['movies'] and action:
+        page = await database_async.get_movies_page(limit=page_size)
+    
+    total = await database_async.count_movies()
+    movies = page['movies']
+    
+    if not movies:
+        return "База даних порожня!\n\nПублікуйте пости в канал з текстом 'Код: 001'", None
+    
+    keyboard = []
+    
+    if view == "db":
+        text = f"📊 База даних фільмів ({total} фільмів)\n\n"
+        
+        for movie in movies:
+            # Назва та рік зберігаються в базі разом з постом
+            title = movie['title'] or 'Невідома назва'
+            if movie['year']:
+                title += f" ({movie['year']})"
+            text += f"• **{movie['code']}** - {title}\n"
+        
+        # Кнопки видалення, по 2 в ряд
+        for i in range(0, len(movies), 2):
+            row = []
+            for movie in movies[i:i + 2]:
+                row.append(InlineKeyboardButton(
+                    f"🗑️ {movie['code']}",
+                    callback_data=f"delete_{movie['code']}"
+                ))
+            keyboard.append(row)
+    else:
+        text = f"📊 Всього фільмів в базі: {total}\n\n"
+        text += "Коди:\n"
+        
+        for movie in movies:
+            text += f"• {movie['code']} (message_id: {movie['message_id']})\n"
+    
+    # Кнопки перегортання
+    navigation = []
+    if page['has_prev']:
+        navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"{view}:p:{movies[0]['code']}"))
+    if page['has_next']:
+        navigation.append(InlineKeyboardButton("Далі ➡️", callback_data=f"{view}:n:{movies[-1]['code']}"))
+    if navigation:
+        keyboard.append(navigation)
+    
+    if view == "db":
+        keyboard.append([InlineKeyboardButton("🔄 Оновити", callback_data=f"db:r:{movies[0]['code']}")])
+    
+    return text, InlineKeyboardMarkup(keyboard) if keyboard else None
+
+
 # ========== АДМІНІСТРАТИВНІ КОМАНДИ ==========
 
+@metrics.timed_handler
 async def add_movie_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Команда /add - ручне додавання фільму (тільки для адміністратора)
@@ -595,7 +1004,7 @@ async def add_movie_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Додаємо фільм в базу
-    success = database.add_movie(code, message_id, chat_id, link=None)
+    success = await database_async.add_movie(code, message_id, chat_id, link=None)
     
     if success:
         await update.message.reply_text(
@@ -611,9 +1020,10 @@ async def add_movie_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+@metrics.timed_handler
 async def list_movies_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    Команда /list - показує всі коди фільмів (тільки для адміністратора)
+    Команда /list - показує коди фільмів посторінково (тільки для адміністратора)
     """
     user = update.effective_user
     
@@ -621,27 +1031,12 @@ async def list_movies_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text("Ця команда доступна тільки адміністратору!")
         return
     
-    movies = database.get_all_movies()
-    
-    if not movies:
-        await update.message.reply_text("База даних порожня!\n\nПублікуйте пости в канал з текстом 'Код:001'")
-        return
-    
-    # Формуємо список кодів
-    movies_text = f"📊 Всього фільмів в базі: {len(movies)}\n\n"
-    movies_text += "Коди:\n"
-    
-    for movie in movies:
-        movies_text += f"• {movie['code']} (message_id: {movie['message_id']})\n"
-    
-    # Telegram має ліміт на довжину повідомлення (4096 символів)
-    if len(movies_text) > 4000:
-        await update.message.reply_text("Занадто багато фільмів! Показую перші...")
-        movies_text = movies_text[:4000]
+    text, reply_markup = await build_movies_page("ls")
     
-    await update.message.reply_text(movies_text)
+    await update.message.reply_text(text, reply_markup=reply_markup)
 
 
+@metrics.timed_handler
 async def delete_movie_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Команда /delete - видаляє фільм (тільки для адміністратора)
@@ -664,7 +1059,7 @@ async def delete_movie_command(update: Update, context: ContextTypes.DEFAULT_TYP
     code = context.args[0].upper()
     
     # Видаляємо фільм
-    success = database.delete_movie(code)
+    success = await database_async.delete_movie(code)
     
     if success:
         await update.message.reply_text(f"Фільм з кодом {code} видалено!")
@@ -674,10 +1069,11 @@ async def delete_movie_command(update: Update, context: ContextTypes.DEFAULT_TYP
 
 # ========== АДМІНІСТРАТИВНА ПАНЕЛЬ БАЗИ ДАНИХ ==========
 
+@metrics.timed_handler
 async def database_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Команда /database - адміністративна панель для керування базою даних
-    Показує всі фільми з кнопками для редагування/видалення
+    Показує фільми посторінково з кнопками для видалення
     """
     user = update.effective_user
     
@@ -685,48 +1081,7 @@ async def database_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Ця команда доступна тільки адміністратору!")
         return
     
-    movies = database.get_all_movies()
-    
-    if not movies:
-        await update.message.reply_text(
-            "База даних порожня!\n\n"
-            "Публікуйте пости в канал з текстом 'Код: 001'"
-        )
-        return
-    
-    # Формуємо повідомлення зі списком фільмів
-    text = f"📊 База даних фільмів ({len(movies)} фільмів)\n\n"
-    
-    # Словник з назвами фільмів
-    movie_titles = {
-        '001': 'Ніхто2',
-        '002': 'Голови держав'
-    }
-    
-    for i, movie in enumerate(movies, 1):
-        # Отримуємо назву з нашого словника
-        title = movie_titles.get(movie['code'], 'Невідома назва')
-        text += f"{i}. **{movie['code']}** - {title}\n"
-    
-    # Створюємо кнопки для кожного фільму
-    keyboard = []
-    
-    # Групуємо кнопки по 2 в ряд
-    for i in range(0, len(movies), 2):
-        row = []
-        for j in range(2):
-            if i + j < len(movies):
-                movie = movies[i + j]
-                row.append(InlineKeyboardButton(
-                    f"🗑️ {movie['code']}", 
-                    callback_data=f"delete_{movie['code']}"
-                ))
-        keyboard.append(row)
-    
-    # Додаємо кнопку "Оновити"
-    keyboard.append([InlineKeyboardButton("🔄 Оновити", callback_data="refresh_database")])
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    text, reply_markup = await build_movies_page("db")
     
     await update.message.reply_text(
         text,
@@ -737,6 +1092,7 @@ async def database_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ========== КОМАНДА СКАНУВАННЯ ==========
 
+@metrics.timed_handler
 async def auth_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Команда /auth - інтерактивна авторизація Pyrogram (тільки для адміністратора)
@@ -788,6 +1144,7 @@ async def auth_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@metrics.timed_handler
 async def debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Команда /debug - показує налаштування Pyrogram (тільки для адміністратора)
@@ -834,12 +1191,226 @@ async def debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             debug_text += f"❌ {file} - не знайдено\n"
     
+    # Запити сканера до Telegram (адаптивне обмеження після FloodWait)
+    governor = scanner.governor.stats()
+    debug_text += f"\n🐢 ЗАПИТИ СКАНЕРА:\n"
+    debug_text += f"📊 Одночасно: {governor['limit']} / {governor['max_concurrency']}, "
+    rate = f"{governor['rate']:.1f}" if governor['rate'] else "без обмеження"
+    debug_text += f"частота: {rate} за с\n"
+    if governor['paused_for'] > 0:
+        debug_text += f"⏳ Пауза після FloodWait: ще {governor['paused_for']:.0f} с\n"
+    for method, counters in governor['methods'].items():
+        debug_text += (
+            f"• {method}: {counters['calls']} ({counters['avg_ms']:.0f} мс), "
+            f"FloodWait {counters['flood_waits']}, помилок {counters['errors']}\n"
+        )
+    
+    # Моніторинг нових постів (запис мікропачками)
+    if scanner.monitor is not None:
+        monitor = scanner.monitor.stats()
+        debug_text += f"\n👂 МОНІТОРИНГ КАНАЛУ:\n"
+        debug_text += f"📊 Постів: {monitor['received']}, у черзі: {monitor['queued']}, пачок: {monitor['batches']}\n"
+        debug_text += f"➕ Додано: {monitor['inserted']}, вже були: {monitor['skipped']}, помилок: {monitor['failed']}\n"
+        debug_text += f"🗑 Видалено разом з постами: {monitor['deleted']}\n"
+        if monitor['last_lag'] is not None:
+            debug_text += f"⏱ Затримка запису: {monitor['last_lag']:.1f} с (макс. {monitor['max_lag']:.1f} с)\n"
+    
+    # Паралельна обробка оновлень
+    debug_text += f"\n⚙️ ОБРОБКА ОНОВЛЕНЬ:\n"
+    debug_text += f"📊 Паралельно: до {max(1, config.CONCURRENT_UPDATES)}\n"
+    if isinstance(context.application, FilmsApplication):
+        debug_text += f"💬 Чатів з оновленнями в обробці: {context.application.pending_chats()}\n"
+    scan_task = context.bot_data.get('scan_task')
+    debug_text += "🔄 Фонове сканування: " + ("триває\n" if scan_task is not None and not scan_task.done() else "ні\n")
+    
+    # Черга надсилання повідомлень
+    sends = send_limiter.stats()
+    debug_text += f"\n📤 НАДСИЛАННЯ (ліміти Telegram):\n"
+    debug_text += f"📊 Надіслано: {sends['sent']}, чекали в черзі: {sends['queued']}\n"
+    debug_text += f"⏳ Зараз у черзі: користувачам {sends['waiting']['user']}, адміну {sends['waiting']['admin']}\n"
+    debug_text += f"🚦 429 від Telegram: {sends['retries']}"
+    debug_text += f" (пауза ще {sends['paused_for']:.0f} с)\n" if sends['paused_for'] else "\n"
+    if sends['paused_chats']:
+        debug_text += f"⏸️ Чатів на паузі після 429: {sends['paused_chats']}\n"
+    
+    # Статистика кешу фільмів
+    cache = database.get_cache_stats()
+    debug_text += f"\n🗂️ КЕШ ФІЛЬМІВ:\n"
+    debug_text += f"📊 Розмір: {cache['size']} / {cache['max_size']}"
+    debug_text += " (вся база)\n" if cache['complete'] else " (частина бази)\n"
+    debug_text += f"✅ Влучання: {cache['hits']}\n"
+    debug_text += f"🚫 Точно немає в базі: {cache['negative_hits']}\n"
+    debug_text += f"🔎 Запитів до бази: {cache['misses']}\n"
+    debug_text += f"♻️ Витіснено: {cache['evictions']}\n"
+    debug_text += f"🎯 Hit rate: {cache['hit_rate']:.1%}\n"
+    
+    # Статистика фільтра невідомих кодів
+    code_filter = database.get_code_filter_stats()
+    debug_text += f"\n🧹 ФІЛЬТР НЕВІДОМИХ КОДІВ:\n"
+    if code_filter['ready']:
+        debug_text += f"📊 Кодів: {code_filter['items']} / {code_filter['capacity']}\n"
+        debug_text += f"💾 Пам'ять: {code_filter['memory_bytes'] / 1024:.1f} КБ ({code_filter['num_hashes']} хешів)\n"
+        debug_text += f"🚫 Відсіяно без бази: {code_filter['rejected']}\n"
+        debug_text += f"⚠️ Хибнопозитивні: {code_filter['false_positives']}"
+        debug_text += f" ({code_filter['observed_fp_rate']:.2%}, очікувано {code_filter['expected_fp_rate']:.2%})\n"
+        debug_text += f"🔄 Перебудов: {code_filter['rebuilds']}\n"
+    else:
+        debug_text += "❌ Ще не побудовано\n"
+    
+    # Статистика індексу назв
+    titles = database.get_title_index_stats()
+    debug_text += f"\n🔤 ПОШУК ЗА НАЗВОЮ:\n"
+    debug_text += f"📊 Назв: {titles['titles']}, триграм: {titles['trigrams']}\n"
+    debug_text += f"🔎 Запитів: {titles['queries']}\n"
+    
+    # Статистика кешу inline-запитів
+    inline = inline_cache.stats()
+    debug_text += f"\n🔍 КЕШ INLINE-ЗАПИТІВ:\n"
+    debug_text += f"📊 Розмір: {inline['size']} / {inline['max_size']}\n"
+    debug_text += f"✅ Влучання: {inline['hits']}, промахи: {inline['misses']}\n"
+    debug_text += f"🎯 Hit rate: {inline['hit_rate']:.1%}\n"
+    
+    # Статистика кешу постів (надсилання за file_id замість copy_message)
+    posts = post_cache.stats()
+    debug_text += f"\n🖼 КЕШ ПОСТІВ:\n"
+    debug_text += f"📊 Розмір: {posts['size']} / {posts['max_size']}\n"
+    debug_text += f"✅ За file_id: {posts['hits']}, через copy_message: {posts['misses']}\n"
+    debug_text += f"⚠️ Не спрацювало: {posts['failures']}\n"
+    debug_text += f"🎯 Hit rate: {posts['hit_rate']:.1%}\n"
+    
+    # Статистика кешу підписок
+    subs = subscription_cache.stats()
+    debug_text += f"\n👥 КЕШ ПІДПИСОК:\n"
+    debug_text += f"📊 Розмір: {subs['size']} / {subs['max_size']}\n"
+    debug_text += f"✅ Влучання: {subs['hits']}\n"
+    debug_text += f"🔎 Запитів до Telegram: {subs['misses']}\n"
+    debug_text += f"♻️ Витіснено: {subs['evictions']}\n"
+    debug_text += f"🎯 Hit rate: {subs['hit_rate']:.1%}\n"
+    
     await update.message.reply_text(debug_text)
 
 
+# Стан поточного /profile: кому надіслати звіт і таймер зупинки
+_profiling = {'chat_id': None, 'timer': None}
+
+
+@metrics.timed_handler
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Команда /profile - профілювання бота на вимогу (тільки для адміністратора)
+    
+    /profile            - cProfile на PROFILE_DEFAULT_SECONDS секунд (або стан, якщо вже запущено)
+    /profile 60         - 60 секунд
+    /profile 500u       - наступні 500 оновлень
+    /profile 60 sample  - семплювання стеків замість cProfile (майже не сповільнює бота)
+    /profile stop       - зупинити зараз і отримати звіт
+    """
+    user = update.effective_user
+    
+    if user.id != config.ADMIN_ID:
+        await update.message.reply_text("Ця команда доступна тільки адміністратору!")
+        return
+    
+    args = [arg.lower() for arg in (context.args or [])]
+    
+    if 'stop' in args:
+        if not profiler.active:
+            await update.message.reply_text("ℹ️ Профілювання не запущено")
+            return
+        await finish_profiling(context.application)
+        return
+    
+    if profiler.active:
+        status = profiler.status()
+        limit = f" з {status['max_updates']}" if status['max_updates'] else ""
+        await update.message.reply_text(
+            f"⏳ Профілювання ({status['mode']}) вже триває: {status['elapsed']:.0f} с, "
+            f"оновлень: {status['updates']}{limit}\n"
+            f"/profile stop - зупинити і отримати звіт"
+        )
+        return
+    
+    mode = SAMPLE if 'sample' in args else CPROFILE
+    seconds = config.PROFILE_DEFAULT_SECONDS
+    max_updates = None
+    try:
+        for arg in args:
+            if arg in ('sample', 'cprofile'):
+                continue
+            if arg.endswith('u'):
+                max_updates = int(arg[:-1])
+                seconds = config.PROFILE_MAX_SECONDS
+            else:
+                seconds = float(arg.rstrip('s'))
+    except ValueError:
+        await update.message.reply_text(
+            "❌ Використання: /profile [секунди | Nu] [sample]\n"
+            "Наприклад: /profile 60, /profile 500u, /profile 30 sample"
+        )
+        return
+    
+    seconds = max(1.0, min(seconds, config.PROFILE_MAX_SECONDS))
+    if max_updates is not None and max_updates < 1:
+        max_updates = 1
+    
+    # Оновлення рахує FilmsApplication.process_update (див. нижче)
+    profiler.start(mode, max_updates=max_updates, interval=config.PROFILE_SAMPLE_INTERVAL)
+    _profiling['chat_id'] = update.effective_chat.id
+    _profiling['timer'] = asyncio.create_task(_profiling_timer(context.application, seconds))
+    
+    limit = f"{max_updates} оновлень (не довше {seconds:.0f} с)" if max_updates else f"{seconds:.0f} с"
+    logger.info(f"⏱️ Профілювання {mode} запущено: {limit}")
+    await update.message.reply_text(
+        f"⏱️ Профілювання ({mode}) запущено: {limit}\n"
+        f"Звіт прийде автоматично. /profile stop - зупинити раніше"
+    )
+
+
+async def _profiling_timer(application: Application, seconds: float):
+    await asyncio.sleep(seconds)
+    await finish_profiling(application)
+
+
+async def finish_profiling(application: Application):
+    """Зупиняє профілювання і надсилає адміністратору звіт та сирий профіль файлом"""
+    if not profiler.active:
+        return
+    
+    report = profiler.stop(top=config.PROFILE_TOP)
+    
+    timer = _profiling['timer']
+    if timer is not None and timer is not asyncio.current_task():
+        timer.cancel()
+    chat_id = _profiling['chat_id']
+    _profiling.update(chat_id=None, timer=None)
+    
+    logger.info(f"⏱️ Профілювання завершено: {report['filename']}")
+    
+    # Повідомлення Telegram - до 4096 символів: обрізаємо по рядках
+    text = report['text']
+    if len(text) > 4000:
+        text = text[:4000].rsplit('\n', 1)[0] + "\n..."
+    
+    try:
+        await application.bot.send_message(chat_id=chat_id, text=text, rate_limit_args=ADMIN_REPORT)
+        await application.bot.send_document(
+            chat_id=chat_id,
+            document=io.BytesIO(report['data']),
+            filename=report['filename'],
+            rate_limit_args=ADMIN_REPORT,
+            caption="📎 Сирий профіль: pstats / snakeviz (.prof) або flamegraph / speedscope (.txt)"
+        )
+    except Exception as e:
+        logger.error(f"❌ Не вдалося надіслати звіт профілювання: {e}")
+
+
+@metrics.timed_handler
 async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Команда /scan - сканує канал і відновлює базу даних
+    
+    /scan      - тільки нові пости (після позначки попереднього сканування)
+    /scan full - повне сканування всієї історії каналу
     """
     user = update.effective_user
     
@@ -859,12 +1430,63 @@ async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    await update.message.reply_text("🔄 Сканування каналу... Це може зайняти кілька хвилин.")
+    # Одночасно працює тільки одне сканування
+    scan_task = context.bot_data.get('scan_task')
+    if scan_task is not None and not scan_task.done():
+        await update.message.reply_text(
+            f"⏳ Сканування вже триває (з {context.bot_data.get('scan_time', 'невідомо')}).\n"
+            f"Прогрес оновлюється в повідомленні про сканування."
+        )
+        return
+    
+    # /scan full - повне сканування всієї історії, /scan - тільки нові пости
+    full_scan = bool(context.args) and context.args[0].lower() in ('full', 'повне')
+    
+    if full_scan:
+        status_message = await update.message.reply_text("🔄 Повне сканування каналу... Це може зайняти кілька хвилин.")
+    else:
+        status_message = await update.message.reply_text(
+            "🔄 Сканування нових постів каналу...\n\n"
+            "💡 Для повного пересканування всієї історії: /scan full"
+        )
     
     # Зберігаємо час початку сканування
     from datetime import datetime
     context.bot_data['scan_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    # Сканування триває хвилинами - запускаємо фоном, щоб не тримати місце обробника
+    # і не блокувати інші команди адміністратора
+    context.bot_data['scan_task'] = context.application.create_task(
+        run_scan(update, context, full_scan, status_message)
+    )
+
+
+async def run_scan(update: Update, context: ContextTypes.DEFAULT_TYPE, full_scan: bool, status_message):
+    """
+    Фонове сканування каналу для /scan: прогрес оновлюється в status_message
+    не частіше ніж раз на SCAN_PROGRESS_INTERVAL секунд, результат - окремим повідомленням.
+    """
+    user = update.effective_user
+    title = status_message.text.split('\n', 1)[0]
+    last_progress = time.monotonic()
+    
+    async def report_progress(messages_processed, movies_added):
+        nonlocal last_progress
+        if time.monotonic() - last_progress < config.SCAN_PROGRESS_INTERVAL:
+            return
+        last_progress = time.monotonic()
+        try:
+            await context.bot.edit_message_text(
+                chat_id=status_message.chat_id,
+                message_id=status_message.message_id,
+                text=f"{title}\n\n"
+                     f"📨 Оброблено повідомлень: {messages_processed}\n"
+                     f"🎬 Додано фільмів: {movies_added}",
+                rate_limit_args=ADMIN_REPORT
+            )
+        except Exception as e:
+            logger.warning(f"Не вдалося оновити прогрес сканування: {e}")
+    
     try:
         # 🔧 ІНІЦІАЛІЗУЄМО PYROGRAM КЛІЄНТ ДЛЯ КОМАНДИ /SCAN
         if not scanner.client:
@@ -896,19 +1518,25 @@ async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
                 return
         
+        # Клієнт готовий - слухаємо нові й видалені пости каналу (якщо ще не слухаємо)
+        start_channel_monitor(context.application)
+        
         # Запускаємо Pyrogram сканер
-        movies_count = await scanner.scan_channel_history()
+        movies_count = await scanner.scan_channel_history(full=full_scan, progress=report_progress)
         
-        # Показуємо результат
-        movies = database.get_all_movies()
+        # Показуємо результат (тільки першу сторінку - весь список дивіться в /list)
+        total_movies = await database_async.count_movies()
+        movies = (await database_async.get_movies_page(limit=config.ADMIN_PAGE_SIZE))['movies']
         result_text = f"✅ Сканування завершено!\n\n"
         result_text += f"📊 Додано нових фільмів: {movies_count}\n"
-        result_text += f"📊 Всього в базі: {len(movies)}\n\n"
+        result_text += f"📊 Всього в базі: {total_movies}\n\n"
         
         if movies:
             result_text += "🎬 Фільми в базі:\n"
             for movie in movies:
                 result_text += f"• {movie['code']} (ID: {movie['message_id']})\n"
+            if total_movies > len(movies):
+                result_text += f"... та ще {total_movies - len(movies)} фільмів (/list)\n"
         else:
             result_text += "📭 База даних порожня\n\n"
             result_text += "💡 Опублікуйте пости в канал @film_by_code з форматом:\n"
@@ -927,7 +1555,7 @@ async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 📈 РЕЗУЛЬТАТИ:
 • Додано нових фільмів: {movies_count}
-• Всього фільмів в базі: {len(movies)}
+• Всього фільмів в базі: {total_movies}
 
 🎯 СТАТУС: ✅ Сканування успішно завершено
 """
@@ -936,6 +1564,8 @@ async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 report_text += f"\n📋 СПИСОК ФІЛЬМІВ:\n"
                 for i, movie in enumerate(movies, 1):
                     report_text += f"{i}. {movie['code']} (ID: {movie['message_id']})\n"
+                if total_movies > len(movies):
+                    report_text += f"... та ще {total_movies - len(movies)} фільмів (/list)\n"
             else:
                 report_text += f"\n⚠️ База даних порожня!\n"
                 report_text += f"Перевірте чи є пости з кодами в каналі {config.CHANNEL_USERNAME}"
@@ -943,7 +1573,8 @@ async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Надсилаємо звіт адміністратору
             await context.bot.send_message(
                 chat_id=config.ADMIN_ID,
-                text=report_text
+                text=report_text,
+                rate_limit_args=ADMIN_REPORT
             )
             logger.info("✅ Звіт про сканування надіслано адміністратору")
             
@@ -971,7 +1602,8 @@ async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 """
             await context.bot.send_message(
                 chat_id=config.ADMIN_ID,
-                text=error_report
+                text=error_report,
+                rate_limit_args=ADMIN_REPORT
             )
         except:
             pass
@@ -1017,8 +1649,8 @@ async def scan_channel_for_movies(context: ContextTypes.DEFAULT_TYPE):
         print("")
         
         # Не очищаємо базу даних!
-        movies = database.get_all_movies()
-        print(f"📊 Поточна база даних: {len(movies)} фільмів")
+        total_movies = await database_async.count_movies()
+        print(f"📊 Поточна база даних: {total_movies} фільмів")
         
         return
         
@@ -1044,7 +1676,8 @@ async def start_scanner_background():
             logger.info("🚀 Railway виявлено! Запускаю автоматичне сканування...")
             try:
                 movies_count = await scanner.scan_channel_history()
-                movies = database.get_all_movies()
+                total_movies = await database_async.count_movies()
+                movies = (await database_async.get_movies_page(limit=10))['movies']
                 
                 # Надсилаємо звіт адміністратору
                 from datetime import datetime
@@ -1058,17 +1691,17 @@ async def start_scanner_background():
 
 📈 РЕЗУЛЬТАТИ:
 • Додано нових фільмів: {movies_count}
-• Всього фільмів в базі: {len(movies)}
+• Всього фільмів в базі: {total_movies}
 
 🎯 СТАТУС: ✅ Бот готовий до роботи!
 """
                 
                 if movies:
                     report_text += f"\n📋 ФІЛЬМИ В БАЗІ:\n"
-                    for movie in movies[:10]:  # Показуємо перші 10
+                    for movie in movies:  # Показуємо перші 10
                         report_text += f"• {movie['code']}\n"
-                    if len(movies) > 10:
-                        report_text += f"... та ще {len(movies) - 10} фільмів"
+                    if total_movies > len(movies):
+                        report_text += f"... та ще {total_movies - len(movies)} фільмів"
                 
                 logger.info(f"📊 Автоматичне сканування завершено: {movies_count} фільмів")
                     
@@ -1080,47 +1713,182 @@ async def start_scanner_background():
     except Exception as e:
         logger.error(f"❌ Помилка запуску сканера: {e}")
 
-def main():
+def channel_monitor_running(application: Application) -> bool:
+    """Чи працює зараз моніторинг каналу (start_channel_monitor)"""
+    task = application.bot_data.get('monitor_task')
+    return task is not None and not task.done()
+
+
+def start_channel_monitor(application: Application):
     """
-    Головна функція - запускає бота
+    Запускає моніторинг каналу (нові й видалені пости, scanner.monitor_new_posts) фоновою задачею,
+    якщо він ще не працює. Потрібен запущений Pyrogram клієнт сканера (run_scan).
+    
+    Звичайна asyncio-задача, а не application.create_task: Application.stop чекає на такі задачі,
+    а моніторинг працює до зупинки бота (stop_channel_monitor).
     """
-    print("🚀 Запуск бота...")
+    if channel_monitor_running(application):
+        return
+    application.bot_data['monitor_task'] = asyncio.create_task(scanner.monitor_new_posts())
+
+
+async def start_monitor_on_startup(application: Application):
+    """
+    Запускає Pyrogram клієнт сканера і моніторинг каналу одразу при старті бота, а не з першого /scan:
+    без моніторингу видалені пости лишаються в базі і post_cache не використовується.
     
-    # 🔒 Перевіряємо чи не запущено вже інший екземпляр
-    import os
-    import time
+    Лише з авторизованою сесією (scanner.start_if_authorized) - старт бота не надсилає код підтвердження.
+    Інакше моніторинг запуститься після /auth або з /scan.
+    """
+    if not scanner.client:
+        try:
+            started = await scanner.start_if_authorized()
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося запустити Pyrogram клієнт - моніторинг каналу запуститься з /scan: {e}")
+            return
+        if not started:
+            logger.info("ℹ️ Сканер не авторизовано - моніторинг каналу запуститься після /auth або /scan")
+            return
     
-    # Створюємо lock файл
-    lock_file = "/tmp/bot.lock"
-    if os.path.exists(lock_file):
-        print("⚠️ Бот вже запущено! Зупиняю...")
-        return
+    start_channel_monitor(application)
+    logger.info("✅ Моніторинг каналу запущено")
+
+
+async def stop_channel_monitor(application: Application):
+    """post_shutdown: дописує пости з черги моніторингу в базу і зупиняє Pyrogram клієнт сканера"""
+    # Клієнт ще запускається (start_background_services) - моніторинг уже не потрібен
+    startup = application.bot_data.get('monitor_startup')
+    if startup is not None and not startup.done():
+        startup.cancel()
+        await asyncio.gather(startup, return_exceptions=True)
     
-    # Створюємо lock файл
-    with open(lock_file, 'w') as f:
-        f.write(str(time.time()))
+    try:
+        await scanner.stop()
+    except Exception as e:
+        logger.warning(f"Не вдалося зупинити сканер: {e}")
     
-    # Ініціалізуємо базу даних
-    database.init_database()
-    print("✅ База даних готова!")
+    task = application.bot_data.get('monitor_task')
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def start_background_services(application: Application):
+    """
+    post_init: endpoint метрик і моніторинг каналу.
     
-    # Показуємо стан бази даних
-    movies = database.get_all_movies()
-    print(f"DB База даних: {len(movies)} фільмів")
-    if movies:
-        print("Фільми в базі:")
-        for movie in movies:
-            print(f"  - {movie['code']} (ID: {movie['message_id']})")
-    else:
-        print("База даних порожня")
+    Pyrogram клієнт запускається окремою задачею (start_monitor_on_startup), щоб повільне
+    підключення чи очікування авторизації не затримували старт бота.
+    """
+    await start_metrics_server(application)
+    application.bot_data['monitor_startup'] = asyncio.create_task(start_monitor_on_startup(application))
+
+
+async def start_metrics_server(application: Application):
+    """Запускає endpoint /metrics (Prometheus), якщо задано METRICS_PORT"""
+    if config.METRICS_PORT:
+        try:
+            await metrics.start_http_server(config.METRICS_HOST, config.METRICS_PORT)
+        except OSError as e:
+            logger.error(f"❌ Не вдалося запустити endpoint метрик: {e}")
+
+
+# Типи оновлень, які бот обробляє (решту Telegram не надсилає - і в polling, і в webhook-режимі)
+ALLOWED_UPDATES = [
+    Update.MESSAGE,
+    Update.CHANNEL_POST,
+    Update.EDITED_CHANNEL_POST,
+    Update.CALLBACK_QUERY,
+    Update.INLINE_QUERY,
+]
+
+# Скільки оновлень PTB тримає в обробці одночасно (разом з тими, що чекають черги свого чату)
+UPDATE_TASKS_LIMIT = 4096
+
+
+class FilmsApplication(Application):
+    """
+    Application бота з паралельною обробкою оновлень.
+    
+    - одночасно обробляється до CONCURRENT_UPDATES оновлень (повільний copy_message
+      одного користувача не затримує інших)
+    - оновлення одного чату (або користувача, якщо чату немає - inline-запити) обробляються
+      строго по черзі: наприклад, натискання цифр коду авторизації в button_callback
+    - оновлення, що чекає на свою чергу в чаті, не займає місця серед CONCURRENT_UPDATES
+    - після кожного оновлення рахує його для /profile Nu (лічильник тут, а не окремим
+      обробником: обробники не можна додавати чи видаляти під час обробки оновлення)
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._chat_locks = {}  # chat_id -> [asyncio.Lock, скільки оновлень чату чекає або обробляється]
+        self._handler_slots = asyncio.Semaphore(max(1, config.CONCURRENT_UPDATES))
+    
+    @staticmethod
+    def _order_key(update: object):
+        """Ключ, в межах якого зберігається порядок оновлень (None - порядок не важливий)"""
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return update.effective_user.id
+        return None
+    
+    async def process_update(self, update: object) -> None:
+        key = self._order_key(update)
+        
+        if key is None:
+            async with self._handler_slots:
+                await super().process_update(update)
+        else:
+            # Замки існують тільки поки в чаті є оновлення - словник не росте
+            entry = self._chat_locks.get(key)
+            if entry is None:
+                entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    async with self._handler_slots:
+                        await super().process_update(update)
+            finally:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._chat_locks[key]
+        
+        if profiler.active and profiler.count_update():
+            await finish_profiling(self)
     
-    # Створюємо додаток бота (вимикаємо job_queue, бо він нам не потрібен)
-    application = (
+    def pending_chats(self) -> int:
+        """Скільки чатів зараз мають оновлення в обробці або в черзі"""
+        return len(self._chat_locks)
+
+
+def build_application() -> Application:
+    """
+    Створює додаток бота і реєструє всі обробники.
+    
+    Якщо задано TELEGRAM_API_URL - бот працює з іншим сервером Bot API
+    (локальний Bot API сервер або підробний сервер для навантажувального тесту).
+    """
+    # Вимикаємо job_queue, бо він нам не потрібен.
+    # Запити до Bot API йдуть через InstrumentedRequest (метрики викликів за методами)
+    # Паралельність обмежує FilmsApplication (CONCURRENT_UPDATES з порядком у межах чату),
+    # тому семафор PTB - лише верхня межа задач, що чекають на свою чергу
+    builder = (
         Application.builder()
+        .application_class(FilmsApplication)
+        .concurrent_updates(UPDATE_TASKS_LIMIT if config.CONCURRENT_UPDATES > 1 else False)
         .token(config.BOT_TOKEN)
-        .job_queue(None)  # Вимикаємо планувальник завдань
-        .build()
+        .job_queue(None)
+        .request(InstrumentedRequest(connection_pool_size=256))
+        .get_updates_request(InstrumentedRequest())
+        .rate_limiter(send_limiter)
+        .post_init(start_background_services)
+        .post_shutdown(stop_channel_monitor)
     )
+    if config.TELEGRAM_API_URL:
+        builder = builder.base_url(f"{config.TELEGRAM_API_URL}/bot").base_file_url(f"{config.TELEGRAM_API_URL}/file/bot")
+    application = builder.build()
     
     # Реєструємо обробники команд
     application.add_handler(CommandHandler("start", start))
@@ -1131,17 +1899,71 @@ def main():
     application.add_handler(CommandHandler("database", database_command))  # Нова команда!
     application.add_handler(CommandHandler("scan", scan_command))  # Команда сканування каналу
     application.add_handler(CommandHandler("debug", debug_command))  # Команда діагностики
+    application.add_handler(CommandHandler("profile", profile_command))  # Профілювання на вимогу
     application.add_handler(CommandHandler("auth", auth_command))  # Команда авторизації
     
     # Реєструємо обробник кнопок
     application.add_handler(CallbackQueryHandler(button_callback))
     
+    # Inline-режим: @бот назва фільму (потрібно увімкнути /setinline в @BotFather)
+    application.add_handler(InlineQueryHandler(inline_query))
+    
+    # Відредаговані пости каналу (до обробника нових постів - фільтр ChatType.CHANNEL пропускає і їх)
+    application.add_handler(MessageHandler(filters.UpdateType.EDITED_CHANNEL_POST, handle_edited_channel_post))
+    
     # ⭐ НОВИЙ ОБРОБНИК! Автоматично зчитує пости з каналу
     application.add_handler(MessageHandler(filters.ChatType.CHANNEL, handle_channel_post))
     
     # Реєструємо обробник текстових повідомлень від користувачів
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, search_movie))
     
+    return application
+
+
+def main():
+    """
+    Головна функція - запускає бота
+    """
+    print("🚀 Запуск бота...")
+    
+    # 🔒 Перевіряємо чи не запущено вже інший екземпляр
+    import os
+    import time
+    
+    # Створюємо lock файл
+    lock_file = config.BOT_LOCK_FILE
+    if os.path.exists(lock_file):
+        print("⚠️ Бот вже запущено! Зупиняю...")
+        return
+    
+    # Створюємо lock файл
+    with open(lock_file, 'w') as f:
+        f.write(str(time.time()))
+    
+    # Ініціалізуємо базу даних
+    database.init_database()
+    print("✅ База даних готова!")
+    
+    # Заповнюємо кеш фільмів в пам'яті (пошук за кодом без запитів до бази)
+    cached_count = database.warm_cache()
+    print(f"✅ Кеш фільмів заповнено: {cached_count} кодів")
+    
+    # Показуємо стан бази даних (кількість і першу сторінку)
+    total_movies = database.count_movies()
+    movies = database.get_movies_page(limit=config.ADMIN_PAGE_SIZE)['movies']
+    print(f"DB База даних: {total_movies} фільмів")
+    if movies:
+        print("Фільми в базі:")
+        for movie in movies:
+            print(f"  - {movie['code']} (ID: {movie['message_id']})")
+        if total_movies > len(movies):
+            print(f"  ... та ще {total_movies - len(movies)} фільмів")
+    else:
+        print("База даних порожня")
+    
+    # Створюємо додаток бота з усіма обробниками
+    application = build_application()
+    
     # Запускаємо бота
     print("Бот запущено! Натисніть Ctrl+C для зупинки.")
     print("Використовуйте /scan для відновлення бази даних з каналу.")
@@ -1167,8 +1989,19 @@ def main():
             print("ℹ️ Використовуйте команду /scan для сканування каналу @film_by_code")
     
     try:
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if config.WEBHOOK_URL:
+            # Webhook: Telegram сам надсилає оновлення на WEBHOOK_URL - без затримок опитування
+            # і без конфлікту 409, коли під час деплою працюють два екземпляри
+            from webhook_server import run_webhook
+            print(f"🌐 Webhook-режим: {config.WEBHOOK_URL}{config.WEBHOOK_PATH}")
+            asyncio.run(run_webhook(application, ALLOWED_UPDATES))
+        else:
+            application.run_polling(allowed_updates=ALLOWED_UPDATES)
     finally:
+        # Зупиняємо потоки запитів до бази та закриваємо з'єднання
+        database_async.shutdown()
+        database.close_pool()
+        
         # Очищуємо lock файл при завершенні
         if os.path.exists(lock_file):
             os.remove(lock_file)
@@ -0,0 +1,175 @@
+# channel_backfill.py - Паралельне читання історії каналу діапазонами message_id
+
+import asyncio
+import logging
+
+from pyrogram.errors import FloodWait
+
+import metrics
+from post_parser import parse_post
+from scan_governor import RequestGovernor
+
+logger = logging.getLogger(__name__)
+
+# Найбільше повідомлень в одному get_messages (ліміт Telegram)
+MAX_FETCH_BATCH = 200
+
+# Скільки разів повторювати діапазон після помилки мережі/Telegram (FloodWait повторює governor)
+FETCH_RETRIES = 3
+
+
+class ChannelBackfill:
+    """
+    Читає історію каналу не сторінками get_chat_history одна за одною,
+    а діапазонами message_id: [first_id, last_id] ділиться на шматки по batch_size id,
+    кожен шматок - один get_messages, до concurrency запитів одночасно
+    (скільки саме зараз можна - вирішує RequestGovernor за відповідями Telegram).
+
+    Розпарсені пости йдуть через обмежену чергу (queue_size шматків) в один записувач
+    (MovieBatchWriter): якщо база не встигає, читання каналу пригальмовує, а не накопичує пам'ять.
+
+    - шматки видаються від нових постів до старих, пости в шматку - теж від нових; шматки дописуються
+      в довільному порядку, тому код, повторений у скануванні, віддає найновішому посту записувач (newest_wins)
+    - видалені й неіснуючі id Telegram повертає порожніми повідомленнями - вони пропускаються
+    - FloodWait - governor чекає вказаний час, зменшує швидкість і повторює шматок; якщо Telegram не відпускає
+      і після SCAN_FLOOD_RETRIES спроб, FloodWait йде назовні (сканування зупиняється). Інші помилки -
+      до FETCH_RETRIES разів, потім діапазон записується в failed_ranges (позначку сканування тоді зсувати не можна)
+    """
+
+    def __init__(self, client, chat_id, writer, concurrency=4, batch_size=MAX_FETCH_BATCH, queue_size=8, progress=None,
+                 governor=None):
+        """
+        Параметри:
+        - client: запущений pyrogram.Client
+        - chat_id: id каналу
+        - writer: MovieBatchWriter, куди йдуть знайдені фільми
+        - progress: async функція (оброблено повідомлень, додано фільмів), викликається після кожного шматка
+        - governor: RequestGovernor сканера (None - окремий, з лімітом concurrency)
+        """
+        self.client = client
+        self.chat_id = chat_id
+        self.writer = writer
+        self.concurrency = max(1, concurrency)
+        self.batch_size = min(max(1, batch_size), MAX_FETCH_BATCH)
+        self.queue_size = max(1, queue_size)
+        self.progress = progress
+        self.governor = governor or RequestGovernor(max_concurrency=self.concurrency)
+
+        self.messages_processed = 0  # непорожні повідомлення
+        self.requests = 0
+        self.failed_ranges = []      # [(перший id, останній id)] - не вдалося прочитати
+
+    def _ranges(self, first_id, last_id):
+        """Шматки id від нових до старих: range(…) по batch_size"""
+        high = last_id
+        while high >= first_id:
+            low = max(first_id, high - self.batch_size + 1)
+            yield range(low, high + 1)
+            high = low - 1
+
+    async def run(self, first_id, last_id) -> int:
+        """
+        Читає повідомлення first_id..last_id (включно) і передає фільми записувачу.
+
+        Повертає кількість оброблених (непорожніх) повідомлень.
+        Залишок буфера записувача теж записується (writer.flush).
+        """
+        if last_id < first_id:
+            return 0
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        ranges = self._ranges(first_id, last_id)
+
+        consumer = asyncio.create_task(self._consume(queue))
+        fetchers = [asyncio.create_task(self._fetch_loop(ranges, queue)) for _ in range(self.concurrency)]
+
+        try:
+            fetching = asyncio.gather(*fetchers)
+            await asyncio.wait([fetching, consumer], return_when=asyncio.FIRST_COMPLETED)
+            if consumer.done():
+                consumer.result()  # записувач впав раніше за читачів - помилка йде назовні
+            await fetching
+            await queue.put(None)  # усі шматки прочитано
+            await consumer
+        finally:
+            for task in fetchers + [consumer]:
+                task.cancel()
+
+        await self.writer.flush()
+        return self.messages_processed
+
+    async def _fetch_loop(self, ranges, queue):
+        # Генератор спільний для всіх читачів: кожен бере наступний шматок, щойно звільнився
+        for ids in ranges:
+            messages = await self._fetch(ids)
+            if messages is None:
+                continue
+
+            found = 0
+            rows = []
+            for message in sorted(messages, key=lambda m: m.id, reverse=True):
+                if message.empty:
+                    continue
+                found += 1
+
+                text = message.text or message.caption
+                if not text:
+                    continue
+                movie_info = parse_post(text)
+                if movie_info['code']:
+                    rows.append({
+                        'code': movie_info['code'],
+                        'message_id': message.id,
+                        'chat_id': self.chat_id,
+                        'link': movie_info['link'],
+                        'title': movie_info['title'],
+                        'year': movie_info['year'],
+                        'description': movie_info['description'],
+                        'post_date': message.date
+                    })
+
+            metrics.SCANNER_MESSAGES.labels('scan').inc(found)
+            await queue.put((found, rows))
+
+    async def _fetch(self, ids):
+        """Один get_messages з повторами; None - діапазон так і не прочитано"""
+        attempt = 0
+        while True:
+            try:
+                self.requests += 1
+                return await self.governor.call(
+                    'get_messages', self.client.get_messages, self.chat_id, list(ids), replies=0
+                )
+            except FloodWait:
+                # Governor вже чекав і повторював - далі вирішує сканер
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt > FETCH_RETRIES:
+                    logger.error(f"❌ Не вдалося прочитати id {ids[0]}-{ids[-1]}: {e}")
+                    self.failed_ranges.append((ids[0], ids[-1]))
+                    return None
+                logger.warning(f"WARN Помилка читання id {ids[0]}-{ids[-1]} ({e}), повтор {attempt}")
+                await asyncio.sleep(attempt)
+
+    async def _consume(self, queue):
+        """Єдиний записувач: бере шматки з черги і передає фільми в MovieBatchWriter"""
+        chunks = 0
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+
+            found, rows = item
+            for row in rows:
+                await self.writer.add(**row)
+
+            self.messages_processed += found
+            chunks += 1
+            if chunks % 10 == 0:
+                logger.info(
+                    f"PROGRESS Оброблено: {self.messages_processed} повідомлень, "
+                    f"додано: {self.writer.totals['inserted']} фільмів"
+                )
+            if self.progress:
+                await self.progress(self.messages_processed, self.writer.totals['inserted'])
@@ -0,0 +1,204 @@
+# channel_monitor.py - Моніторинг нових постів каналу (Pyrogram) з записом у базу мікропачками
+
+import asyncio
+import logging
+import time
+
+from pyrogram import filters
+from pyrogram.handlers import DeletedMessagesHandler, MessageHandler
+
+import database_async
+import metrics
+from batch_writer import MovieBatchWriter
+from post_cache import post_cache
+from post_parser import parse_post
+
+logger = logging.getLogger(__name__)
+
+# Група обробників Pyrogram для монітора (окремо від можливих інших обробників клієнта)
+HANDLER_GROUP = 1
+
+# Види записів у черзі монітора
+NEW_POST = 'new'
+DELETED_POSTS = 'deleted'
+
+
+class ChannelMonitor:
+    """
+    Слухає нові пости каналу через Pyrogram і додає фільми в базу.
+
+    - обробник MessageHandler реєструється з фільтром на сам канал (і тільки пости з текстом/підписом) -
+      повідомлення з інших чатів до коду бота не доходять
+    - обробник лише кладе пост у чергу; окрема задача записує пости мікропачками:
+      до batch_size постів або flush_interval секунд від першого поста в пачці -
+      серія постів коштує одну транзакцію (database.upsert_movies), а не N
+    - затримка "пост опубліковано → фільм у базі" - метрика films_bot_monitor_ingest_lag_seconds і stats()
+    - видалені з каналу пости (DeletedMessagesHandler - Bot API таких подій не надсилає) видаляються з бази
+      і post_cache; вони йдуть через ту саму чергу, тому пост, видалений одразу після публікації, не лишиться в базі
+
+    Пост, який не вдалося записати, підхопить наступне сканування (/scan) - позначку сканування монітор не змінює.
+    """
+
+    def __init__(self, client, chat_id, batch_size=100, flush_interval=0.25, queue_size=10000):
+        self.client = client
+        self.chat_id = chat_id
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+
+        self._queue = None
+        self._handlers = []
+        self._task = None
+        self.writer = MovieBatchWriter(batch_size=self.batch_size)
+
+        self.received = 0        # постів отримано
+        self.deleted = 0         # фільмів видалено разом з постами
+        self.last_lag = None     # секунд від публікації до запису (остання пачка, найновіший пост)
+        self.max_lag = 0.0
+        self.max_queue_wait = 0.0
+
+    async def start(self):
+        """Реєструє обробник Pyrogram і запускає запис мікропачками"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._handlers = [
+            MessageHandler(self._on_message, filters.chat(self.chat_id) & (filters.text | filters.caption)),
+            DeletedMessagesHandler(self._on_deleted, filters.chat(self.chat_id)),
+        ]
+        for handler in self._handlers:
+            self.client.add_handler(handler, HANDLER_GROUP)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def wait(self):
+        """Чекає, поки монітор працює (до stop)"""
+        if self._task:
+            await self._task
+
+    async def stop(self):
+        """Знімає обробники і записує те, що лишилось у черзі"""
+        for handler in self._handlers:
+            self.client.remove_handler(handler, HANDLER_GROUP)
+        self._handlers = []
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _on_message(self, client, message):
+        self.received += 1
+        metrics.SCANNER_MESSAGES.labels('monitor').inc()
+        # Черга заповнена (база недоступна) - обробник чекає, Pyrogram притримує наступні оновлення
+        await self._queue.put((NEW_POST, message, time.monotonic()))
+
+    async def _on_deleted(self, client, messages):
+        # Pyrogram віддає видалення пачкою; чат відомий тільки для каналів (інші відсіює фільтр)
+        message_ids = [message.id for message in messages]
+        await self._queue.put((DELETED_POSTS, message_ids, time.monotonic()))
+
+    async def _flush_loop(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            if item[0] == DELETED_POSTS:
+                await self._delete(item[1])
+                continue
+
+            # Пачка: перший пост + все, що прийде за flush_interval (але не більше batch_size)
+            batch = [item]
+            stopping = False
+            deleted = None  # видалення, що прийшло посеред пачки - після її запису
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                if item[0] == DELETED_POSTS:
+                    deleted = item[1]
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+            if deleted is not None:
+                await self._delete(deleted)
+            if stopping:
+                return
+
+    async def _delete(self, message_ids):
+        for message_id in message_ids:
+            post_cache.discard(self.chat_id, message_id)
+        try:
+            codes = await database_async.delete_movie_posts(self.chat_id, message_ids)
+        except Exception as e:
+            logger.error(f"❌ Не вдалося видалити фільми видалених постів {message_ids}: {e}")
+            return
+        if codes:
+            self.deleted += len(codes)
+            logger.info(f"DELETE Пости видалено з каналу, фільми видалено з бази: {', '.join(codes)}")
+
+    async def _write(self, batch):
+        codes = []
+        for _, message, received_at in batch:
+            movie_info = parse_post(message.text or message.caption)
+            if movie_info['code']:
+                codes.append(movie_info['code'])
+                await self.writer.add(
+                    code=movie_info['code'],
+                    message_id=message.id,
+                    chat_id=self.chat_id,
+                    link=movie_info['link'],
+                    title=movie_info['title'],
+                    year=movie_info['year'],
+                    description=movie_info['description'],
+                    post_date=message.date
+                )
+
+        stats = await self.writer.flush()
+
+        # Затримка рахується для всіх постів пачки, навіть без коду (моніторинг встигає за каналом чи ні)
+        now, written_at = time.time(), time.monotonic()
+        for _, message, received_at in batch:
+            self.max_queue_wait = max(self.max_queue_wait, written_at - received_at)
+            if message.date:
+                lag = max(0.0, now - message.date.timestamp())
+                metrics.MONITOR_LAG_SECONDS.observe(lag)
+                self.max_lag = max(self.max_lag, lag)
+                self.last_lag = lag
+
+        if stats and stats['inserted']:
+            metrics.SCANNER_MOVIES_ADDED.labels('monitor').inc(stats['inserted'])
+            logger.info(f"NEW Нові фільми ({stats['inserted']}): {', '.join(codes[:20])}")
+        if stats and stats['skipped']:
+            # Зазвичай пост вже додав бот (channel_post) - про справжні дублікати коду адміну повідомляє він
+            logger.info(f"ℹ️ Вже були в базі: {stats['skipped']} з {len(codes)}")
+
+    def stats(self) -> dict:
+        """Лічильники монітора для /debug"""
+        totals = self.writer.totals
+        return {
+            'received': self.received,
+            'queued': self.queue_depth(),
+            'batches': totals['batches'],
+            'inserted': totals['inserted'],
+            'skipped': totals['skipped'],
+            'failed': totals['failed'],
+            'deleted': self.deleted,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+            'max_queue_wait': self.max_queue_wait,
+        }
@@ -1,12 +1,16 @@
 # channel_scanner.py - Сканер каналу для автоматичного додавання фільмів
 import asyncio
-import re
 import logging
 from pyrogram import Client
-from pyrogram.types import Message
 from pyrogram.errors import FloodWait, AuthKeyUnregistered
 import config
-import database
+import database_async
+import metrics
+from batch_writer import MovieBatchWriter
+from channel_backfill import ChannelBackfill
+from channel_monitor import ChannelMonitor
+from post_parser import parse_post
+from scan_governor import RequestGovernor
 
 # Налаштування логування
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +26,16 @@ class ChannelScanner:
         self.is_running = False
         self.waiting_for_code = False
         self.auth_state = None
+        self.monitor = None  # ChannelMonitor, поки працює моніторинг нових постів
+        
+        # Усі запити сканера до Telegram - через адаптивне обмеження (FloodWait)
+        self.governor = RequestGovernor(
+            max_concurrency=config.SCAN_CONCURRENCY,
+            max_rate=config.SCAN_MAX_RATE,
+            min_rate=config.SCAN_MIN_RATE,
+            ramp_up_after=config.SCAN_RAMP_UP_AFTER,
+            flood_retries=config.SCAN_FLOOD_RETRIES
+        )
         
     async def start(self):
         """Запуск Pyrogram клієнта"""
@@ -45,13 +59,7 @@ class ChannelScanner:
                 logger.error(f"❌ API_ID не є числом: {config.API_ID}")
                 return False
             
-            self.client = Client(
-                "film_scanner",
-                api_id=config.API_ID,
-                api_hash=config.API_HASH,
-                phone_number=config.PHONE_NUMBER,
-                in_memory=True  # Використовуємо пам'ять замість файлів
-            )
+            self.client = self._make_client("film_scanner")
             
             # Запускаємо клієнт без блокування
             try:
@@ -87,17 +95,44 @@ class ChannelScanner:
             self.client = None  # Скидаємо клієнт при помилці
             return False
     
+    @staticmethod
+    def _make_client(name):
+        return Client(
+            name,
+            api_id=config.API_ID,
+            api_hash=config.API_HASH,
+            phone_number=config.PHONE_NUMBER,
+            in_memory=True  # Використовуємо пам'ять замість файлів
+        )
+    
+    async def start_if_authorized(self):
+        """
+        Запуск Pyrogram клієнта при старті бота - лише з уже авторизованою сесією:
+        на відміну від start(), без сесії не надсилає код підтвердження на PHONE_NUMBER
+        (його вводять через /auth).
+        
+        Повертає:
+        - True якщо клієнт запущено
+        """
+        if config.API_ID == 'YOUR_API_ID' or config.API_HASH == 'YOUR_API_HASH':
+            return False
+        
+        client = self._make_client("film_scanner")
+        try:
+            # connect() лише підключається і повертає, чи сесія авторизована
+            if not await client.connect():
+                return False
+        finally:
+            if client.is_connected:
+                await client.disconnect()
+        
+        return await self.start() is True
+    
     async def complete_auth(self, code):
         """Завершення авторизації з кодом"""
         try:
             # Створюємо новий клієнт для авторизації
-            temp_client = Client(
-                "temp_auth",
-                api_id=config.API_ID,
-                api_hash=config.API_HASH,
-                phone_number=config.PHONE_NUMBER,
-                in_memory=True
-            )
+            temp_client = self._make_client("temp_auth")
             
             await temp_client.start()
             
@@ -117,55 +152,44 @@ class ChannelScanner:
     
     async def stop(self):
         """Зупинка Pyrogram клієнта"""
+        if self.monitor:
+            # Спершу записуємо пости, що ще чекають у черзі монітора
+            await self.monitor.stop()
         if self.client:
             await self.client.stop()
             logger.info("STOP Pyrogram клієнт зупинено!")
     
     def parse_movie_info(self, text: str) -> dict:
         """
-        Парсить інформацію про фільм з тексту поста
+        Парсить інформацію про фільм з тексту поста (див. post_parser.parse_post)
         
         Очікуваний формат:
         Код: 002
         Назва: Голови держав
         Рік: 2025
         Опис: Опис фільму...
+        Посилання: https://...
         """
-        movie_info = {
-            'code': None,
-            'title': None,
-            'year': None,
-            'description': None
-        }
-        
-        if not text:
-            return movie_info
-        
-        # Шукаємо код
-        code_match = re.search(r'[Кк][Оо][Дд]:\s*([A-Za-z0-9]+)', text)
-        if code_match:
-            movie_info['code'] = code_match.group(1).upper()
-        
-        # Шукаємо назву
-        title_match = re.search(r'[Нн][Аа][Зз][Вв][Аа]:\s*(.+)', text)
-        if title_match:
-            movie_info['title'] = title_match.group(1).strip()
-        
-        # Шукаємо рік
-        year_match = re.search(r'[Рр][Іі][Кк]:\s*(\d{4})', text)
-        if year_match:
-            movie_info['year'] = year_match.group(1)
-        
-        # Шукаємо опис
-        desc_match = re.search(r'[Оо][Пп][Ии][Сс]:\s*(.+)', text, re.DOTALL)
-        if desc_match:
-            movie_info['description'] = desc_match.group(1).strip()
-        
-        return movie_info
+        return parse_post(text)
     
-    async def scan_channel_history(self):
+    async def _newest_message_id(self, chat_id):
+        """message_id найновішого поста каналу (None - канал порожній)"""
+        async for message in self.client.get_chat_history(chat_id, limit=1):
+            return message.id
+        return None
+    
+    async def scan_channel_history(self, full=False, progress=None):
         """
-        Сканує всю історію каналу та додає фільми в базу
+        Сканує історію каналу та додає фільми в базу
+        
+        Параметри:
+        - full: False - тільки нові пости після позначки попереднього сканування
+                True - вся історія каналу (позначка ігнорується)
+        - progress: async функція (оброблено повідомлень, додано фільмів),
+                    викликається після кожного прочитаного шматка (наприклад, для повідомлення адміну)
+        
+        Після успішного сканування зберігає найбільший оброблений message_id,
+        щоб наступне сканування зупинилось на ньому.
         """
         try:
             logger.info("SCAN Починаю сканування каналу...")
@@ -177,54 +201,94 @@ class ChannelScanner:
             
             # Отримуємо інформацію про канал
             channel_username = config.CHANNEL_USERNAME.lstrip('@')
-            channel = await self.client.get_chat(f"@{channel_username}")
+            channel = await self.governor.call('get_chat', self.client.get_chat, f"@{channel_username}")
             
             logger.info(f"CHANNEL Сканування каналу: {channel.title} (ID: {channel.id})")
             
-            movies_added = 0
-            messages_processed = 0
-            
-            # Отримуємо всі повідомлення з каналу
-            async for message in self.client.get_chat_history(channel.id):
-                messages_processed += 1
-                
-                # Перевіряємо чи це пост з фільмом
-                if message.text or message.caption:
-                    text = message.text or message.caption
-                    movie_info = self.parse_movie_info(text)
-                    
-                    # Якщо знайшли код фільму
-                    if movie_info['code']:
-                        # Додаємо в базу даних
-                        success = database.add_movie(
-                            code=movie_info['code'],
-                            message_id=message.id,
-                            chat_id=channel.id,
-                            link=None  # Можна додати пошук посилань
-                        )
-                        
-                        if success:
-                            movies_added += 1
-                            logger.info(f"OK Додано фільм: {movie_info['code']} - {movie_info['title']}")
-                        else:
-                            logger.warning(f"WARN Фільм {movie_info['code']} вже існує в базі")
-                
-                # Логуємо прогрес кожні 10 повідомлень
-                if messages_processed % 10 == 0:
-                    logger.info(f"PROGRESS Оброблено: {messages_processed} повідомлень, додано: {movies_added} фільмів")
+            # Позначка попереднього сканування - далі неї історію не читаємо
+            scan_mark = None if full else await database_async.get_scan_mark(channel.id)
+            if scan_mark:
+                logger.info(f"MARK Інкрементальне сканування: нові пости після message_id {scan_mark}")
+            else:
+                logger.info("MARK Повне сканування всієї історії каналу")
+            
+            # Найновіший пост каналу - верхня межа діапазону message_id
+            newest_message_id = await self.governor.call('get_chat_history', self._newest_message_id, channel.id)
+            first_id = scan_mark + 1 if scan_mark else 1
+            
+            # Фільми записуються в базу пачками (одна транзакція на пачку),
+            # а не окремим INSERT на кожен пост
+            # Шматки історії дописуються в довільному порядку - код, повторений у цьому скануванні,
+            # має дістатися найновішому посту незалежно від того, яка пачка прийшла першою.
+            # Фільми, що були в базі до сканування, не чіпаються (як і дублікат коду в боті)
+            writer = MovieBatchWriter(batch_size=config.SCAN_BATCH_SIZE, newest_wins=True)
+            
+            # Історія читається паралельно шматками по SCAN_FETCH_BATCH id (get_messages),
+            # розпарсені пости йдуть у записувач через обмежену чергу
+            backfill = ChannelBackfill(
+                self.client, channel.id, writer,
+                concurrency=config.SCAN_CONCURRENCY,
+                batch_size=config.SCAN_FETCH_BATCH,
+                queue_size=config.SCAN_QUEUE_SIZE,
+                progress=progress,
+                governor=self.governor
+            )
+            if newest_message_id:
+                logger.info(f"RANGE Читаю message_id {first_id}-{newest_message_id} ({config.SCAN_CONCURRENCY} запитів одночасно)")
+                await backfill.run(first_id, newest_message_id)
+            messages_processed = backfill.messages_processed
+            
+            movies_added = writer.totals['inserted']
+            metrics.SCANNER_MOVIES_ADDED.labels('scan').inc(movies_added)
+            metrics.SCANNER_RUNS.labels(
+                'failed_batches' if writer.totals['failed'] or backfill.failed_ranges else 'ok'
+            ).inc()
+            
+            # Зсуваємо позначку тільки якщо всі шматки прочитано і всі пачки записались без помилок,
+            # інакше наступне сканування пройде цю частину історії ще раз
+            if newest_message_id and not writer.totals['failed'] and not backfill.failed_ranges:
+                await database_async.set_scan_mark(channel.id, newest_message_id)
+                logger.info(f"MARK Позначку сканування оновлено: message_id {newest_message_id}")
             
             logger.info(f"DONE Сканування завершено!")
-            logger.info(f"SUMMARY Підсумок: оброблено {messages_processed} повідомлень, додано {movies_added} фільмів")
+            logger.info(
+                f"SUMMARY Підсумок: оброблено {messages_processed} повідомлень, додано {movies_added} фільмів, "
+                f"вже були в базі {writer.totals['skipped']}, повторених кодів перенесено на новіший пост "
+                f"{writer.totals['updated']}, помилок {writer.totals['failed']} "
+                f"({writer.totals['batches']} пачок, {writer.totals['seconds']:.2f} с запису; "
+                f"{backfill.requests} запитів get_messages, не прочитано діапазонів {len(backfill.failed_ranges)})"
+            )
+            self.log_request_stats()
             
             return movies_added
             
+        except FloodWait as e:
+            # Governor вже чекав і повторював запит SCAN_FLOOD_RETRIES разів
+            logger.error(f"❌ Сканування зупинено: Telegram знову просить зачекати {e.value} с")
+            self.log_request_stats()
+            metrics.SCANNER_RUNS.labels('flood_wait').inc()
+            return 0
         except Exception as e:
             logger.error(f"❌ Помилка сканування каналу: {e}")
+            metrics.SCANNER_RUNS.labels('error').inc()
             return 0
     
+    def log_request_stats(self):
+        """Пише в лог поточні ліміти governor і лічильники запитів по методах"""
+        stats = self.governor.stats()
+        rate = f"{stats['rate']:.1f} за секунду" if stats['rate'] else "без обмеження"
+        logger.info(f"LIMITS Запитів одночасно: {stats['limit']}/{stats['max_concurrency']}, частота: {rate}")
+        for method, counters in stats['methods'].items():
+            logger.info(
+                f"REQUESTS {method}: {counters['calls']} успішних ({counters['avg_ms']:.0f} мс), "
+                f"FloodWait {counters['flood_waits']} ({counters['flood_seconds']} с), помилок {counters['errors']}"
+            )
+    
     async def monitor_new_posts(self):
         """
-        Моніторинг нових постів в реальному часі
+        Моніторинг нових постів в реальному часі (channel_monitor.ChannelMonitor):
+        обробник Pyrogram тільки для нашого каналу, запис у базу мікропачками.
+        Працює, поки сканер не зупинено (stop)
         """
         try:
             logger.info("MONITOR Починаю моніторинг нових постів...")
@@ -235,43 +299,24 @@ class ChannelScanner:
                 return
             
             channel_username = config.CHANNEL_USERNAME.lstrip('@')
-            channel = await self.client.get_chat(f"@{channel_username}")
-            
-            # Слухаємо нові повідомлення в каналі
-            async for message in self.client.get_chat_history(channel.id, limit=1):
-                # Це буде останнє повідомлення
-                pass
-            
-            # Тепер слухаємо нові повідомлення
-            @self.client.on_message()
-            async def handle_new_message(client, message: Message):
-                # Перевіряємо чи це наш канал
-                if message.chat.id == channel.id:
-                    # Перевіряємо чи це пост з фільмом
-                    if message.text or message.caption:
-                        text = message.text or message.caption
-                        movie_info = self.parse_movie_info(text)
-                        
-                        # Якщо знайшли код фільму
-                        if movie_info['code']:
-                            # Додаємо в базу даних
-                            success = database.add_movie(
-                                code=movie_info['code'],
-                                message_id=message.id,
-                                chat_id=channel.id,
-                                link=None
-                            )
-                            
-                            if success:
-                                logger.info(f"NEW Новий фільм додано: {movie_info['code']} - {movie_info['title']}")
-                            else:
-                                logger.warning(f"WARN Фільм {movie_info['code']} вже існує в базі")
-            
-            # Запускаємо моніторинг
-            # await self.client.idle()  # Цей метод не існує в новій версії Pyrogram
-            # Замість цього використовуємо нескінченний цикл
-            while True:
-                await asyncio.sleep(1)
+            channel = await self.governor.call('get_chat', self.client.get_chat, f"@{channel_username}")
+            
+            # Повторний виклик не реєструє другу пару обробників - чекаємо вже запущений монітор
+            if self.monitor is not None and self.monitor.running:
+                logger.info("MONITOR Моніторинг вже працює")
+                await self.monitor.wait()
+                return
+            
+            self.monitor = ChannelMonitor(
+                self.client,
+                channel.id,
+                batch_size=config.MONITOR_BATCH_SIZE,
+                flush_interval=config.MONITOR_FLUSH_INTERVAL,
+                queue_size=config.MONITOR_QUEUE_SIZE
+            )
+            await self.monitor.start()
+            logger.info(f"MONITOR Слухаю канал {channel.id}")
+            await self.monitor.wait()
             
         except Exception as e:
             logger.error(f"❌ Помилка моніторингу: {e}")
@@ -0,0 +1,208 @@
+# code_filter.py - Швидка відсіювання кодів, яких точно немає в базі (фільтр Блума)
+
+import hashlib
+import math
+import threading
+
+import config
+
+# Коди - одне "слово" без пробілів, не довше колонки code VARCHAR(50)
+MAX_CODE_LENGTH = 50
+
+
+def looks_like_code(text: str) -> bool:
+    """
+    Дешева перевірка формату: текст з пробілами або довший за 50 символів
+    не може бути кодом фільму (речення, випадкові повідомлення).
+    """
+    return 0 < len(text) <= MAX_CODE_LENGTH and not any(ch.isspace() for ch in text)
+
+
+class BloomFilter:
+    """
+    Фільтр Блума: компактна множина з можливими хибнопозитивними відповідями.
+    
+    - might_contain() == False  → коду ТОЧНО немає
+    - might_contain() == True   → код, ймовірно, є (треба перевірити базу)
+    """
+    
+    def __init__(self, capacity, fp_rate=0.01):
+        """
+        Параметри:
+        - capacity: на скільки елементів розрахований фільтр
+        - fp_rate: бажана частка хибнопозитивних відповідей при capacity елементах
+        """
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        
+        # Оптимальні розміри: m = -n·ln(p) / ln(2)², k = m/n · ln(2)
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        # Подвійне хешування: k позицій з двох 64-бітних хешів
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+    
+    def add(self, item) -> bool:
+        """
+        Додає елемент. Повертає False, якщо всі його біти вже були встановлені
+        (елемент, найімовірніше, вже є) - тоді count не збільшується, і повторні
+        записи того самого коду не наближають фільтр до перебудови.
+        """
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+    
+    def might_contain(self, item) -> bool:
+        for pos in self._positions(item):
+            if not self.bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+    
+    def expected_fp_rate(self) -> float:
+        """Теоретична частка хибнопозитивних відповідей при поточній кількості елементів"""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class KnownCodesFilter:
+    """
+    Фільтр усіх кодів з бази перед database.find_movie.
+    
+    - будується з бази при запуску (rebuild в database.py)
+    - нові коди додаються одразу (add), тож нові пости видно миттєво
+    - фільтр Блума не вміє видаляти, тому після багатьох видалень
+      або переповнення він позначається для перебудови (needs_rebuild)
+    """
+    
+    def __init__(self, fp_rate=0.01, rebuild_after_deletes=0.1):
+        """
+        Параметри:
+        - fp_rate: бажана частка хибнопозитивних відповідей
+        - rebuild_after_deletes: частка видалених кодів, після якої фільтр перебудовується
+        """
+        self.fp_rate = fp_rate
+        self.rebuild_after_deletes = rebuild_after_deletes
+        self._bloom = None  # None - фільтр ще не побудовано, всі запити йдуть у базу
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._next = None  # фільтр, що перебудовується
+        self._deleted = 0
+        
+        self.rejected = 0         # запитів відсіяно без бази
+        self.passed = 0           # запитів пропущено в базу
+        self.false_positives = 0  # фільтр сказав "можливо", а в базі немає
+        self.rebuilds = 0
+    
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+    
+    @property
+    def needs_rebuild(self) -> bool:
+        bloom = self._bloom
+        if bloom is None or self._rebuilding:
+            return False
+        return (bloom.count > bloom.capacity or
+                self._deleted > max(bloom.count, 1) * self.rebuild_after_deletes)
+    
+    def begin_rebuild(self, expected_count):
+        """
+        Починає перебудову: новий фільтр заповнюється через rebuild_add(),
+        а коди, додані тим часом через add(), потрапляють в обидва фільтри.
+        
+        Параметри:
+        - expected_count: скільки кодів в базі (фільтр будується з запасом вдвічі)
+        """
+        with self._lock:
+            self._next = BloomFilter(capacity=max(expected_count * 2, 1024), fp_rate=self.fp_rate)
+            self._rebuilding = True
+    
+    def rebuild_add(self, code):
+        """Додає код з бази у фільтр, що перебудовується"""
+        with self._lock:
+            if self._next is not None:
+                self._next.add(code)
+    
+    def finish_rebuild(self):
+        """Замінює старий фільтр новим"""
+        with self._lock:
+            if self._next is None:
+                return
+            self._bloom = self._next
+            self._next = None
+            self._rebuilding = False
+            self._deleted = 0
+            self.rebuilds += 1
+    
+    def cancel_rebuild(self):
+        """Скасовує перебудову - залишається старий фільтр (нові коди в нього вже додані)"""
+        with self._lock:
+            self._next = None
+            self._rebuilding = False
+    
+    def add(self, code):
+        """Додає новий код (викликається при кожному записі в базу)"""
+        with self._lock:
+            if self._next is not None:
+                self._next.add(code)
+            if self._bloom is not None:
+                self._bloom.add(code)
+    
+    def remove(self, code):
+        """Враховує видалений код (сам біт залишається - це лише хибнопозитивна відповідь)"""
+        with self._lock:
+            self._deleted += 1
+    
+    def might_contain(self, code) -> bool:
+        """False - коду точно немає в базі; True - треба перевірити базу"""
+        bloom = self._bloom
+        if bloom is None:
+            return True
+        
+        if bloom.might_contain(code):
+            self.passed += 1
+            return True
+        
+        self.rejected += 1
+        return False
+    
+    def record_false_positive(self):
+        """Фільтр пропустив код, якого в базі не виявилось"""
+        self.false_positives += 1
+    
+    def stats(self) -> dict:
+        """Статистика фільтра для /debug"""
+        bloom = self._bloom
+        negatives = self.rejected + self.false_positives
+        return {
+            'ready': bloom is not None,
+            'items': bloom.count if bloom else 0,
+            'capacity': bloom.capacity if bloom else 0,
+            'num_hashes': bloom.num_hashes if bloom else 0,
+            'memory_bytes': len(bloom.bits) if bloom else 0,
+            'expected_fp_rate': bloom.expected_fp_rate() if bloom else 0.0,
+            'observed_fp_rate': self.false_positives / negatives if negatives else 0.0,
+            'rejected': self.rejected,
+            'passed': self.passed,
+            'false_positives': self.false_positives,
+            'rebuilds': self.rebuilds
+        }
+
+
+# Глобальний фільтр кодів (використовується в database.py)
+known_codes = KnownCodesFilter(fp_rate=config.CODE_FILTER_FP_RATE)
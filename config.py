@@ -1,4 +1,5 @@
 # Налаштування Telegram бота для пошуку фільмів
+import hashlib
 import os
 
 # Читаємо змінні середовища (для Railway) або використовуємо значення за замовчуванням (для локальної розробки)
@@ -21,4 +22,115 @@ except ValueError:
 API_HASH = os.getenv('API_HASH', '2c8ade68fd2d202a3553e503a5e8125b')
 
 # Номер телефону для Pyrogram (з кодом країни, наприклад: +380123456789)
-PHONE_NUMBER = os.getenv('PHONE_NUMBER', '+380931082506')  # Ваш номер телефону
\ No newline at end of file
+PHONE_NUMBER = os.getenv('PHONE_NUMBER', '+380931082506')  # Ваш номер телефону
+
+# Пул з'єднань з базою даних (database.py)
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))  # мінімум відкритих з'єднань
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))  # максимум відкритих з'єднань
+DB_POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))  # секунд простою до закриття зайвого з'єднання
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))  # перевіряти з'єднання після стількох секунд простою
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10'))  # скільки чекати вільне з'єднання
+
+# Скільки потоків виконують запити до бази для асинхронних обробників (database_async.py)
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', str(DB_POOL_MAX_SIZE)))
+
+# Кеш фільмів в пам'яті (movie_cache.py): максимум кодів, далі витісняються найдавніше використані
+MOVIE_CACHE_MAX_SIZE = int(os.getenv('MOVIE_CACHE_MAX_SIZE', '100000'))
+# Скільки секунд після завантаження повний кеш вважається точним ("коду немає" без запиту до бази);
+# далі промахи перевіряються в базі - так видно фільми, додані іншим процесом
+MOVIE_CACHE_COMPLETE_TTL = float(os.getenv('MOVIE_CACHE_COMPLETE_TTL', '60'))
+
+# Кеш вмісту постів (post_cache.py): file_id і підпис, щоб надсилати фільм без copy_message.
+# Максимум постів, 0 - вимкнено (всі фільми через copy_message)
+POST_CACHE_MAX_SIZE = int(os.getenv('POST_CACHE_MAX_SIZE', '5000'))
+
+# Скільки постів записувати в базу однією пачкою при скануванні каналу
+SCAN_BATCH_SIZE = int(os.getenv('SCAN_BATCH_SIZE', '500'))
+
+# Паралельне читання історії каналу (channel_backfill.py)
+SCAN_CONCURRENCY = int(os.getenv('SCAN_CONCURRENCY', '4'))  # скільки запитів get_messages одночасно
+SCAN_FETCH_BATCH = int(os.getenv('SCAN_FETCH_BATCH', '200'))  # message_id в одному запиті (Telegram дозволяє до 200)
+SCAN_QUEUE_SIZE = int(os.getenv('SCAN_QUEUE_SIZE', '8'))  # скільки прочитаних шматків чекають запису в базу
+
+# Адаптивне обмеження запитів сканера (scan_governor.py): після FloodWait одночасність і частота
+# зменшуються вдвічі, потім повільно ростуть назад до SCAN_CONCURRENCY / SCAN_MAX_RATE
+SCAN_MAX_RATE = float(os.getenv('SCAN_MAX_RATE', '0'))  # найбільше запитів до Telegram за секунду (0 - без межі)
+SCAN_MIN_RATE = float(os.getenv('SCAN_MIN_RATE', '0.5'))  # нижче цього частота не падає
+SCAN_RAMP_UP_AFTER = int(os.getenv('SCAN_RAMP_UP_AFTER', '20'))  # успішних запитів підряд до наступного прискорення
+SCAN_FLOOD_RETRIES = int(os.getenv('SCAN_FLOOD_RETRIES', '5'))  # скільки FloodWait поспіль чекати для одного запиту
+
+# Моніторинг нових постів каналу (channel_monitor.py): пости пишуться в базу мікропачками
+MONITOR_BATCH_SIZE = int(os.getenv('MONITOR_BATCH_SIZE', '100'))  # найбільше постів в одній транзакції
+MONITOR_FLUSH_INTERVAL = float(os.getenv('MONITOR_FLUSH_INTERVAL', '0.25'))  # скільки секунд збирати пачку після першого поста
+MONITOR_QUEUE_SIZE = int(os.getenv('MONITOR_QUEUE_SIZE', '10000'))  # скільки постів можуть чекати запису
+
+# Кеш перевірок підписки (subscription_cache.py): скільки секунд пам'ятати результат
+SUBSCRIPTION_CACHE_TTL_POSITIVE = float(os.getenv('SUBSCRIPTION_CACHE_TTL_POSITIVE', '600'))  # підписаний
+SUBSCRIPTION_CACHE_TTL_NEGATIVE = float(os.getenv('SUBSCRIPTION_CACHE_TTL_NEGATIVE', '30'))  # не підписаний
+SUBSCRIPTION_CACHE_MAX_SIZE = int(os.getenv('SUBSCRIPTION_CACHE_MAX_SIZE', '50000'))  # максимум користувачів у кеші
+
+# Фільтр невідомих кодів (code_filter.py): бажана частка хибнопозитивних відповідей фільтра Блума
+CODE_FILTER_FP_RATE = float(os.getenv('CODE_FILTER_FP_RATE', '0.01'))
+
+# Скільки фільмів показувати на одній сторінці /list та /database
+ADMIN_PAGE_SIZE = int(os.getenv('ADMIN_PAGE_SIZE', '20'))
+
+# Скільки рядків читати за раз при потоковому проході по каталогу (database.iter_movies)
+DB_ITER_FETCH_SIZE = int(os.getenv('DB_ITER_FETCH_SIZE', '2000'))
+
+# Пошук за назвою (title_search.py)
+TITLE_SEARCH_LIMIT = int(os.getenv('TITLE_SEARCH_LIMIT', '10'))  # максимум результатів
+TITLE_SEARCH_MIN_SCORE = float(os.getenv('TITLE_SEARCH_MIN_SCORE', '0.45'))  # мінімальна схожість назви (0..1)
+TITLE_SEARCH_MAX_POSTINGS_SHARE = float(os.getenv('TITLE_SEARCH_MAX_POSTINGS_SHARE', '0.02'))  # запит частий, якщо кожна його триграма є в більшій частці назв
+TITLE_SEARCH_MAX_POSTINGS_MIN = int(os.getenv('TITLE_SEARCH_MAX_POSTINGS_MIN', '500'))  # ...і щонайменше в стількох назвах (стільки ж кандидатів для частого запиту)
+
+# Inline-режим (@bot назва): кеш результатів у боті (inline_cache.py) і в Telegram
+INLINE_RESULTS_CACHE_TTL = float(os.getenv('INLINE_RESULTS_CACHE_TTL', '60'))  # скільки секунд бот пам'ятає результати запиту
+INLINE_RESULTS_CACHE_MAX_SIZE = int(os.getenv('INLINE_RESULTS_CACHE_MAX_SIZE', '5000'))  # максимум запитів у кеші
+INLINE_MAX_RESULTS = int(os.getenv('INLINE_MAX_RESULTS', '50'))  # максимум фільмів на один запит (всі сторінки)
+INLINE_PAGE_SIZE = int(os.getenv('INLINE_PAGE_SIZE', '20'))  # фільмів в одній відповіді (Telegram дозволяє до 50)
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', '300'))  # cache_time для Telegram: скільки секунд сервер Telegram кешує відповідь
+
+# Адреса сервера Bot API (порожньо - api.telegram.org).
+# Наприклад, локальний Bot API сервер або підробний сервер навантажувального тесту (benchmarks/load_test.py)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '').rstrip('/')
+
+# Lock-файл, що не дає запустити два екземпляри бота одночасно
+BOT_LOCK_FILE = os.getenv('BOT_LOCK_FILE', '/tmp/bot.lock')
+
+# Метрики Prometheus (metrics.py): порт endpoint /metrics, порожньо - вимкнено
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0') or 0)
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+
+# Профілювання на вимогу (команда /profile, profiler.py)
+PROFILE_DEFAULT_SECONDS = float(os.getenv('PROFILE_DEFAULT_SECONDS', '30'))  # тривалість, якщо не вказано
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '600'))  # найдовше профілювання (і для режиму "N оновлень")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))  # крок семплювання, секунд
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', '20'))  # скільки функцій показувати у звіті
+
+# Паралельна обробка оновлень (bot.py, FilmsApplication): скільки оновлень обробляється одночасно.
+# Оновлення одного чату/користувача все одно обробляються по черзі. 1 - послідовно, як раніше
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '32'))
+
+# Як часто оновлювати повідомлення з прогресом фонового /scan, секунд
+SCAN_PROGRESS_INTERVAL = float(os.getenv('SCAN_PROGRESS_INTERVAL', '5'))
+
+# Webhook-режим (webhook_server.py) замість long polling: вмикається, якщо задано WEBHOOK_URL -
+# публічна адреса бота (наприклад, https://my-bot.up.railway.app)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').rstrip('/')
+WEBHOOK_PATH = '/' + os.getenv('WEBHOOK_PATH', 'telegram-webhook').lstrip('/')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', os.getenv('PORT', '8080')))  # Railway задає PORT
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))  # одночасних з'єднань від Telegram (1-100)
+WEBHOOK_METRICS = os.getenv('WEBHOOK_METRICS', '1') != '0'  # GET /metrics на порту webhook (0 - вимкнено)
+# Секрет, який Telegram надсилає в заголовку X-Telegram-Bot-Api-Secret-Token.
+# Якщо не задано - виводиться з BOT_TOKEN (стабільний між перезапусками)
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or hashlib.sha256(f"webhook:{BOT_TOKEN}".encode()).hexdigest()[:32]
+
+# Ліміти надсилання повідомлень (rate_limiter.py), 0 - без ліміту.
+# Telegram: ~30 повідомлень/с загалом, ~1/с в один особистий чат (короткі серії можна), 20/хв у групу
+SEND_RATE_GLOBAL = float(os.getenv('SEND_RATE_GLOBAL', '30'))
+SEND_RATE_PER_CHAT = float(os.getenv('SEND_RATE_PER_CHAT', '1'))
+SEND_BURST_PER_CHAT = int(os.getenv('SEND_BURST_PER_CHAT', '3'))  # скільки повідомлень підряд в один чат без очікування
+SEND_RATE_PER_GROUP = float(os.getenv('SEND_RATE_PER_GROUP', str(20 / 60)))
+SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', '3'))  # повтори після 429 (RetryAfter)
@@ -1,8 +1,36 @@
 # database.py - Робота з базою даних фільмів
 
+import logging
 import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timezone
 import psycopg2  # Бібліотека для роботи з PostgreSQL
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+
+import config
+import metrics
+from db_pool import ConnectionPool
+from movie_cache import movie_index, NOT_CACHED
+from code_filter import known_codes, looks_like_code
+from text_utils import normalize_title
+from title_search import title_index
+
+logger = logging.getLogger(__name__)
+
+# Рядок таблиці movies для потокового читання (iter_movies)
+MovieRow = namedtuple('MovieRow', ['code', 'message_id', 'chat_id', 'link', 'title', 'year'])
+
+# Колонки з метаданими поста (додаються міграцією в існуючу таблицю PostgreSQL)
+METADATA_COLUMNS_POSTGRES = [
+    ('title', 'TEXT'),
+    ('year', 'SMALLINT'),
+    ('description', 'TEXT'),
+    ('post_date', 'TIMESTAMP'),
+    ('title_normalized', 'TEXT'),
+]
 
 # Налаштування бази даних
 # На Railway буде використовуватись PostgreSQL
@@ -22,9 +50,18 @@ def get_database_url():
         # Локальна розробка - SQLite
         return None
 
+def get_sqlite_path():
+    """
+    Шлях до файлу SQLite (можна змінити змінною SQLITE_PATH, наприклад для бенчмарків)
+    """
+    return os.getenv('SQLITE_PATH', 'movies.db')
+
 def get_connection():
     """
-    Створює з'єднання з базою даних (PostgreSQL або SQLite)
+    Створює НОВЕ з'єднання з базою даних (PostgreSQL або SQLite).
+    
+    Функції цього модуля не викликають її напряму - вони беруть
+    з'єднання з пулу (get_pool), а пул використовує її для відкриття нових.
     """
     database_url = get_database_url()
     
@@ -33,8 +70,78 @@ def get_connection():
         return psycopg2.connect(database_url)
     else:
         # SQLite локально
+        # check_same_thread=False - з'єднання з пулу можуть використовуватись з різних потоків
+        # (але пул завжди видає одне з'єднання лише одному потоку одночасно)
         import sqlite3
-        return sqlite3.connect("movies.db")
+        return sqlite3.connect(get_sqlite_path(), check_same_thread=False)
+
+
+# ========== ПУЛ З'ЄДНАНЬ ==========
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Версія каталогу в пам'яті (див. get_catalog_version).
+# Змінюється з потоків пулу database_async і з потоку перебудови - лише під замком
+_catalog_version = 0
+_catalog_version_lock = threading.Lock()
+
+# Фонова перебудова фільтра кодів (див. _schedule_code_filter_rebuild)
+_filter_rebuild_thread = None
+_filter_rebuild_lock = threading.Lock()
+
+@contextmanager
+def _connection(function):
+    """
+    З'єднання з пулу для функції database.py.
+    Заодно записує метрики: тривалість і помилки звернень до бази за назвою функції.
+    """
+    start = time.perf_counter()
+    try:
+        with get_pool().connection() as conn:
+            yield conn
+    except Exception:
+        metrics.DB_ERRORS.labels(function).inc()
+        raise
+    finally:
+        metrics.DB_QUERY_SECONDS.labels(function).observe(time.perf_counter() - start)
+
+
+def get_pool():
+    """
+    Повертає спільний пул з'єднань (створюється при першому зверненні).
+    
+    Замість TCP + авторизації на кожен запит до PostgreSQL
+    з'єднання відкриваються один раз і використовуються повторно.
+    """
+    global _pool
+    
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(
+                    get_connection,
+                    min_size=config.DB_POOL_MIN_SIZE,
+                    max_size=config.DB_POOL_MAX_SIZE,
+                    idle_timeout=config.DB_POOL_IDLE_TIMEOUT,
+                    health_check_interval=config.DB_POOL_HEALTH_CHECK_INTERVAL,
+                    acquire_timeout=config.DB_POOL_ACQUIRE_TIMEOUT
+                )
+                pool.open()
+                _pool = pool
+    
+    return _pool
+
+def close_pool():
+    """
+    Закриває пул з'єднань (при зупинці бота або зміні бази даних)
+    """
+    global _pool
+    
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
 
 
 def init_database():
@@ -46,55 +153,149 @@ def init_database():
     - PostgreSQL на Railway (DATABASE_URL є)
     - SQLite локально (DATABASE_URL немає)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Перевіряємо тип бази даних
-    database_url = get_database_url()
-    
-    if database_url:
-        # PostgreSQL на Railway
-        print("Використовуємо PostgreSQL на Railway...")
-        
-        # SQL для PostgreSQL
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS movies (
-                id SERIAL PRIMARY KEY,
-                code VARCHAR(50) UNIQUE NOT NULL,
-                message_id BIGINT NOT NULL,
-                chat_id BIGINT NOT NULL,
-                link TEXT
-            )
-        ''')
+    with _connection('init_database') as conn:
+        cursor = conn.cursor()
         
-    else:
-        # SQLite локально
-        print("Використовуємо SQLite локально...")
+        # Перевіряємо тип бази даних
+        database_url = get_database_url()
         
-        # Видаляємо стару таблицю (міграція)
-        cursor.execute('DROP TABLE IF EXISTS movies')
+        if database_url:
+            # PostgreSQL на Railway
+            print("Використовуємо PostgreSQL на Railway...")
+            
+            # SQL для PostgreSQL
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS movies (
+                    id SERIAL PRIMARY KEY,
+                    code VARCHAR(50) UNIQUE NOT NULL,
+                    message_id BIGINT NOT NULL,
+                    chat_id BIGINT NOT NULL,
+                    link TEXT,
+                    title TEXT,
+                    year SMALLINT,
+                    description TEXT,
+                    post_date TIMESTAMP,
+                    title_normalized TEXT
+                )
+            ''')
+            
+            # Міграція: таблиця на Railway могла бути створена без колонок з метаданими
+            for column, column_type in METADATA_COLUMNS_POSTGRES:
+                cursor.execute(f'ALTER TABLE movies ADD COLUMN IF NOT EXISTS {column} {column_type}')
+            
+            # Індекси для адмін-панелі та пошуку за назвою
+            # text_pattern_ops - щоб індекс працював і для пошуку за префіксом (LIKE 'ніх%')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_movies_title_normalized
+                ON movies (title_normalized text_pattern_ops)
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_movies_post_date ON movies (post_date)')
+            # Пошук фільму за постом каналу (редагування і видалення постів)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_movies_post ON movies (chat_id, message_id)')
+            # Повнотекстовий індекс опису
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_movies_description_fts
+                ON movies USING GIN (to_tsvector('simple', COALESCE(description, '')))
+            ''')
+            
+            # Позначка сканування: до якого message_id канал вже повністю оброблено
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scan_state (
+                    chat_id BIGINT PRIMARY KEY,
+                    last_message_id BIGINT NOT NULL,
+                    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+        else:
+            # SQLite локально
+            print("Використовуємо SQLite локально...")
+            
+            # Видаляємо стару таблицю (міграція)
+            # Позначка сканування видаляється разом з фільмами, інакше сканер вирішить,
+            # що канал вже оброблено, і не заповнить нову таблицю
+            cursor.execute('DROP TABLE IF EXISTS movies')
+            cursor.execute('DROP TABLE IF EXISTS scan_state')
+            
+            # SQL для SQLite
+            cursor.execute('''
+                CREATE TABLE movies (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    code TEXT UNIQUE NOT NULL,
+                    message_id INTEGER NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    link TEXT,
+                    title TEXT,
+                    year INTEGER,
+                    description TEXT,
+                    post_date TIMESTAMP,
+                    title_normalized TEXT
+                )
+            ''')
+            
+            cursor.execute('CREATE INDEX idx_movies_title_normalized ON movies (title_normalized)')
+            cursor.execute('CREATE INDEX idx_movies_year ON movies (year)')
+            cursor.execute('CREATE INDEX idx_movies_post_date ON movies (post_date)')
+            cursor.execute('CREATE INDEX idx_movies_post ON movies (chat_id, message_id)')
+            
+            cursor.execute('''
+                CREATE TABLE scan_state (
+                    chat_id INTEGER PRIMARY KEY,
+                    last_message_id INTEGER NOT NULL,
+                    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # SQL для SQLite
-        cursor.execute('''
-            CREATE TABLE movies (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                code TEXT UNIQUE NOT NULL,
-                message_id INTEGER NOT NULL,
-                chat_id INTEGER NOT NULL,
-                link TEXT
-            )
-        ''')
+        # Зберігаємо зміни
+        conn.commit()
     
-    # Зберігаємо зміни
-    conn.commit()
+    print("База даних створена з новою структурою!")
+
+
+# Колонки, які записують add_movie та upsert_movies
+INSERT_COLUMNS = 'code, message_id, chat_id, link, title, year, description, post_date, title_normalized'
+
+
+def _parse_year(year):
+    """Рік з поста ("2021" або 2021) як число, None якщо його немає або він некоректний"""
+    try:
+        return int(year) if year else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _insert_values(movie, database_url):
+    """
+    Значення для INSERT у порядку INSERT_COLUMNS.
+    title_normalized обчислюється з title, рік приводиться до числа.
+    """
+    year = _parse_year(movie.get('year'))
     
-    # Закриваємо з'єднання
-    conn.close()
+    post_date = movie.get('post_date')
+    if post_date is not None and post_date.tzinfo is not None:
+        # Зберігаємо всі дати в UTC без часового поясу
+        post_date = post_date.astimezone(timezone.utc).replace(tzinfo=None)
+    if post_date is not None and not database_url:
+        # SQLite зберігає дату як текст ISO 8601
+        post_date = post_date.isoformat(sep=' ')
     
-    print("База даних створена з новою структурою!")
+    title = movie.get('title')
+    
+    return (
+        movie['code'],
+        movie['message_id'],
+        movie['chat_id'],
+        movie.get('link'),
+        title,
+        year,
+        movie.get('description'),
+        post_date,
+        normalize_title(title)
+    )
 
 
-def add_movie(code, message_id, chat_id, link=None):
+def add_movie(code, message_id, chat_id, link=None, title=None, year=None, description=None, post_date=None):
     """
     Функція для додавання фільму в базу даних.
     
@@ -105,32 +306,48 @@ def add_movie(code, message_id, chat_id, link=None):
     - message_id: ID повідомлення в каналі
     - chat_id: ID каналу
     - link: посилання на фільм (необов'язково)
+    - title, year, description: дані з поста "Назва:/Рік:/Опис:" (необов'язково)
+    - post_date: дата публікації поста, datetime (необов'язково)
     
     Повертає:
     - True якщо фільм додано успішно
     - False якщо виникла помилка (наприклад, код вже існує)
     """
+    movie = {
+        'code': code,
+        'message_id': message_id,
+        'chat_id': chat_id,
+        'link': link,
+        'title': title,
+        'year': year,
+        'description': description,
+        'post_date': post_date
+    }
+    
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # SQL команда для вставки даних (працює для обох баз)
-        database_url = get_database_url()
-        if database_url:
-            # PostgreSQL
-            cursor.execute('''
-                INSERT INTO movies (code, message_id, chat_id, link)
-                VALUES (%s, %s, %s, %s)
-            ''', (code, message_id, chat_id, link))
-        else:
-            # SQLite
-            cursor.execute('''
-                INSERT INTO movies (code, message_id, chat_id, link)
-                VALUES (?, ?, ?, ?)
-            ''', (code, message_id, chat_id, link))
+        with _connection('add_movie') as conn:
+            cursor = conn.cursor()
+            
+            # SQL команда для вставки даних (працює для обох баз)
+            database_url = get_database_url()
+            values = _insert_values(movie, database_url)
+            if database_url:
+                # PostgreSQL
+                cursor.execute(f'''
+                    INSERT INTO movies ({INSERT_COLUMNS})
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ''', values)
+            else:
+                # SQLite
+                cursor.execute(f'''
+                    INSERT INTO movies ({INSERT_COLUMNS})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', values)
+            
+            conn.commit()
         
-        conn.commit()
-        conn.close()
+        # Оновлюємо кеш в пам'яті - фільм одразу доступний для пошуку
+        _remember_movie(movie)
         return True
         
     except Exception as e:
@@ -139,6 +356,149 @@ def add_movie(code, message_id, chat_id, link=None):
         return False
 
 
+def upsert_movies(movies, overwrite=False, own_codes=None):
+    """
+    Пакетний запис фільмів: всі рядки - одним запитом в ОДНІЙ транзакції.
+    
+    Замість add_movie для кожного поста (з'єднання + INSERT + COMMIT + виняток
+    на дублікаті) використовується INSERT ... ON CONFLICT (code).
+    
+    Параметри:
+    - movies: список словників з code, message_id, chat_id, link
+              (і необов'язково title, year, description, post_date)
+    - overwrite: False - існуючі коди не чіпаємо (ON CONFLICT DO NOTHING)
+                 True - оновлюємо пост і метадані (ON CONFLICT DO UPDATE)
+    - own_codes: (без overwrite) коди, які цей самий записувач уже додав раніше (поточне сканування).
+                 Для них повторений код переходить на новіший пост того самого каналу
+                 (ON CONFLICT DO UPDATE ... WHERE новий message_id більший) - результат не залежить
+                 від порядку, в якому пачки дійшли до бази. Коди, що були в базі до сканування,
+                 не чіпаються (як і в боті, дублікат коду не перезаписує фільм)
+    
+    Якщо код повторюється в пачці - береться ПЕРШИЙ запис
+    (сканер йде від нових постів до старих, тобто перемагає найновіший пост),
+    з own_codes - запис з найбільшим message_id.
+    
+    Повертає:
+    - Словник зі статистикою пачки: rows, inserted, updated, skipped, seconds
+      і inserted_codes - коди нових рядків (для own_codes наступних пачок)
+    """
+    start = time.perf_counter()
+    database_url = get_database_url()
+    
+    # Прибираємо дублікати всередині пачки
+    unique = {}
+    for movie in movies:
+        kept = unique.setdefault(movie['code'], movie)
+        if own_codes is not None and movie['message_id'] > kept['message_id']:
+            unique[movie['code']] = movie
+    rows = [_insert_values(movie, database_url) for movie in unique.values()]
+    
+    # Рядки з кодами, вже доданими цим записувачем: новіший пост перемагає
+    newer_rows = []
+    if own_codes and not overwrite:
+        newer_rows = [row for row in rows if row[0] in own_codes]
+        rows = [row for row in rows if row[0] not in own_codes]
+    
+    # Реально записані рядки: (code, message_id, chat_id, link, чи новий рядок)
+    written = []
+    
+    # При оновленні порожні значення з поста не затирають вже збережені
+    update_set = '''message_id = {new}.message_id,
+                     chat_id = {new}.chat_id,
+                     link = COALESCE({new}.link, movies.link),
+                     title = COALESCE({new}.title, movies.title),
+                     year = COALESCE({new}.year, movies.year),
+                     description = COALESCE({new}.description, movies.description),
+                     post_date = COALESCE({new}.post_date, movies.post_date),
+                     title_normalized = COALESCE({new}.title_normalized, movies.title_normalized)'''
+    newer_post = ' WHERE {new}.chat_id = movies.chat_id AND {new}.message_id > movies.message_id'
+    
+    if rows or newer_rows:
+        with _connection('upsert_movies') as conn:
+            cursor = conn.cursor()
+            
+            if database_url:
+                # PostgreSQL: один багаторядковий INSERT, xmax = 0 означає новий рядок
+                new = 'EXCLUDED'
+                if overwrite:
+                    conflict = 'DO UPDATE SET ' + update_set.format(new=new)
+                else:
+                    conflict = 'DO NOTHING'
+                
+                for group, group_conflict in ((rows, conflict),
+                                              (newer_rows, 'DO UPDATE SET ' + (update_set + newer_post).format(new=new))):
+                    if group:
+                        written += execute_values(cursor, f'''
+                            INSERT INTO movies ({INSERT_COLUMNS})
+                            VALUES %s
+                            ON CONFLICT (code) {group_conflict}
+                            RETURNING code, message_id, chat_id, link, (xmax = 0) AS inserted
+                        ''', group, page_size=len(group), fetch=True)
+            else:
+                # SQLite: дізнаємось, які коди вже є, і пишемо все одним executemany
+                existing = {}  # code -> (link, chat_id, message_id)
+                codes = [row[0] for row in rows + newer_rows]
+                for i in range(0, len(codes), 500):  # SQLite обмежує кількість параметрів у запиті
+                    chunk = codes[i:i + 500]
+                    cursor.execute(
+                        f"SELECT code, link, chat_id, message_id FROM movies "
+                        f"WHERE code IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    existing.update((code, rest) for code, *rest in cursor.fetchall())
+                
+                if overwrite:
+                    conflict = 'DO UPDATE SET ' + update_set.format(new='excluded')
+                    written = [
+                        (row[0], row[1], row[2], row[3] or existing.get(row[0], (None,))[0], row[0] not in existing)
+                        for row in rows
+                    ]
+                else:
+                    conflict = 'DO NOTHING'
+                    written = [row[:4] + (True,) for row in rows if row[0] not in existing]
+                
+                for row in newer_rows:
+                    old = existing.get(row[0])
+                    if old is None:
+                        written.append(row[:4] + (True,))
+                    elif old[1] == row[2] and row[1] > old[2]:
+                        written.append((row[0], row[1], row[2], row[3] or old[0], False))
+                
+                for group, group_conflict in ((rows, conflict),
+                                              (newer_rows, 'DO UPDATE SET ' + (update_set + newer_post).format(new='excluded'))):
+                    if group:
+                        cursor.executemany(f'''
+                            INSERT INTO movies ({INSERT_COLUMNS})
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (code) {group_conflict}
+                        ''', group)
+            
+            conn.commit()
+    
+    # Оновлюємо кеш в пам'яті для записаних рядків
+    for code, message_id, chat_id, link, _ in written:
+        _remember_movie({
+            'code': code,
+            'message_id': message_id,
+            'chat_id': chat_id,
+            'link': link,
+            'title': unique[code].get('title'),
+            'year': unique[code].get('year')
+        })
+    
+    inserted_codes = [row[0] for row in written if row[4]]
+    inserted = len(inserted_codes)
+    updated = len(written) - inserted
+    return {
+        'rows': len(movies),
+        'inserted': inserted,
+        'inserted_codes': inserted_codes,
+        'updated': updated,
+        'skipped': len(movies) - inserted - updated,
+        'seconds': round(time.perf_counter() - start, 4)
+    }
+
+
 def find_movie(code):
     """
     Функція для пошуку фільму за кодом.
@@ -152,40 +512,55 @@ def find_movie(code):
     - Словник з message_id і chat_id, якщо знайдено
     - None, якщо фільм не знайдено
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    # Текст з пробілами або задовгий - точно не код (речення, випадкові повідомлення)
+    if not looks_like_code(code):
+        return None
     
-    # SQL команда для пошуку
-    database_url = get_database_url()
-    if database_url:
-        # PostgreSQL
-        cursor.execute('''
-            SELECT code, message_id, chat_id, link
-            FROM movies
-            WHERE code = %s
-        ''', (code,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT code, message_id, chat_id, link
-            FROM movies
-            WHERE code = ?
-        ''', (code,))
+    # Спочатку кеш в пам'яті - більшість пошуків не доходять до бази
+    cached = movie_index.get(code)
+    if cached is not NOT_CACHED:
+        return cached
     
-    # Отримуємо результат
-    result = cursor.fetchone()  # fetchone() - отримати один рядок
+    # Фільтр Блума: якщо коду точно немає - базу не питаємо
+    if not known_codes.might_contain(code):
+        return None
     
-    conn.close()
+    with _connection('find_movie') as conn:
+        cursor = conn.cursor()
+        
+        # SQL команда для пошуку
+        database_url = get_database_url()
+        if database_url:
+            # PostgreSQL
+            cursor.execute('''
+                SELECT code, message_id, chat_id, link
+                FROM movies
+                WHERE code = %s
+            ''', (code,))
+        else:
+            # SQLite
+            cursor.execute('''
+                SELECT code, message_id, chat_id, link
+                FROM movies
+                WHERE code = ?
+            ''', (code,))
+        
+        # Отримуємо результат
+        result = cursor.fetchone()  # fetchone() - отримати один рядок
     
     # Якщо фільм знайдено
     if result:
-        return {
+        movie = {
             'code': result[0],
             'message_id': result[1],
             'chat_id': result[2],
             'link': result[3]
         }
+        movie_index.put(movie)
+        return movie
     else:
+        if known_codes.ready:
+            known_codes.record_false_positive()
         return None
 
 
@@ -196,27 +571,164 @@ def get_all_movies():
     Повертає:
     - Список словників з усіма фільмами
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    with _connection('get_all_movies') as conn:
+        cursor = conn.cursor()
+        
+        # Отримуємо всі фільми
+        cursor.execute('SELECT code, message_id, chat_id, link, title, year FROM movies')
+        
+        results = cursor.fetchall()  # fetchall() - отримати всі рядки
     
-    # Отримуємо всі фільми
-    cursor.execute('SELECT code, message_id, chat_id, link FROM movies')
+    # Перетворюємо результат в список словників
+    movies = []
+    for row in results:
+        movies.append({
+            'code': row[0],
+            'message_id': row[1],
+            'chat_id': row[2],
+            'link': row[3],
+            'title': row[4],
+            'year': row[5]
+        })
     
-    results = cursor.fetchall()  # fetchall() - отримати всі рядки
+    return movies
+
+
+def iter_movies(fetch_size=None):
+    """
+    Генератор для проходу по ВСІХ фільмах без завантаження таблиці в пам'ять
+    (експорт, звірка, заповнення кешу).
     
-    conn.close()
+    - PostgreSQL: іменований (серверний) курсор - рядки приходять порціями по fetch_size
+    - SQLite: fetchmany порціями по fetch_size
+    
+    Параметри:
+    - fetch_size: скільки рядків читати за раз (за замовчуванням DB_ITER_FETCH_SIZE)
+    
+    Повертає (yield):
+    - MovieRow(code, message_id, chat_id, link) - компактний кортеж замість словника
+    
+    З'єднання з пулу зайняте, поки генератор не дочитано або не закрито.
+    """
+    fetch_size = fetch_size or config.DB_ITER_FETCH_SIZE
+    
+    with _connection('iter_movies') as conn:
+        database_url = get_database_url()
+        if database_url:
+            # PostgreSQL: серверний курсор, таблиця не копіюється в пам'ять клієнта
+            cursor = conn.cursor(name='iter_movies')
+            cursor.itersize = fetch_size
+        else:
+            # SQLite
+            cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT code, message_id, chat_id, link, title, year FROM movies')
+            
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield MovieRow._make(row)
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def get_movies_page(after_code=None, before_code=None, limit=20, inclusive=False):
+    """
+    Функція для отримання однієї сторінки фільмів, відсортованих за кодом.
+    
+    Keyset-пагінація: замість OFFSET передається код, від якого продовжувати,
+    тому база читає тільки потрібні рядки по індексу на колонці code.
+    
+    Параметри:
+    - after_code: сторінка ПІСЛЯ цього коду (наступна сторінка)
+    - before_code: сторінка ПЕРЕД цим кодом (попередня сторінка)
+    - limit: скільки фільмів на сторінці
+    - inclusive: True - включити сам after_code (перечитати поточну сторінку)
+    
+    Повертає:
+    - Словник: movies (список словників), has_prev, has_next
+    """
+    database_url = get_database_url()
+    placeholder = '%s' if database_url else '?'
+    
+    with _connection('get_movies_page') as conn:
+        cursor = conn.cursor()
+        
+        # Беремо на один рядок більше, щоб дізнатись, чи є ще сторінка
+        if before_code is not None:
+            cursor.execute(f'''
+                SELECT code, message_id, chat_id, link, title, year
+                FROM movies
+                WHERE code < {placeholder}
+                ORDER BY code DESC
+                LIMIT {placeholder}
+            ''', (before_code, limit + 1))
+        elif after_code is not None:
+            operator = '>=' if inclusive else '>'
+            cursor.execute(f'''
+                SELECT code, message_id, chat_id, link, title, year
+                FROM movies
+                WHERE code {operator} {placeholder}
+                ORDER BY code
+                LIMIT {placeholder}
+            ''', (after_code, limit + 1))
+        else:
+            cursor.execute(f'''
+                SELECT code, message_id, chat_id, link, title, year
+                FROM movies
+                ORDER BY code
+                LIMIT {placeholder}
+            ''', (limit + 1,))
+        
+        results = cursor.fetchall()
+    
+    has_more = len(results) > limit
+    results = results[:limit]
+    
+    if before_code is not None:
+        # Читали у зворотному порядку - розвертаємо
+        results.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after_code is not None, has_more
     
-    # Перетворюємо результат в список словників
     movies = []
     for row in results:
         movies.append({
             'code': row[0],
             'message_id': row[1],
             'chat_id': row[2],
-            'link': row[3]
+            'link': row[3],
+            'title': row[4],
+            'year': row[5]
         })
     
-    return movies
+    return {
+        'movies': movies,
+        'has_prev': has_prev and bool(movies),
+        'has_next': has_next and bool(movies)
+    }
+
+
+def count_movies():
+    """
+    Функція для підрахунку кількості фільмів у базі.
+    
+    Повертає:
+    - Кількість фільмів
+    """
+    with _connection('count_movies') as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM movies')
+        result = cursor.fetchone()
+    
+    return result[0]
 
 
 def delete_movie(code):
@@ -230,26 +742,413 @@ def delete_movie(code):
     - True якщо фільм видалено
     - False якщо фільм не знайдено
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    with _connection('delete_movie') as conn:
+        cursor = conn.cursor()
+        
+        database_url = get_database_url()
+        if database_url:
+            # PostgreSQL
+            cursor.execute('DELETE FROM movies WHERE code = %s', (code,))
+        else:
+            # SQLite
+            cursor.execute('DELETE FROM movies WHERE code = ?', (code,))
+        
+        # Перевіряємо, чи був видалений хоч один рядок
+        deleted = cursor.rowcount > 0
+        
+        conn.commit()
+    
+    if deleted:
+        _forget_movie(code)
+    
+    return deleted
+
+
+def update_movie_post(chat_id, message_id, code=None, link=None, title=None, year=None, description=None,
+                      post_date=None):
+    """
+    Оновлює базу після редагування поста в каналі (фільм шукається за chat_id і message_id).
+    
+    - код у пості той самий - оновлюються посилання і метадані (поле, яке прибрали з поста, очищається)
+    - код змінився - фільм переходить на новий код, старий більше не знаходиться
+    - коду в пості більше немає - фільм видаляється
+    - фільму з цього поста в базі не було (наприклад, код дописали) - фільм додається
+    
+    Параметри:
+    - chat_id, message_id: пост у каналі
+    - code, link, title, year, description, post_date: дані з відредагованого поста (code=None - коду немає)
+    
+    Повертає:
+    - (результат, коди поста до редагування), результат:
+      'updated', 'added', 'removed', 'conflict' (новий код вже має інший пост - нічого не змінено)
+      або None (в пості немає коду і в базі його не було)
+    """
+    movie = {
+        'code': code,
+        'message_id': message_id,
+        'chat_id': chat_id,
+        'link': link,
+        'title': title,
+        'year': year,
+        'description': description,
+        'post_date': post_date
+    }
     
     database_url = get_database_url()
-    if database_url:
-        # PostgreSQL
-        cursor.execute('DELETE FROM movies WHERE code = %s', (code,))
-    else:
-        # SQLite
-        cursor.execute('DELETE FROM movies WHERE code = ?', (code,))
+    mark = '%s' if database_url else '?'
+    
+    with _connection('update_movie_post') as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            f'SELECT code FROM movies WHERE chat_id = {mark} AND message_id = {mark}', (chat_id, message_id)
+        )
+        old_codes = [row[0] for row in cursor.fetchall()]
+        
+        owner = None
+        if code is not None:
+            cursor.execute(f'SELECT chat_id, message_id FROM movies WHERE code = {mark}', (code,))
+            owner = cursor.fetchone()
+        
+        if code is None:
+            result = 'removed' if old_codes else None
+            if old_codes:
+                cursor.execute(
+                    f'DELETE FROM movies WHERE chat_id = {mark} AND message_id = {mark}', (chat_id, message_id)
+                )
+        elif owner is not None and (owner[0], owner[1]) != (chat_id, message_id):
+            result = 'conflict'
+        else:
+            # Старі коди цього поста (код змінили) більше не знаходяться
+            cursor.execute(
+                f'DELETE FROM movies WHERE chat_id = {mark} AND message_id = {mark} AND code <> {mark}',
+                (chat_id, message_id, code)
+            )
+            values = _insert_values(movie, database_url)
+            if owner is None:
+                cursor.execute(f'''
+                    INSERT INTO movies ({INSERT_COLUMNS})
+                    VALUES ({', '.join([mark] * len(values))})
+                ''', values)
+                result = 'updated' if old_codes else 'added'
+            else:
+                # Дата публікації при редагуванні не змінюється
+                code, _, _, link, title, year, description, _, title_normalized = values
+                cursor.execute(f'''
+                    UPDATE movies
+                    SET link = {mark}, title = {mark}, year = {mark}, description = {mark}, title_normalized = {mark}
+                    WHERE code = {mark}
+                ''', (link, title, year, description, title_normalized, code))
+                result = 'updated'
+        
+        conn.commit()
     
-    # Перевіряємо, чи був видалений хоч один рядок
-    deleted = cursor.rowcount > 0
+    # Оновлюємо кеш в пам'яті
+    if result in ('updated', 'added', 'removed'):
+        for old_code in old_codes:
+            if old_code != code:
+                _forget_movie(old_code)
+    if result in ('updated', 'added'):
+        title_index.remove(code)  # назву могли прибрати з поста
+        _remember_movie(movie)
     
-    conn.commit()
-    conn.close()
+    return result, old_codes
+
+
+def delete_movie_posts(chat_id, message_ids):
+    """
+    Видаляє фільми, пости яких видалено з каналу.
+    
+    Параметри:
+    - chat_id: ID каналу
+    - message_ids: ID видалених повідомлень
+    
+    Повертає:
+    - Список видалених кодів
+    """
+    message_ids = list(message_ids)
+    deleted = []
+    if not message_ids:
+        return deleted
+    
+    database_url = get_database_url()
+    mark = '%s' if database_url else '?'
+    
+    with _connection('delete_movie_posts') as conn:
+        cursor = conn.cursor()
+        
+        for i in range(0, len(message_ids), 500):  # SQLite обмежує кількість параметрів у запиті
+            chunk = message_ids[i:i + 500]
+            condition = f"chat_id = {mark} AND message_id IN ({', '.join([mark] * len(chunk))})"
+            cursor.execute(f'SELECT code FROM movies WHERE {condition}', [chat_id] + chunk)
+            codes = [row[0] for row in cursor.fetchall()]
+            if codes:
+                deleted.extend(codes)
+                cursor.execute(f'DELETE FROM movies WHERE {condition}', [chat_id] + chunk)
+        
+        conn.commit()
+    
+    for code in deleted:
+        _forget_movie(code)
     
     return deleted
 
 
+def get_scan_mark(chat_id):
+    """
+    Повертає найбільший message_id, до якого канал вже повністю просканований.
+    
+    Параметри:
+    - chat_id: ID каналу
+    
+    Повертає:
+    - message_id або None, якщо канал ще не сканувався
+    """
+    with _connection('get_scan_mark') as conn:
+        cursor = conn.cursor()
+        
+        database_url = get_database_url()
+        if database_url:
+            # PostgreSQL
+            cursor.execute('SELECT last_message_id FROM scan_state WHERE chat_id = %s', (chat_id,))
+        else:
+            # SQLite
+            cursor.execute('SELECT last_message_id FROM scan_state WHERE chat_id = ?', (chat_id,))
+        
+        result = cursor.fetchone()
+    
+    return result[0] if result else None
+
+
+def set_scan_mark(chat_id, message_id):
+    """
+    Зберігає позначку сканування для каналу.
+    Позначка тільки зростає - менше значення не перезапише більше.
+    
+    Параметри:
+    - chat_id: ID каналу
+    - message_id: найбільший повністю оброблений message_id
+    """
+    with _connection('set_scan_mark') as conn:
+        cursor = conn.cursor()
+        
+        database_url = get_database_url()
+        if database_url:
+            # PostgreSQL
+            cursor.execute('''
+                INSERT INTO scan_state (chat_id, last_message_id, updated_at)
+                VALUES (%s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (chat_id) DO UPDATE
+                SET last_message_id = GREATEST(scan_state.last_message_id, EXCLUDED.last_message_id),
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (chat_id, message_id))
+        else:
+            # SQLite
+            cursor.execute('''
+                INSERT INTO scan_state (chat_id, last_message_id, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (chat_id) DO UPDATE
+                SET last_message_id = MAX(scan_state.last_message_id, excluded.last_message_id),
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (chat_id, message_id))
+        
+        conn.commit()
+
+
+def warm_cache():
+    """
+    Заповнює кеш фільмів в пам'яті та фільтр відомих кодів з бази.
+    Викликається при запуску бота після init_database().
+    
+    Таблиця читається потоково (iter_movies) за один прохід.
+    
+    Повертає:
+    - Кількість фільмів у кеші
+    """
+    known_codes.begin_rebuild(count_movies())
+    title_index.clear()
+    _bump_catalog_version()
+    try:
+        movie_index.load(_feed_title_index(_feed_code_filter(iter_movies())))
+    except Exception:
+        known_codes.cancel_rebuild()
+        raise
+    known_codes.finish_rebuild()
+    
+    return movie_index.stats()['size']
+
+
+def rebuild_code_filter():
+    """
+    Перебудовує фільтр Блума з усіх кодів бази
+    (після багатьох видалень або коли кодів стало більше, ніж він розрахований).
+    """
+    known_codes.begin_rebuild(count_movies())
+    try:
+        for _ in _feed_code_filter(iter_movies()):
+            pass
+    except Exception:
+        # Не вдалося прочитати базу - фільтр залишається старим (повторимо пізніше)
+        known_codes.cancel_rebuild()
+        raise
+    known_codes.finish_rebuild()
+
+
+def _schedule_code_filter_rebuild():
+    """
+    Запускає rebuild_code_filter в окремому потоці (якщо він ще не працює).
+    
+    Перебудова читає всю таблицю - запис фільму, що її спричинив, на неї не чекає.
+    Поки фільтр перебудовується, працює старий (нові коди додаються в обидва).
+    """
+    global _filter_rebuild_thread
+    
+    with _filter_rebuild_lock:
+        if _filter_rebuild_thread is not None and _filter_rebuild_thread.is_alive():
+            return
+        _filter_rebuild_thread = threading.Thread(
+            target=_rebuild_code_filter_quietly, name="code-filter-rebuild", daemon=True
+        )
+        _filter_rebuild_thread.start()
+
+
+def _rebuild_code_filter_quietly():
+    try:
+        rebuild_code_filter()
+    except Exception:
+        # Старий фільтр залишається; наступний запис чи видалення спробує ще раз
+        logger.exception("❌ Помилка перебудови фільтра кодів")
+
+
+def _feed_code_filter(rows):
+    """Передає рядки далі, паралельно додаючи їх коди у фільтр, що перебудовується"""
+    for row in rows:
+        known_codes.rebuild_add(row.code)
+        yield row
+
+
+def _feed_title_index(rows):
+    """Передає рядки далі, паралельно додаючи назви в індекс пошуку за назвою"""
+    for row in rows:
+        if row.title:
+            title_index.add(row.code, row.title, row.year)
+        yield row
+
+
+def search_titles(query, limit=None):
+    """
+    Пошук фільмів за назвою (без запитів до бази - по індексу в пам'яті).
+    
+    Параметри:
+    - query: частина назви (кирилицею або латиницею, регістр не важливий)
+    - limit: максимум результатів
+    
+    Повертає:
+    - Список словників code/title/year/score, найкращі першими
+    """
+    return title_index.search(query, limit=limit)
+
+
+def search_catalog(query, limit=None):
+    """
+    Пошук для inline-режиму: точний збіг коду + пошук за назвою.
+    
+    Працює тільки з пам'яттю (кеш фільмів та індекс назв) - inline-запити
+    приходять на кожну набрану літеру, і база на них не навантажується.
+    
+    Повертає:
+    - Список словників code/title/year, точний збіг коду першим
+    """
+    limit = limit or config.TITLE_SEARCH_LIMIT
+    results = []
+    
+    code = query.strip().upper()
+    if looks_like_code(code):
+        cached = movie_index.get(code)
+        if cached is not NOT_CACHED and cached is not None:
+            info = title_index.lookup(code) or {'title': None, 'year': None}
+            results.append({'code': code, 'title': info['title'], 'year': info['year']})
+    
+    for match in title_index.search(query, limit=limit):
+        if match['code'] != code:
+            results.append({'code': match['code'], 'title': match['title'], 'year': match['year']})
+    
+    return results[:limit]
+
+
+def get_catalog_version():
+    """Версія каталогу в пам'яті: змінюється при додаванні/видаленні фільмів (для кешів результатів)"""
+    return _catalog_version
+
+
+def _bump_catalog_version():
+    """Нова версія каталогу (кеші результатів за старою версією більше не використовуються)"""
+    global _catalog_version
+    with _catalog_version_lock:
+        _catalog_version += 1
+
+
+def get_code_filter_stats():
+    """
+    Статистика фільтра невідомих кодів (пам'ять, хибнопозитивні відповіді) для /debug
+    """
+    return known_codes.stats()
+
+
+def get_title_index_stats():
+    """
+    Розмір індексу пошуку за назвою для /debug
+    """
+    return title_index.stats()
+
+
+def _remember_movie(movie):
+    """
+    Оновлює структури в пам'яті після запису фільму в базу:
+    кеш фільмів, фільтр відомих кодів та індекс назв
+    """
+    _bump_catalog_version()
+    
+    movie_index.put(movie)
+    known_codes.add(movie['code'])
+    if movie.get('title'):
+        title_index.add(movie['code'], movie['title'], _parse_year(movie.get('year')))
+    
+    if known_codes.needs_rebuild:
+        _schedule_code_filter_rebuild()
+
+
+def _forget_movie(code):
+    """
+    Оновлює структури в пам'яті після видалення фільму з бази
+    """
+    _bump_catalog_version()
+    
+    movie_index.discard(code)
+    known_codes.remove(code)
+    title_index.remove(code)
+    
+    if known_codes.needs_rebuild:
+        _schedule_code_filter_rebuild()
+
+
+def get_pool_stats():
+    """
+    Стан пулу з'єднань (відкриті, вільні, лічильники подій) або None, якщо пул ще не створено
+    """
+    pool = _pool
+    if pool is None:
+        return None
+    return {'size': pool.size, 'idle': pool.idle_count, **pool.stats}
+
+
+def get_cache_stats():
+    """
+    Лічильники кешу фільмів (влучання, промахи, розмір) для /debug
+    """
+    return movie_index.stats()
+
+
 # Тестовий код (викликається тільки якщо запустити цей файл напряму)
 if __name__ == "__main__":
     print("Тестування бази даних...")
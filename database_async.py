@@ -0,0 +1,128 @@
+# database_async.py - Асинхронний доступ до бази даних для обробників бота
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import database
+from profiler import profiler
+
+# Обробники бота працюють в одному event loop. Якщо викликати в них
+# синхронні psycopg2/sqlite3 функції напряму - повільний запит зупиняє
+# ВСІХ користувачів. Тому запити виконуються в окремому пулі потоків,
+# а обробник тільки чекає результат через await.
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """
+    Повертає пул потоків для запитів до бази (створюється при першому зверненні).
+    
+    Кількість потоків обмежена DB_EXECUTOR_WORKERS (за замовчуванням = DB_POOL_MAX_SIZE),
+    щоб потоки не чекали одне на одного за з'єднаннями з пулу.
+    """
+    global _executor
+    
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db"
+                )
+    
+    return _executor
+
+def shutdown():
+    """
+    Зупиняє пул потоків (при зупинці бота)
+    """
+    global _executor
+    
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+async def run(func, *args, **kwargs):
+    """
+    Виконує синхронну функцію database.py в пулі потоків і повертає її результат,
+    не блокуючи event loop.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    if profiler.active:
+        # /profile: час у потоці бази теж потрапляє в профіль
+        call = profiler.wrap(call)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+# ========== АСИНХРОННІ ВЕРСІЇ ФУНКЦІЙ database.py ==========
+
+async def add_movie(code, message_id, chat_id, link=None, title=None, year=None, description=None, post_date=None):
+    """Асинхронна версія database.add_movie"""
+    return await run(database.add_movie, code, message_id, chat_id, link, title, year, description, post_date)
+
+
+async def upsert_movies(movies, overwrite=False, own_codes=None):
+    """Асинхронна версія database.upsert_movies"""
+    return await run(database.upsert_movies, movies, overwrite, own_codes)
+
+
+async def find_movie(code):
+    """Асинхронна версія database.find_movie"""
+    return await run(database.find_movie, code)
+
+
+async def search_titles(query, limit=None):
+    """Асинхронна версія database.search_titles (пошук по індексу - у пулі потоків, не в event loop)"""
+    return await run(database.search_titles, query, limit)
+
+
+async def search_catalog(query, limit=None):
+    """Асинхронна версія database.search_catalog"""
+    return await run(database.search_catalog, query, limit)
+
+
+async def get_all_movies():
+    """Асинхронна версія database.get_all_movies"""
+    return await run(database.get_all_movies)
+
+
+async def get_movies_page(after_code=None, before_code=None, limit=20, inclusive=False):
+    """Асинхронна версія database.get_movies_page"""
+    return await run(database.get_movies_page, after_code, before_code, limit, inclusive)
+
+
+async def count_movies():
+    """Асинхронна версія database.count_movies"""
+    return await run(database.count_movies)
+
+
+async def delete_movie(code):
+    """Асинхронна версія database.delete_movie"""
+    return await run(database.delete_movie, code)
+
+
+async def update_movie_post(chat_id, message_id, code=None, link=None, title=None, year=None, description=None,
+                            post_date=None):
+    """Асинхронна версія database.update_movie_post"""
+    return await run(database.update_movie_post, chat_id, message_id, code, link, title, year, description, post_date)
+
+
+async def delete_movie_posts(chat_id, message_ids):
+    """Асинхронна версія database.delete_movie_posts"""
+    return await run(database.delete_movie_posts, chat_id, message_ids)
+
+
+async def get_scan_mark(chat_id):
+    """Асинхронна версія database.get_scan_mark"""
+    return await run(database.get_scan_mark, chat_id)
+
+
+async def set_scan_mark(chat_id, message_id):
+    """Асинхронна версія database.set_scan_mark"""
+    return await run(database.set_scan_mark, chat_id, message_id)
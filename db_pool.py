@@ -0,0 +1,268 @@
+# db_pool.py - Пул довгоживучих з'єднань з базою даних
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Не вдалося отримати з'єднання з пулу за відведений час"""
+
+
+def is_connection_error(error) -> bool:
+    """
+    Перевіряє, чи помилка означає, що з'єднання зламане
+    (обрив мережі, перезапуск PostgreSQL, закрите з'єднання).
+
+    Такі з'єднання не повертаються в пул - замість них відкривається нове.
+    """
+    if isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        return True
+
+    import sqlite3
+    return isinstance(error, sqlite3.ProgrammingError) and 'closed' in str(error).lower()
+
+
+class ConnectionPool:
+    """
+    Потокобезпечний пул з'єднань з базою даних.
+
+    - тримає від min_size до max_size відкритих з'єднань
+    - перевіряє з'єднання (SELECT 1), якщо воно довго лежало без діла
+    - закриває зайві з'єднання, які простоюють довше за idle_timeout
+    - при помилці з'єднання відкидає його і перепідключається
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300.0,
+                 health_check_interval=30.0, acquire_timeout=10.0,
+                 connect_retries=3, retry_delay=0.5):
+        """
+        Параметри:
+        - connect: функція без аргументів, яка відкриває нове з'єднання
+        - min_size / max_size: межі кількості відкритих з'єднань
+        - idle_timeout: через скільки секунд простою зайве з'єднання закривається
+        - health_check_interval: після скількох секунд простою з'єднання перевіряється перед видачею
+        - acquire_timeout: скільки секунд чекати вільне з'єднання
+        - connect_retries / retry_delay: спроби перепідключення при недоступній базі
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Неправильні межі пулу: min_size={min_size}, max_size={max_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.connect_retries = connect_retries
+        self.retry_delay = retry_delay
+
+        self._idle = deque()  # (з'єднання, час останнього використання), найсвіжіші праворуч
+        self._size = 0  # всього відкритих з'єднань (вільні + видані)
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.stats = {
+            'created': 0,   # відкрито нових з'єднань
+            'reused': 0,    # видано вже відкритих з'єднань
+            'evicted': 0,   # закрито через простій
+            'broken': 0,    # відкинуто зламаних з'єднань
+            'waits': 0,     # скільки разів чекали вільне з'єднання
+        }
+
+    # ---------- Відкриття / закриття ----------
+
+    def open(self):
+        """Відкриває min_size з'єднань заздалегідь"""
+        with self._cond:
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+
+        for opened in range(missing):
+            try:
+                conn = self._open_reserved()
+            except Exception as e:
+                logger.warning(f"Не вдалося заздалегідь відкрити з'єднання з базою: {e}")
+                # Місце невдалого з'єднання звільнив _open_reserved, решту резерву - тут
+                with self._cond:
+                    self._size -= missing - opened - 1
+                    self._cond.notify_all()
+                return
+            self.release(conn)
+
+    def close(self):
+        """Закриває всі вільні з'єднання. Видані закриються при поверненні."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    # ---------- Видача / повернення ----------
+
+    def acquire(self):
+        """
+        Видає з'єднання з пулу.
+
+        Якщо вільних немає і досягнуто max_size - чекає acquire_timeout секунд,
+        після чого кидає PoolTimeout.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Пул з'єднань закрито")
+
+                self._evict_idle_locked()
+
+                if self._idle:
+                    # LIFO: беремо останнє повернене (найменше шансів, що воно "протухло")
+                    conn, last_used = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    # Резервуємо місце і відкриваємо з'єднання поза блокуванням
+                    self._size += 1
+                    conn = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"Немає вільних з'єднань (max_size={self.max_size}) за {self.acquire_timeout} с"
+                    )
+
+                self.stats['waits'] += 1
+                self._cond.wait(remaining)
+
+        if conn is None:
+            return self._open_reserved()
+
+        # Перевіряємо з'єднання, яке довго простоювало
+        if time.monotonic() - last_used >= self.health_check_interval and not self._is_healthy(conn):
+            logger.warning("З'єднання з базою не пройшло перевірку, перепідключаюсь...")
+            self.stats['broken'] += 1
+            self._close_quietly(conn)
+            return self._open_reserved()
+
+        self.stats['reused'] += 1
+        return conn
+
+    def release(self, conn, broken=False):
+        """
+        Повертає з'єднання в пул.
+
+        Незавершена транзакція відкочується, щоб наступний користувач
+        отримав чисте з'єднання. Зламані з'єднання закриваються.
+        """
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+
+        with self._cond:
+            if broken or self._closed:
+                if broken:
+                    self.stats['broken'] += 1
+                self._size -= 1
+                self._cond.notify()
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+
+        self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Контекстний менеджер для роботи з з'єднанням:
+
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                ...
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = is_connection_error(e)
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    # ---------- Допоміжні методи ----------
+
+    @property
+    def size(self):
+        """Кількість відкритих з'єднань"""
+        return self._size
+
+    @property
+    def idle_count(self):
+        """Кількість вільних з'єднань"""
+        return len(self._idle)
+
+    def _open_reserved(self):
+        """Відкриває з'єднання на вже зарезервоване місце (з повторними спробами)"""
+        delay = self.retry_delay
+        for attempt in range(1, self.connect_retries + 1):
+            try:
+                conn = self._connect()
+                self.stats['created'] += 1
+                return conn
+            except Exception as e:
+                if attempt == self.connect_retries:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                logger.warning(f"Помилка підключення до бази (спроба {attempt}): {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _evict_idle_locked(self):
+        """Закриває з'єднання, які простоюють довше idle_timeout (викликати під блокуванням)"""
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]  # найстаріше - ліворуч
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self.stats['evicted'] += 1
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        """Перевіряє з'єднання простим запитом SELECT 1"""
+        if getattr(conn, 'closed', 0):
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,81 @@
+# inline_cache.py - Кеш результатів inline-запитів (@bot назва)
+
+import time
+from collections import OrderedDict
+
+import config
+
+
+class InlineResultsCache:
+    """
+    Кеш знайдених фільмів для inline-запитів.
+
+    Користувач набирає запит по літері, і Telegram надсилає запит на кожну -
+    однакові запити (від різних користувачів, наступні сторінки) беруться з кешу.
+
+    - ключ - нормалізований текст запиту (title_search.search_key)
+    - запис діє ttl секунд і поки не змінився каталог (версія індексу назв)
+    - обмежений за розміром: найдавніше використані запити витісняються (LRU)
+    """
+
+    def __init__(self, ttl=60.0, max_size=5000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()  # key -> (results, version, expires_at)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """
+        Повертає:
+        - список знайдених фільмів
+        - None - немає в кеші, запис застарів або каталог змінився
+        """
+        item = self._items.get(key)
+
+        if item is not None:
+            results, cached_version, expires_at = item
+            if cached_version == version and time.monotonic() < expires_at:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return results
+            del self._items[key]
+
+        self.misses += 1
+        return None
+
+    def set(self, key, version, results):
+        """Зберігає результати запиту для поточної версії каталогу"""
+        if self.ttl <= 0:
+            return
+
+        self._items[key] = (results, version, time.monotonic() + self.ttl)
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> dict:
+        """Лічильники кешу для /debug"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Глобальний кеш inline-результатів (використовується в bot.py)
+inline_cache = InlineResultsCache(
+    ttl=config.INLINE_RESULTS_CACHE_TTL,
+    max_size=config.INLINE_RESULTS_CACHE_MAX_SIZE
+)
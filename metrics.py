@@ -0,0 +1,398 @@
+# metrics.py - Метрики бота у форматі Prometheus (без сторонніх бібліотек)
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Межі кошиків гістограм (секунди): від швидких запитів до бази до довгих викликів Telegram
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self._value += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self._value
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # останній - понад найбільшу межу (+Inf)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+
+        cumulative = 0
+        for bound, count in zip(self._buckets, counts):
+            cumulative += count
+            yield f"{name}_bucket", labels + (('le', _format_value(bound)),), cumulative
+        cumulative += counts[-1]
+        yield f"{name}_bucket", labels + (('le', '+Inf'),), cumulative
+        yield f"{name}_sum", labels, total_sum
+        yield f"{name}_count", labels, cumulative
+
+
+class _Metric:
+    """
+    Метрика з мітками (labels), як у prometheus_client:
+
+        HANDLER_SECONDS.labels('search_movie').observe(0.012)
+        MONITOR_LAG_SECONDS.observe(2.5)  # метрика без міток
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: очікується мітки {self.labelnames}, отримано {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def collect(self):
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, tuple(zip(self.labelnames, values)))
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+
+class CallbackGauge:
+    """
+    Значення, яке обчислюється тільки в момент запиту /metrics.
+
+    callback повертає список (значення міток, значення) - наприклад, розміри кешів.
+    На гарячому шляху нічого не коштує.
+    kind='counter' - для лічильників, які вже ведуть самі кеші (влучання, промахи).
+    """
+
+    def __init__(self, name, documentation, labelnames, callback, kind='gauge'):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def collect(self):
+        try:
+            rows = self.callback()
+        except Exception as e:
+            logger.warning(f"Метрика {self.name} недоступна: {e}")
+            return
+        for values, value in rows:
+            yield self.name, tuple(zip(self.labelnames, values)), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Усі метрики в текстовому форматі Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.collect():
+                if labels:
+                    label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+                    lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+# Глобальний реєстр метрик процесу
+registry = Registry()
+
+# ---------- Метрики бота ----------
+
+HANDLER_SECONDS = registry.register(Histogram(
+    'films_bot_handler_seconds', "Тривалість обробників оновлень Telegram", ['handler']
+))
+HANDLER_ERRORS = registry.register(Counter(
+    'films_bot_handler_errors_total', "Винятки в обробниках оновлень", ['handler']
+))
+DB_QUERY_SECONDS = registry.register(Histogram(
+    'films_bot_db_query_seconds', "Тривалість звернень до бази за функціями database.py", ['function']
+))
+DB_ERRORS = registry.register(Counter(
+    'films_bot_db_errors_total', "Помилки звернень до бази за функціями database.py", ['function']
+))
+TELEGRAM_API_SECONDS = registry.register(Histogram(
+    'films_bot_telegram_api_seconds', "Тривалість викликів Bot API за методами", ['method']
+))
+TELEGRAM_API_ERRORS = registry.register(Counter(
+    'films_bot_telegram_api_errors_total', "Помилки викликів Bot API (мережа або HTTP статус >= 400)", ['method']
+))
+SEND_WAIT_SECONDS = registry.register(Histogram(
+    'films_bot_send_wait_seconds', "Очікування в черзі надсилання (ліміти Telegram) за пріоритетами", ['priority']
+))
+SEND_RETRY_AFTER = registry.register(Counter(
+    'films_bot_send_retry_after_total', "Відповіді 429 (RetryAfter) від Telegram за методами", ['endpoint']
+))
+WEBHOOK_REQUESTS = registry.register(Counter(
+    'films_bot_webhook_requests_total', "Запити на webhook: прийнято / неправильний secret token / не розібрано",
+    ['result']
+))
+SCANNER_MESSAGES = registry.register(Counter(
+    'films_bot_scanner_messages_total', "Повідомлень каналу, переглянутих сканером: scan - історія, monitor - нові пости",
+    ['source']
+))
+SCANNER_MOVIES_ADDED = registry.register(Counter(
+    'films_bot_scanner_movies_added_total', "Фільмів, доданих сканером: scan - історія, monitor - нові пости",
+    ['source']
+))
+SCANNER_RUNS = registry.register(Counter(
+    'films_bot_scanner_runs_total', "Запусків сканування історії каналу", ['result']
+))
+SCANNER_REQUESTS = registry.register(Counter(
+    'films_bot_scanner_requests_total', "Запити сканера до Telegram (Pyrogram) за методами: ok / flood_wait / error",
+    ['method', 'result']
+))
+MONITOR_LAG_SECONDS = registry.register(Histogram(
+    'films_bot_monitor_ingest_lag_seconds', "Від публікації нового поста в каналі до запису фільму в базу",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+))
+
+
+def _cache_stats():
+    """Статистика всіх кешів: (назва, stats()) - модулі імпортуються тільки при запиті /metrics"""
+    import database
+    from inline_cache import inline_cache
+    from post_cache import post_cache
+    from subscription_cache import subscription_cache
+
+    return [
+        ('movies', database.get_cache_stats()),
+        ('subscriptions', subscription_cache.stats()),
+        ('inline', inline_cache.stats()),
+        ('posts', post_cache.stats()),
+    ]
+
+
+def _cache_hit_ratio():
+    return [((name,), stats['hit_rate']) for name, stats in _cache_stats()]
+
+
+def _cache_requests():
+    rows = []
+    for name, stats in _cache_stats():
+        hits = stats['hits'] + stats.get('negative_hits', 0)
+        rows.append(((name, 'hit'), hits))
+        rows.append(((name, 'miss'), stats['misses']))
+    return rows
+
+
+def _cache_size():
+    import database
+
+    rows = [((name,), stats['size']) for name, stats in _cache_stats()]
+    rows.append((('titles',), database.get_title_index_stats()['titles']))
+    code_filter = database.get_code_filter_stats()
+    if code_filter['ready']:
+        rows.append((('code_filter',), code_filter['items']))
+    return rows
+
+
+def _code_filter():
+    import database
+
+    stats = database.get_code_filter_stats()
+    if not stats['ready']:
+        return []
+    return [
+        (('rejected',), stats['rejected']),
+        (('false_positives',), stats['false_positives']),
+    ]
+
+
+def _pool_connections():
+    import database
+
+    stats = database.get_pool_stats()
+    if stats is None:
+        return []
+    return [(('open',), stats['size']), (('idle',), stats['idle'])]
+
+
+def _pool_events():
+    import database
+
+    stats = database.get_pool_stats()
+    if stats is None:
+        return []
+    return [((event,), stats[event]) for event in ('created', 'reused', 'evicted', 'broken', 'waits')]
+
+
+def _send_queue():
+    from rate_limiter import send_limiter
+
+    return [((priority,), depth) for priority, depth in send_limiter.queue_depth().items()]
+
+
+def _monitor_queue():
+    from channel_scanner import scanner
+
+    if scanner.monitor is None:
+        return []
+    return [((), scanner.monitor.queue_depth())]
+
+
+registry.register(CallbackGauge(
+    'films_bot_send_queue_depth', "Повідомлень, що чекають у черзі надсилання", ['priority'], _send_queue
+))
+registry.register(CallbackGauge(
+    'films_bot_monitor_queue_depth', "Нових постів каналу, що чекають запису в базу", [], _monitor_queue
+))
+registry.register(CallbackGauge(
+    'films_bot_cache_hit_ratio', "Частка влучань у кеш", ['cache'], _cache_hit_ratio
+))
+registry.register(CallbackGauge(
+    'films_bot_cache_requests_total', "Звернення до кешів", ['cache', 'result'], _cache_requests, kind='counter'
+))
+registry.register(CallbackGauge(
+    'films_bot_cache_size', "Записів у кешах та індексах в пам'яті", ['cache'], _cache_size
+))
+registry.register(CallbackGauge(
+    'films_bot_code_filter_total', "Фільтр невідомих кодів: відсіяно без бази / хибнопозитивні",
+    ['result'], _code_filter, kind='counter'
+))
+registry.register(CallbackGauge(
+    'films_bot_db_pool_connections', "З'єднання пулу бази", ['state'], _pool_connections
+))
+registry.register(CallbackGauge(
+    'films_bot_db_pool_events_total', "Події пулу з'єднань", ['event'], _pool_events, kind='counter'
+))
+
+
+def timed_handler(func):
+    """
+    Декоратор для async-обробника: тривалість і винятки з міткою handler=назва функції.
+    """
+    histogram = HANDLER_SECONDS.labels(func.__name__)
+    errors = HANDLER_ERRORS.labels(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+# ---------- HTTP endpoint ----------
+
+async def _handle_http(reader, writer):
+    try:
+        request_line = await reader.readline()
+        # Заголовки не потрібні - дочитуємо до порожнього рядка
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+
+        parts = request_line.decode('latin-1').split(' ')
+        path = parts[1] if len(parts) > 1 else '/'
+
+        if path.split('?', 1)[0] == '/metrics':
+            status, body = b'200 OK', registry.render().encode()
+        else:
+            status, body = b'404 Not Found', b'Not Found\n'
+
+        writer.write(
+            b'HTTP/1.1 ' + status + b'\r\n'
+            b'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+            b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+            b'Connection: close\r\n'
+            b'\r\n' + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_http_server(host, port):
+    """Запускає endpoint /metrics у поточному event loop"""
+    server = await asyncio.start_server(_handle_http, host, port)
+    logger.info(f"📈 Метрики Prometheus: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,146 @@
+# movie_cache.py - Кеш фільмів в пам'яті: код → (chat_id, message_id, link)
+
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+# Повертається з MovieIndex.get(), коли кеш не знає відповіді і треба йти в базу
+NOT_CACHED = object()
+
+
+class MovieIndex:
+    """
+    Індекс фільмів в пам'яті перед database.find_movie.
+    
+    - заповнюється з бази при запуску (load)
+    - оновлюється при кожному записі (put / discard з database.py)
+    - обмежений за розміром: найдавніше використані коди витісняються (LRU)
+    
+    Поки в кеші ВСІ фільми з бази (complete=True), промах означає,
+    що фільму немає взагалі, і база теж не потрібна - але тільки complete_ttl секунд
+    після завантаження: фільми, записані іншим процесом (друга копія бота, скрипти),
+    кеш не бачить, тому далі промах знову перевіряється в базі (через фільтр кодів).
+    """
+    
+    def __init__(self, max_size=100000, complete_ttl=60.0):
+        self.max_size = max_size
+        self.complete_ttl = complete_ttl
+        self._items = OrderedDict()  # code -> (chat_id, message_id, link)
+        self._lock = threading.Lock()
+        self.complete = False
+        self._loaded_at = 0.0
+        self._pending = None  # зміни (put / discard) під час load: code -> запис або None
+        
+        # Лічильники для перевірки, чи справді зменшилось навантаження на базу
+        self.hits = 0           # знайдено в кеші
+        self.negative_hits = 0  # точно немає в базі (кеш повний), запит не потрібен
+        self.misses = 0         # довелось питати базу
+        self.evictions = 0      # витіснено через обмеження розміру
+    
+    def load(self, rows):
+        """
+        Заповнює кеш рядками з бази (database.iter_movies - об'єкти MovieRow).
+        Якщо фільмів більше за max_size - кеш стає неповним (решта рядків пропускається).
+        
+        put / discard, що прийшли під час читання бази, застосовуються поверх прочитаного -
+        запис, зроблений паралельно з load, не губиться.
+        """
+        with self._lock:
+            self._pending = {}
+        
+        items = OrderedDict()
+        complete = True
+        
+        for row in rows:
+            if len(items) >= self.max_size:
+                complete = False
+                continue
+            items[row.code] = (row.chat_id, row.message_id, row.link)
+        
+        with self._lock:
+            pending, self._pending = self._pending, None
+            for code, item in pending.items():
+                if item is None:
+                    items.pop(code, None)
+                else:
+                    items[code] = item
+                    items.move_to_end(code)
+            while len(items) > self.max_size:
+                items.popitem(last=False)
+                complete = False
+            
+            self._items = items
+            self.complete = complete
+            self._loaded_at = time.monotonic()
+    
+    def get(self, code):
+        """
+        Шукає фільм у кеші.
+        
+        Повертає:
+        - словник фільму, якщо знайдено
+        - None, якщо фільму точно немає (кеш містить всю базу)
+        - NOT_CACHED, якщо треба перевірити базу
+        """
+        with self._lock:
+            item = self._items.get(code)
+            
+            if item is not None:
+                self._items.move_to_end(code)
+                self.hits += 1
+                chat_id, message_id, link = item
+                return {
+                    'code': code,
+                    'message_id': message_id,
+                    'chat_id': chat_id,
+                    'link': link
+                }
+            
+            if self.complete and time.monotonic() - self._loaded_at < self.complete_ttl:
+                self.negative_hits += 1
+                return None
+            
+            self.misses += 1
+            return NOT_CACHED
+    
+    def put(self, movie):
+        """Додає або оновлює фільм у кеші (словник з code/chat_id/message_id/link)"""
+        item = (movie['chat_id'], movie['message_id'], movie.get('link'))
+        with self._lock:
+            self._items[movie['code']] = item
+            self._items.move_to_end(movie['code'])
+            if self._pending is not None:
+                self._pending[movie['code']] = item
+            
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+                self.complete = False
+    
+    def discard(self, code):
+        """Видаляє фільм з кешу (якщо він там є)"""
+        with self._lock:
+            self._items.pop(code, None)
+            if self._pending is not None:
+                self._pending[code] = None
+    
+    def stats(self) -> dict:
+        """Лічильники кешу для /debug"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'complete': self.complete,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            }
+
+
+# Глобальний індекс фільмів (використовується в database.py)
+movie_index = MovieIndex(max_size=config.MOVIE_CACHE_MAX_SIZE, complete_ttl=config.MOVIE_CACHE_COMPLETE_TTL)
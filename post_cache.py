@@ -0,0 +1,113 @@
+# post_cache.py - Кеш вмісту постів каналу: (chat_id, message_id) → file_id + підпис
+
+from collections import OrderedDict
+
+import config
+
+# Види вмісту поста, які бот може надіслати повторно за file_id
+# (назви як у telegram.Message і Bot.send_<вид>)
+PHOTO = 'photo'
+VIDEO = 'video'
+ANIMATION = 'animation'
+DOCUMENT = 'document'
+TEXT = 'text'
+
+
+class PostPayloadCache:
+    """
+    Вміст постів каналу, які бот бачив сам (channel_post): file_id медіа, підпис і його форматування.
+
+    Для таких постів фільм надсилається напряму (send_photo / send_video ... за file_id),
+    без copy_message - Telegram не треба читати пост з каналу.
+
+    - ключ - (chat_id, message_id) поста; кілька кодів з одного поста ділять один запис
+    - обмежений за розміром: найдавніше використані пости витісняються (LRU)
+    - max_size=0 - кеш вимкнено, всі фільми йдуть через copy_message
+    - file_id прив'язаний до бота, тому пости зі сканера Pyrogram (акаунт користувача) сюди не потрапляють
+    """
+
+    def __init__(self, max_size=5000):
+        self.max_size = max_size
+        self._items = OrderedDict()  # (chat_id, message_id) -> (вид, file_id, текст, entities)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0  # file_id не спрацював - надіслано через copy_message
+
+    def remember(self, message) -> bool:
+        """
+        Запам'ятовує вміст поста (telegram.Message).
+
+        Повертає:
+        - True якщо пост збережено
+        - False якщо кеш вимкнено або вміст не підтримується (опитування, альбоми без підпису...)
+        """
+        if self.max_size <= 0:
+            return False
+
+        if message.photo:
+            payload = (PHOTO, message.photo[-1].file_id, message.caption, message.caption_entities or None)
+        elif message.video:
+            payload = (VIDEO, message.video.file_id, message.caption, message.caption_entities or None)
+        elif message.animation:
+            payload = (ANIMATION, message.animation.file_id, message.caption, message.caption_entities or None)
+        elif message.document:
+            payload = (DOCUMENT, message.document.file_id, message.caption, message.caption_entities or None)
+        elif message.text:
+            payload = (TEXT, None, message.text, message.entities or None)
+        else:
+            return False
+
+        key = (message.chat_id, message.message_id)
+        self._items[key] = payload
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+        return True
+
+    def get(self, chat_id, message_id):
+        """
+        Повертає:
+        - (вид, file_id, текст, entities) поста
+        - None - пост не в кеші (треба copy_message)
+        """
+        key = (chat_id, message_id)
+        payload = self._items.get(key)
+
+        if payload is None:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def discard(self, chat_id, message_id, failed=False):
+        """Видаляє пост з кешу (пост змінено/видалено або file_id більше не працює)"""
+        self._items.pop((chat_id, message_id), None)
+        if failed:
+            self.failures += 1
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> dict:
+        """Лічильники кешу для /debug"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'failures': self.failures,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Глобальний кеш постів (використовується в bot.py)
+post_cache = PostPayloadCache(max_size=config.POST_CACHE_MAX_SIZE)
@@ -0,0 +1,135 @@
+# post_parser.py - Розбір поста з фільмом ("Код:/Назва:/Рік:/Опис:/Посилання:")
+
+import re
+
+# Один шаблон на всі поля: підпис "Слово:" на початку рядка (перед ним можуть бути
+# емодзі чи маркери списку). Текст проглядається один раз, поле визначається за словом,
+# а значення читається з позиції після підпису.
+_LABEL_RE = re.compile(r'^[^\w\n]*(\w+)[ \t]*:\s*', re.MULTILINE)
+
+_CODE_RE = re.compile(r'[A-Za-z0-9]+')
+_YEAR_RE = re.compile(r'\d{4}')
+_LINK_RE = re.compile(r'https?://\S+')
+
+# Підпис -> поле результату
+_FIELDS = {
+    'код': 'code',
+    'назва': 'title',
+    'рік': 'year',
+    'опис': 'description',
+    'посилання': 'link',
+    'лінк': 'link',
+    'линк': 'link',
+    'ссылка': 'link',
+    'link': 'link',
+}
+
+# Підпис посеред рядка ("🎬 Фільм дня. Код: 001 Назва: Матриця", "Дивись тут -> Посилання: https://...") -
+# запасний варіант для полів, яких немає на початку рядка: окремий шаблон на поле, шукається тільки для
+# порожніх полів і тільки якщо слово підпису взагалі є в тексті (перевірка підрядка в рази дешевша
+# за пошук шаблоном без урахування регістру). (?<!\w) - підпис не може бути кінцем іншого слова ("Штрихкод:")
+_FIELD_LABELS = {
+    field: tuple(label for label, f in _FIELDS.items() if f == field)
+    for field in set(_FIELDS.values())
+}
+_FIELD_ANYWHERE_RE = {
+    field: re.compile(
+        r'(?<!\w)(?:' + '|'.join(labels) + r')[ \t]*:\s*', re.IGNORECASE
+    )
+    for field, labels in _FIELD_LABELS.items()
+}
+_LABEL_ANYWHERE_RE = re.compile(r'(?<!\w)(\w+)[ \t]*:\s*')
+
+
+def parse_post(text: str) -> dict:
+    """
+    Розбирає текст поста з каналу за один прохід.
+
+    Очікуваний формат:
+    Код: 002
+    Назва: Голови держав
+    Рік: 2025
+    Опис: Опис фільму...
+    Посилання: https://example.com/watch/film
+
+    Повертає:
+    - Словник code/title/year/description/link (None для відсутніх полів).
+      Код - у верхньому регістрі, рік - рядок з 4 цифр.
+      Якщо підпис зустрічається кілька разів - береться перший.
+      Підписи шукаються спершу на початку рядка; поля, яких там немає, - будь-де в тексті.
+      Назва закінчується в кінці рядка або перед наступним підписом у тому ж рядку.
+    """
+    movie_info = {
+        'code': None,
+        'title': None,
+        'year': None,
+        'description': None,
+        'link': None
+    }
+
+    if not text:
+        return movie_info
+
+    # Тільки відомі підписи ("Режисер:" всередині опису його не обриває)
+    labels = []
+    for match in _LABEL_RE.finditer(text):
+        field = _FIELDS.get(match.group(1).lower())
+        if field is not None:
+            labels.append((field, match))
+
+    for index, (field, match) in enumerate(labels):
+        if movie_info[field] is None:
+            # Опис - до наступного відомого підпису ("Посилання:" після опису) або до кінця
+            end = labels[index + 1][1].start() if index + 1 < len(labels) else len(text)
+            movie_info[field] = _read_value(text, field, match.end(), end)
+
+    # Поля, яких немає на початку рядка, - з підписів посеред рядка
+    lowered = None
+    for field, value in movie_info.items():
+        if value is not None:
+            continue
+        if lowered is None:
+            lowered = text.lower()
+        if not any(label in lowered for label in _FIELD_LABELS[field]):
+            continue
+        for match in _FIELD_ANYWHERE_RE[field].finditer(text):
+            pos = match.end()
+            end = _next_label(text, pos, len(text)) if field == 'description' else None
+            value = _read_value(text, field, pos, end)
+            if value is not None:
+                movie_info[field] = value
+                break
+
+    return movie_info
+
+
+def _read_value(text, field, pos, end):
+    """Значення поля після підпису (pos - кінець підпису, end - кінець опису); None - значення немає"""
+    if field == 'code':
+        value = _CODE_RE.match(text, pos)
+        return value.group().upper() if value else None
+
+    if field == 'year':
+        value = _YEAR_RE.match(text, pos)
+        return value.group() if value else None
+
+    if field == 'link':
+        value = _LINK_RE.match(text, pos)
+        return value.group() if value else None
+
+    if field == 'title':
+        # До кінця рядка або до наступного підпису в цьому ж рядку
+        line_end = text.find('\n', pos)
+        if line_end == -1:
+            line_end = len(text)
+        return text[pos:_next_label(text, pos, line_end)].strip() or None
+
+    return text[pos:end].strip() or None
+
+
+def _next_label(text, start, end):
+    """Позиція першого відомого підпису в text[start:end] (або end)"""
+    for match in _LABEL_ANYWHERE_RE.finditer(text, start, end):
+        if match.group(1).lower() in _FIELDS:
+            return match.start()
+    return end
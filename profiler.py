@@ -0,0 +1,260 @@
+# profiler.py - Профілювання бота на вимогу (команда /profile)
+
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Шлях до проекту - щоб у звіті показувати bot.py:123 замість повного шляху
+_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+# Режими профілювання
+CPROFILE = 'cprofile'
+SAMPLE = 'sample'
+
+
+class Profiler:
+    """
+    Профілювання всього процесу на обмежений час.
+
+    Обробники, сканер Pyrogram та моніторинг працюють в одному event loop,
+    тому профілюється потік event loop (і потоки запитів до бази - через wrap).
+
+    - cprofile - детерміноване профілювання (кожен виклик функції; помітно сповільнює бота)
+    - sample - семплювання стеків з окремого потоку кожні interval секунд (майже без накладних витрат)
+
+    Коли профілювання вимкнено, нічого не встановлено і нічого не коштує:
+    database_async перевіряє лише атрибут active.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.mode = None
+        self.started_at = None
+        self.updates = 0
+        self.max_updates = None
+
+        self._profile = None          # cProfile потоку event loop
+        self._thread_profiles = []    # cProfile викликів у потоках бази
+        self._unprofiled_calls = 0    # виклики в потоках бази, для яких cProfile не ввімкнувся
+        self._lock = threading.Lock()
+
+        self._sampler = None
+        self._sampling = threading.Event()
+        self._stacks = Counter()      # стек (кортеж функцій) -> кількість семплів
+        self._samples = 0
+
+    def start(self, mode=CPROFILE, max_updates=None, interval=0.005):
+        """Вмикає профілювання (викликається з потоку event loop)"""
+        if self.active:
+            raise RuntimeError("Профілювання вже запущено")
+
+        self.mode = mode
+        self.started_at = time.perf_counter()
+        self.updates = 0
+        self.max_updates = max_updates
+        self._thread_profiles = []
+        self._unprofiled_calls = 0
+        self._stacks = Counter()
+        self._samples = 0
+
+        if mode == CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif mode == SAMPLE:
+            self._sampling.set()
+            self._sampler = threading.Thread(
+                target=self._sample_loop,
+                args=(threading.get_ident(), interval),
+                name="profiler-sampler",
+                daemon=True
+            )
+            self._sampler.start()
+        else:
+            raise ValueError(f"Невідомий режим профілювання: {mode}")
+
+        self.active = True
+
+    def count_update(self) -> bool:
+        """Рахує оновлення; True - досягнуто max_updates і час зупиняти"""
+        self.updates += 1
+        return self.max_updates is not None and self.updates >= self.max_updates
+
+    def wrap(self, func):
+        """
+        Обгортає синхронну функцію, яка виконається в іншому потоці (database_async),
+        щоб її час теж потрапив у профіль cprofile. У режимі sample потоки бази семплюються напряму.
+
+        З Python 3.12 cProfile працює через sys.monitoring, де одночасно може бути лише один профайлер
+        (і він уже ввімкнений у потоці event loop) - тоді enable() падає, і функція виконується без профілю.
+        """
+        if not self.active or self.mode != CPROFILE:
+            return func
+
+        def profiled():
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                with self._lock:
+                    self._unprofiled_calls += 1
+                return func()
+            try:
+                return func()
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self.active:
+                        self._thread_profiles.append(profile)
+
+        return profiled
+
+    def stop(self, top=20) -> dict:
+        """
+        Вимикає профілювання і повертає звіт:
+        {'text': короткий звіт, 'filename': назва файлу, 'data': сирий профіль (bytes)}
+        """
+        if not self.active:
+            raise RuntimeError("Профілювання не запущено")
+
+        elapsed = time.perf_counter() - self.started_at
+
+        if self.mode == CPROFILE:
+            self._profile.disable()
+            with self._lock:
+                self.active = False
+                profiles = [self._profile] + self._thread_profiles
+            report = self._cprofile_report(profiles, top)
+            self._profile = None
+            self._thread_profiles = []
+        else:
+            self._sampling.clear()
+            self._sampler.join()
+            self._sampler = None
+            self.active = False
+            report = self._sample_report(top)
+            self._stacks = Counter()
+
+        header = f"⏱️ Профіль ({self.mode}): {elapsed:.1f} с, оновлень: {self.updates}\n"
+        report['text'] = header + report['text']
+        return report
+
+    def status(self) -> dict:
+        return {
+            'active': self.active,
+            'mode': self.mode,
+            'elapsed': time.perf_counter() - self.started_at if self.active else 0.0,
+            'updates': self.updates,
+            'max_updates': self.max_updates,
+        }
+
+    # ---------- cProfile ----------
+
+    def _cprofile_report(self, profiles, top):
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+
+        # Функції з власним часом (tottime) і сумарним (cumtime, разом з викликаними)
+        rows = stats.stats  # (файл, рядок, функція) -> (cc, nc, tottime, cumtime, callers)
+        by_own = sorted(rows.items(), key=lambda item: item[1][2], reverse=True)[:top]
+        by_total = sorted(rows.items(), key=lambda item: item[1][3], reverse=True)[:top]
+
+        text = f"📊 Викликів: {stats.total_calls}, час: {stats.total_tt:.2f} с, потоків бази: {len(profiles) - 1}\n"
+        if self._unprofiled_calls:
+            text += f"⚠️ Без профілю (інший профайлер активний): {self._unprofiled_calls} викликів у потоках бази\n"
+        text += "\n🔥 ВЛАСНИЙ ЧАС (tottime):\n"
+        for func, (cc, nc, tottime, cumtime, callers) in by_own:
+            text += f"{tottime:8.3f} с {nc:>8} × {_func_name(func)}\n"
+        text += "\n🌳 РАЗОМ З ВИКЛИКАНИМИ (cumtime):\n"
+        for func, (cc, nc, tottime, cumtime, callers) in by_total:
+            text += f"{cumtime:8.3f} с {nc:>8} × {_func_name(func)}\n"
+
+        # Формат dump_stats - відкривається pstats, snakeviz, gprof2dot
+        return {
+            'text': text,
+            'filename': f"profile-{time.strftime('%Y%m%d-%H%M%S')}.prof",
+            'data': marshal.dumps(stats.stats),
+        }
+
+    # ---------- Семплювання ----------
+
+    def _sample_loop(self, loop_thread_id, interval):
+        own_id = threading.get_ident()
+
+        while self._sampling.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                # Вільні потоки бази (чекають у черзі завдань) - не цікаві
+                if thread_id != loop_thread_id and _is_idle(frame):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[tuple(stack)] += 1
+
+            self._samples += 1
+            time.sleep(interval)
+
+    def _sample_report(self, top):
+        own = Counter()
+        total = Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for func in set(stack):
+                total[func] += count
+
+        samples = sum(self._stacks.values()) or 1
+        text = f"📊 Семплів: {self._samples}, стеків: {sum(self._stacks.values())}\n"
+        text += "\n🔥 ВЛАСНИЙ ЧАС (верх стеку):\n"
+        for func, count in own.most_common(top):
+            text += f"{count / samples:7.1%} {count:>7} × {_func_name(func)}\n"
+        text += "\n🌳 РАЗОМ З ВИКЛИКАНИМИ:\n"
+        for func, count in total.most_common(top):
+            text += f"{count / samples:7.1%} {count:>7} × {_func_name(func)}\n"
+
+        # Згорнуті стеки (collapsed stacks) - формат flamegraph.pl та speedscope
+        lines = []
+        for stack, count in self._stacks.most_common():
+            lines.append(';'.join(_func_name(func) for func in stack) + f" {count}")
+
+        return {
+            'text': text,
+            'filename': f"profile-{time.strftime('%Y%m%d-%H%M%S')}.collapsed.txt",
+            'data': ('\n'.join(lines) + '\n').encode('utf-8'),
+        }
+
+
+def _is_idle(frame):
+    """Потік чекає на блокуванні (threading/queue) або нового завдання пулу - нічого не виконує"""
+    code = frame.f_code
+    if code.co_filename.endswith(('threading.py', 'queue.py')):
+        return True
+    return code.co_name == '_worker' and code.co_filename.endswith(os.path.join('concurrent', 'futures', 'thread.py'))
+
+
+def _func_name(func):
+    """(файл, рядок, функція) -> 'database.py:120(find_movie)'"""
+    filename, line, name = func
+    if filename == '~':
+        return name  # вбудовані функції: <built-in method time.sleep>
+    if filename.startswith(_ROOT):
+        filename = filename[len(_ROOT):]
+    elif 'site-packages' + os.sep in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{line}({name})"
+
+
+# Глобальний профайлер процесу
+profiler = Profiler()
@@ -0,0 +1,276 @@
+# rate_limiter.py - Черга вихідних повідомлень з пріоритетами та лімітами Telegram
+
+import asyncio
+import logging
+import time
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Пріоритети (менше - важливіше)
+PRIORITY_USER = 0    # відповіді користувачам: фільм, "не знайдено", перевірка підписки
+PRIORITY_ADMIN = 1   # повідомлення адміну: підтвердження постів, звіти сканування, профілі
+PRIORITY_NAMES = ('user', 'admin')
+
+# Для викликів Bot API: context.bot.send_message(..., rate_limit_args=ADMIN_REPORT)
+ADMIN_REPORT = {'priority': PRIORITY_ADMIN}
+
+# Методи, які надсилають повідомлення в чат - на них діють ліміти Telegram.
+# Решта (getChatMember, answerCallbackQuery, answerInlineQuery...) йде одразу
+SEND_ENDPOINTS = frozenset((
+    'sendMessage', 'copyMessage', 'forwardMessage', 'sendDocument', 'sendPhoto', 'sendVideo',
+    'sendAnimation', 'sendAudio', 'sendMediaGroup', 'editMessageText', 'editMessageCaption',
+))
+
+
+# Якщо 429 прийшов одночасно стільки різним чатам - це загальний ліміт бота, пауза для всіх
+GLOBAL_FLOOD_CHATS = 3
+
+
+class _Bucket:
+    """Token bucket: rate повідомлень за секунду, до capacity підряд (і пауза після 429 в цей чат)"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def wait_time(self, now) -> float:
+        """Скільки секунд до наступного дозволеного повідомлення (0 - можна зараз)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def is_full(self, now) -> bool:
+        return self.wait_time(now) == 0.0 and self.tokens >= self.capacity
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """
+    Обмежувач вихідних запитів бота (підключається в Application.builder().rate_limiter()).
+
+    - загальний ліміт (global_rate повідомлень за секунду) і ліміт на кожен чат
+      (private_rate для особистих чатів, group_rate для груп і каналів)
+    - коли лімітів не вистачає, повідомлення чекають у черзі; першими йдуть відповіді
+      користувачам (PRIORITY_USER), потім повідомлення адміну (PRIORITY_ADMIN)
+    - повідомлення в чат, який вичерпав свій ліміт, не затримує інші чати
+    - 429 (RetryAfter) у чат - зупиняється тільки цей чат на retry_after секунд, запит повторюється
+      до max_retries разів. Усі надсилання зупиняються лише на загальний 429: запит без чату
+      (getChatMember, answerInlineQuery...) або 429 одночасно в GLOBAL_FLOOD_CHATS різних чатів
+
+    Поки ліміти не вичерпано, повідомлення йде одразу - без черги і без перемикання задач.
+    """
+
+    def __init__(self, global_rate=30.0, private_rate=1.0, private_burst=3, group_rate=20 / 60, max_retries=3):
+        self.global_bucket = _Bucket(global_rate, max(1.0, global_rate))
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+
+        self._chats = {}          # chat_id -> _Bucket
+        self._waiting = []        # [(пріоритет, порядковий номер, chat_id, future)]
+        self._seq = 0
+        self._paused_until = 0.0  # після загального 429
+        self._wakeup = None
+        self._dispatcher = None
+
+        self.sent = 0
+        self.queued = 0
+        self.retries = 0
+
+    async def initialize(self) -> None:
+        # PTB викликає initialize двічі (Application і Updater ініціалізують бота) - потрібен один диспетчер
+        if self._dispatcher is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def shutdown(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for entry in self._waiting:
+            entry[3].cancel()
+        self._waiting = []
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        priority = (rate_limit_args or {}).get('priority', PRIORITY_USER)
+        limited = endpoint in SEND_ENDPOINTS
+        chat_id = data.get('chat_id') if limited else None
+
+        for attempt in range(self.max_retries + 1):
+            if limited:
+                await self._acquire(chat_id, priority)
+            elif self._paused_until > time.monotonic():
+                await asyncio.sleep(self._paused_until - time.monotonic())
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                metrics.SEND_RETRY_AFTER.labels(endpoint).inc()
+                logger.warning(
+                    f"⏳ Telegram просить зачекати {e.retry_after} с ({endpoint}, чат {chat_id}), повтор {attempt + 1}"
+                )
+                self._pause(chat_id, e.retry_after)
+                self._wakeup.set()
+
+    def _pause(self, chat_id, retry_after):
+        """Пауза після 429: для одного чату або (загальний 429) для всіх надсилань"""
+        now = time.monotonic()
+        until = now + retry_after
+
+        if chat_id is not None:
+            bucket = self._chat_bucket(chat_id)
+            bucket.paused_until = max(bucket.paused_until, until)
+            # Telegram відмовляє одразу кільком чатам - впираємось у загальний ліміт бота
+            if self.paused_chats(now) < GLOBAL_FLOOD_CHATS:
+                return
+
+        self._paused_until = max(self._paused_until, until)
+
+    # ---------- Черга ----------
+
+    def _chat_bucket(self, chat_id):
+        if chat_id is None:
+            return None
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= 10000:
+                self._forget_idle_chats()
+            # Від'ємні id (групи, канали) - жорсткіший ліміт Telegram
+            if isinstance(chat_id, str) or int(chat_id) < 0:
+                bucket = _Bucket(self.group_rate, 1.0)
+            else:
+                bucket = _Bucket(self.private_rate, float(self.private_burst))
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _forget_idle_chats(self):
+        """Чати з повним запасом повідомлень можна забути - новий bucket буде таким самим"""
+        now = time.monotonic()
+        self._chats = {chat_id: bucket for chat_id, bucket in self._chats.items() if not bucket.is_full(now)}
+
+    def _ready(self, bucket, now) -> bool:
+        return bucket is None or bucket.wait_time(now) == 0.0
+
+    async def _acquire(self, chat_id, priority):
+        started = time.monotonic()
+        bucket = self._chat_bucket(chat_id)
+
+        # Швидкий шлях: черга порожня і ліміти дозволяють
+        if (not self._waiting and started >= self._paused_until
+                and self._ready(self.global_bucket, started) and self._ready(bucket, started)):
+            self.global_bucket.take()
+            if bucket is not None:
+                bucket.take()
+            self.sent += 1
+            metrics.SEND_WAIT_SECONDS.labels(PRIORITY_NAMES[priority]).observe(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        self._waiting.append((priority, self._seq, chat_id, future))
+        self.queued += 1
+        self._wakeup.set()
+
+        await future
+        metrics.SEND_WAIT_SECONDS.labels(PRIORITY_NAMES[priority]).observe(time.monotonic() - started)
+
+    async def _dispatch_loop(self):
+        """Видає дозволи на надсилання: найважливіший запит, чий чат не вичерпав ліміт"""
+        while True:
+            self._waiting = [entry for entry in self._waiting if not entry[3].done()]
+            if not self._waiting:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            delay = self._paused_until - now
+            if delay <= 0:
+                delay = self.global_bucket.wait_time(now)
+
+            if delay <= 0:
+                best = None
+                delay = float('inf')
+                for entry in self._waiting:
+                    wait = self._chat_bucket(entry[2]).wait_time(now) if entry[2] is not None else 0.0
+                    if wait > 0:
+                        delay = min(delay, wait)
+                    elif best is None or entry[:2] < best[:2]:
+                        best = entry
+
+                if best is not None:
+                    self._waiting.remove(best)
+                    self.global_bucket.take()
+                    if best[2] is not None:
+                        self._chat_bucket(best[2]).take()
+                    self.sent += 1
+                    best[3].set_result(None)
+                    continue
+
+            # Чекаємо звільнення ліміту або нового запиту (він може бути в інший, вільний чат)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def paused_chats(self, now=None) -> int:
+        """Скільки чатів зараз на паузі після 429"""
+        now = time.monotonic() if now is None else now
+        return sum(1 for bucket in self._chats.values() if bucket.paused_until > now)
+
+    def queue_depth(self) -> dict:
+        """Скільки запитів чекає в черзі за пріоритетами"""
+        depth = {name: 0 for name in PRIORITY_NAMES}
+        for priority, seq, chat_id, future in self._waiting:
+            if not future.done():
+                depth[PRIORITY_NAMES[priority]] += 1
+        return depth
+
+    def stats(self) -> dict:
+        return {
+            'sent': self.sent,
+            'queued': self.queued,
+            'retries': self.retries,
+            'waiting': self.queue_depth(),
+            'chats': len(self._chats),
+            'paused_for': max(0.0, self._paused_until - time.monotonic()),
+            'paused_chats': self.paused_chats(),
+        }
+
+
+# Глобальний обмежувач (один Application на процес)
+send_limiter = PriorityRateLimiter(
+    global_rate=config.SEND_RATE_GLOBAL,
+    private_rate=config.SEND_RATE_PER_CHAT,
+    private_burst=config.SEND_BURST_PER_CHAT,
+    group_rate=config.SEND_RATE_PER_GROUP,
+    max_retries=config.SEND_MAX_RETRIES,
+)
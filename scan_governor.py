@@ -0,0 +1,198 @@
+# scan_governor.py - Адаптивне обмеження запитів Pyrogram (FloodWait)
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from pyrogram.errors import FloodWait
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestGovernor:
+    """
+    Через нього йдуть усі запити ChannelScanner до Telegram (get_chat, get_messages, ...).
+
+    - не більше limit запитів одночасно і не частіше rate запитів за секунду
+      (max_rate=0 - частота не обмежена, поки Telegram не відповів FloodWait)
+    - FloodWait: всі запити чекають вказаний Telegram час, limit і rate зменшуються вдвічі
+      (без обмеження частоти - вдвічі від фактичної за останню секунду), запит повторюється
+      (до flood_retries разів поспіль)
+    - після ramp_up_after успішних запитів підряд limit зростає на 1, rate - на десяту частину
+      max_rate (або частоти, на якій був FloodWait): швидкість повільно повертається
+      до найбільшої, яку Telegram терпить
+    - статистика по кожному методу (stats) - для /debug і логів сканера
+
+    Довге сканування від FloodWait не обривається, а сповільнюється.
+    """
+
+    def __init__(self, max_concurrency=4, max_rate=0.0, min_rate=0.5, ramp_up_after=20, flood_retries=5):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_rate = max(0.0, max_rate)
+        self.min_rate = min(min_rate, self.max_rate) if self.max_rate else min_rate
+        self.ramp_up_after = ramp_up_after
+        self.flood_retries = flood_retries
+
+        self.limit = self.max_concurrency
+        self.rate = self.max_rate      # 0 - без обмеження частоти
+        self._rate_step = self.max_rate / 10
+        self._recent = deque()         # час старту запитів за останню секунду (фактична частота)
+        self._in_flight = 0
+        self._waiters = []             # futures запитів, які чекають вільного місця
+        self._next_at = 0.0            # коли можна почати наступний запит (частота)
+        self._paused_until = 0.0       # після FloodWait
+        self._slowed_at = 0.0          # коли востаннє зменшено limit і rate
+        self._successes = 0            # успішних запитів підряд з останньої зміни швидкості
+
+        self.methods = {}              # метод -> лічильники (див. _method_stats)
+
+    async def call(self, method, function, *args, **kwargs):
+        """
+        Виконує await function(*args, **kwargs) з урахуванням лімітів.
+
+        method - назва для статистики ('get_messages', 'get_chat', ...).
+        FloodWait понад flood_retries разів поспіль і інші помилки йдуть назовні.
+        """
+        stats = self._method_stats(method)
+        floods = 0
+
+        while True:
+            await self._acquire()
+            started = time.monotonic()
+            try:
+                result = await function(*args, **kwargs)
+            except FloodWait as e:
+                stats['flood_waits'] += 1
+                stats['flood_seconds'] += e.value
+                metrics.SCANNER_REQUESTS.labels(method, 'flood_wait').inc()
+                self._slow_down(method, e.value, started)
+
+                floods += 1
+                if floods > self.flood_retries:
+                    stats['errors'] += 1
+                    raise
+                continue
+            except Exception:
+                stats['errors'] += 1
+                metrics.SCANNER_REQUESTS.labels(method, 'error').inc()
+                raise
+            finally:
+                self._release()
+
+            stats['calls'] += 1
+            stats['seconds'] += time.monotonic() - started
+            metrics.SCANNER_REQUESTS.labels(method, 'ok').inc()
+            self._speed_up()
+            return result
+
+    # ---------- Ліміти ----------
+
+    async def _acquire(self):
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self._in_flight += 1
+
+        # Пауза після FloodWait і частота: кожен запит бронює собі момент старту,
+        # тому одночасні запити розходяться на 1/rate секунди
+        while True:
+            now = time.monotonic()
+            start = max(now, self._next_at, self._paused_until)
+            self._next_at = start + (1.0 / self.rate if self.rate else 0.0)
+            if start <= now:
+                self._count_start(now)
+                return
+            try:
+                await asyncio.sleep(start - now)
+            except BaseException:
+                self._release()
+                raise
+            # Поки чекали, міг прийти новий FloodWait - тоді чекаємо і його
+            if time.monotonic() >= self._paused_until:
+                self._count_start(time.monotonic())
+                return
+
+    def _count_start(self, now):
+        self._recent.append(now)
+        while now - self._recent[0] > 1.0:
+            self._recent.popleft()
+
+    def _release(self):
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """Будить усіх, хто чекає місця (кожен ще раз перевірить limit)"""
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _slow_down(self, method, wait, started):
+        """FloodWait: пауза для всіх запитів і вдвічі менші limit та rate"""
+        self._paused_until = max(self._paused_until, time.monotonic() + wait)
+        self._successes = 0
+
+        # Запити, надіслані ще до попереднього зменшення, отримують FloodWait пачкою -
+        # швидкість зменшується один раз на таку пачку, а не для кожного з них
+        if started < self._slowed_at:
+            return
+        self._slowed_at = time.monotonic()
+
+        old_limit = self.limit
+        # Без обмеження частоти - від тієї, з якою запити йшли насправді
+        old_rate = self.rate or max(self.min_rate, float(len(self._recent)))
+        if not self.max_rate:
+            self._rate_step = old_rate / 10
+
+        self.limit = max(1, self.limit // 2)
+        self.rate = max(self.min_rate, old_rate / 2)
+
+        logger.warning(
+            f"FLOOD {method}: Telegram просить зачекати {wait} с; "
+            f"одночасно {old_limit} → {self.limit}, частота {old_rate:.2f} → {self.rate:.2f} запитів/с"
+        )
+
+    def _speed_up(self):
+        """Після ramp_up_after успішних запитів підряд - на один одночасний запит більше і трохи вища частота"""
+        self._successes += 1
+        if self._successes < self.ramp_up_after:
+            return
+        self._successes = 0
+        self.limit = min(self.max_concurrency, self.limit + 1)
+        if self.rate:
+            self.rate += self._rate_step
+            if self.max_rate:
+                self.rate = min(self.max_rate, self.rate)
+        self._wake()
+
+    # ---------- Статистика ----------
+
+    def _method_stats(self, method):
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = {'calls': 0, 'errors': 0, 'flood_waits': 0, 'flood_seconds': 0, 'seconds': 0.0}
+            self.methods[method] = stats
+        return stats
+
+    def stats(self) -> dict:
+        """Поточні ліміти і лічильники по методах"""
+        return {
+            'limit': self.limit,
+            'max_concurrency': self.max_concurrency,
+            'rate': self.rate,
+            'max_rate': self.max_rate,
+            'in_flight': self._in_flight,
+            'paused_for': max(0.0, self._paused_until - time.monotonic()),
+            'methods': {
+                method: {
+                    **stats,
+                    'avg_ms': stats['seconds'] / stats['calls'] * 1000 if stats['calls'] else 0.0,
+                }
+                for method, stats in self.methods.items()
+            },
+        }
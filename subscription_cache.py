@@ -0,0 +1,87 @@
+# subscription_cache.py - Кеш перевірок підписки на канал
+
+import time
+from collections import OrderedDict
+
+import config
+
+
+class SubscriptionCache:
+    """
+    Кеш результатів get_chat_member для кожного користувача.
+    
+    - підписаних пам'ятаємо довше (ttl_positive), непідписаних - коротше (ttl_negative),
+      щоб користувач, який щойно підписався, не чекав довго
+    - обмежений за розміром: найдавніше використані записи витісняються (LRU)
+    """
+    
+    def __init__(self, ttl_positive=600.0, ttl_negative=30.0, max_size=50000):
+        self.ttl_positive = ttl_positive
+        self.ttl_negative = ttl_negative
+        self.max_size = max_size
+        self._items = OrderedDict()  # user_id -> (is_subscribed, expires_at)
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, user_id):
+        """
+        Повертає:
+        - True / False - збережений результат перевірки
+        - None - немає в кеші або запис застарів (треба питати Telegram)
+        """
+        item = self._items.get(user_id)
+        
+        if item is not None:
+            is_subscribed, expires_at = item
+            if time.monotonic() < expires_at:
+                self._items.move_to_end(user_id)
+                self.hits += 1
+                return is_subscribed
+            del self._items[user_id]
+        
+        self.misses += 1
+        return None
+    
+    def set(self, user_id, is_subscribed):
+        """Зберігає результат перевірки з відповідним TTL"""
+        if is_subscribed:
+            ttl = self.ttl_positive
+        else:
+            ttl = self.ttl_negative
+        
+        if ttl <= 0:
+            self._items.pop(user_id, None)
+            return
+        
+        self._items[user_id] = (is_subscribed, time.monotonic() + ttl)
+        self._items.move_to_end(user_id)
+        
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, user_id):
+        """Забуває результат для користувача"""
+        self._items.pop(user_id, None)
+    
+    def stats(self) -> dict:
+        """Лічильники кешу для /debug"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Глобальний кеш підписок (використовується в bot.py)
+subscription_cache = SubscriptionCache(
+    ttl_positive=config.SUBSCRIPTION_CACHE_TTL_POSITIVE,
+    ttl_negative=config.SUBSCRIPTION_CACHE_TTL_NEGATIVE,
+    max_size=config.SUBSCRIPTION_CACHE_MAX_SIZE
+)
@@ -0,0 +1,30 @@
+# telegram_request.py - HTTP-клієнт Bot API з метриками викликів
+
+import time
+
+from telegram.request import HTTPXRequest
+
+import metrics
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """
+    HTTPXRequest, який рахує кожен виклик Bot API за методом (sendMessage, copyMessage, ...):
+    тривалість і помилки (мережеві або HTTP статус >= 400).
+    """
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        start = time.perf_counter()
+
+        try:
+            code, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+        except Exception:
+            metrics.TELEGRAM_API_ERRORS.labels(api_method).inc()
+            raise
+        finally:
+            metrics.TELEGRAM_API_SECONDS.labels(api_method).observe(time.perf_counter() - start)
+
+        if code >= 400:
+            metrics.TELEGRAM_API_ERRORS.labels(api_method).inc()
+        return code, payload
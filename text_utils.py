@@ -0,0 +1,26 @@
+# text_utils.py - Нормалізація тексту назв фільмів
+
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize_title(title):
+    """
+    Нормалізує назву фільму для пошуку та індексу title_normalized:
+    нижній регістр, без розділових знаків, одинарні пробіли, ё → е, ґ → г.
+    
+    Приклад: "  Ніхто 2!!  " → "ніхто 2"
+    
+    Повертає:
+    - Нормалізований рядок або None, якщо назви немає
+    """
+    if not title:
+        return None
+    
+    text = unicodedata.normalize('NFKC', title).casefold()
+    text = text.replace('ё', 'е').replace('ґ', 'г')
+    text = _NON_WORD.sub(' ', text).strip()
+    
+    return text or None
@@ -0,0 +1,263 @@
+# title_search.py - Пошук фільмів за назвою (триграмний індекс в пам'яті)
+
+import bisect
+import heapq
+import threading
+import math
+from collections import Counter
+
+import config
+from text_utils import normalize_title
+
+# Транслітерація кирилиці в латиницю: "Ніхто" і "Nikhto" дають однаковий ключ пошуку
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu',
+    'я': 'ia', 'ы': 'y', 'э': 'e', 'ъ': '', 'ё': 'e', "'": '', '’': '', 'ʼ': ''
+})
+
+
+def search_key(text):
+    """
+    Ключ для пошуку: нормалізована назва, транслітерована в латиницю.
+    
+    Приклад: "Ніхто 2!" → "nikhto 2", "NIKHTO 2" → "nikhto 2"
+    """
+    normalized = normalize_title(text)
+    if not normalized:
+        return ''
+    return normalized.translate(_TRANSLIT)
+
+
+def trigrams(key):
+    """Множина триграм ключа (з пробілами по краях, щоб враховувати початок слова)"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+_EMPTY = frozenset()
+
+
+def _min_shared(query_size, min_score):
+    """
+    Мінімум спільних триграм, з яким фільм ще може набрати min_score.
+    
+    Без бонусу рахунок не більший за частку знайдених триграм запиту.
+    Якщо запит є підрядком назви (бонус), не збігаються щонайбільше
+    три крайові триграми - тому таких кандидатів теж не втрачаємо.
+    """
+    without_bonus = math.ceil(query_size * min_score)
+    return max(1, min(without_bonus, query_size - 3))
+
+
+class TitleIndex:
+    """
+    Інвертований триграмний індекс назв: триграма → множина фільмів.
+    
+    - будується з бази при запуску (database.warm_cache)
+    - оновлюється при кожному записі/видаленні фільму (add / remove з database.py)
+    - search() повертає фільми, відсортовані за схожістю назви
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}     # триграма -> множина doc_id
+        self._docs = {}         # doc_id -> (code, title, year, key, кількість триграм)
+        self._doc_by_code = {}  # code -> doc_id
+        self._sorted_keys = None  # [(key, doc_id)] за ключем - для частих запитів, будується при першому з них
+        self._next_id = 0
+        
+        self.queries = 0
+    
+    def __len__(self):
+        return len(self._docs)
+    
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._doc_by_code.clear()
+            self._sorted_keys = None
+    
+    def add(self, code, title, year=None):
+        """Додає або оновлює назву фільму в індексі"""
+        key = search_key(title)
+        
+        with self._lock:
+            self._remove_locked(code)
+            if not key:
+                return
+            
+            grams = trigrams(key)
+            doc_id = self._next_id
+            self._next_id += 1
+            
+            self._docs[doc_id] = (code, title, year, key, len(grams))
+            self._doc_by_code[code] = doc_id
+            if self._sorted_keys is not None:
+                bisect.insort(self._sorted_keys, (key, doc_id))
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    self._postings[gram] = {doc_id}
+                else:
+                    posting.add(doc_id)
+    
+    def lookup(self, code):
+        """Назва і рік фільму за кодом: {'title', 'year'} або None"""
+        with self._lock:
+            doc_id = self._doc_by_code.get(code)
+            if doc_id is None:
+                return None
+            _, title, year, _, _ = self._docs[doc_id]
+            return {'title': title, 'year': year}
+    
+    def remove(self, code):
+        """Видаляє фільм з індексу"""
+        with self._lock:
+            self._remove_locked(code)
+    
+    def _remove_locked(self, code):
+        doc_id = self._doc_by_code.pop(code, None)
+        if doc_id is None:
+            return
+        
+        _, _, _, key, _ = self._docs.pop(doc_id)
+        if self._sorted_keys is not None:
+            del self._sorted_keys[bisect.bisect_left(self._sorted_keys, (key, doc_id))]
+        for gram in trigrams(key):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
+    
+    def search(self, query, limit=None, min_score=None):
+        """
+        Шукає фільми за назвою.
+        
+        Параметри:
+        - query: текст від користувача (будь-який регістр, кирилиця або латиниця)
+        - limit: максимум результатів (за замовчуванням TITLE_SEARCH_LIMIT)
+        - min_score: мінімальна схожість 0..1 (за замовчуванням TITLE_SEARCH_MIN_SCORE)
+        
+        Повертає:
+        - Список словників code/title/year/score, найкращі першими
+        """
+        limit = limit or config.TITLE_SEARCH_LIMIT
+        min_score = config.TITLE_SEARCH_MIN_SCORE if min_score is None else min_score
+        
+        key = search_key(query)
+        if not key:
+            return []
+        query_grams = trigrams(key)
+        
+        with self._lock:
+            self.queries += 1
+            
+            postings = sorted(
+                (self._postings.get(gram, _EMPTY) for gram in query_grams),
+                key=len
+            )
+            
+            # Фільтрація за префіксом: фільм, що має хоча б needed спільних триграм,
+            # обов'язково є в одному з (len - needed + 1) найрідкісніших списків -
+            # тому кандидатів беремо тільки з них, а не зі списків частих триграм
+            needed = _min_shared(len(query_grams), min_score)
+            rare = len(postings) - needed + 1
+            
+            # Триграми частих слів ("the", "ніч") є в тисячах назв, і кандидати з їхніх списків
+            # робили такі запити найповільнішими. Списки, довші за max_postings, кандидатів не дають
+            # (лише підраховуються для решти), а натомість кандидатами стають перші за алфавітом
+            # назви, що починаються з запиту: з бонусом за початок вони й мають найвищий рахунок.
+            # Якщо часті всі списки, а таких назв менше за limit - кандидатів дає найрідкісніший
+            max_postings = int(max(config.TITLE_SEARCH_MAX_POSTINGS_MIN,
+                                   config.TITLE_SEARCH_MAX_POSTINGS_SHARE * len(self._docs)))
+            seeds = rare
+            while seeds > 0 and len(postings[seeds - 1]) > max_postings:
+                seeds -= 1
+            prefixed = ()
+            if seeds < rare:
+                prefixed = self._prefixed_locked(key, max_postings)
+                if not seeds and len(prefixed) < limit:
+                    seeds = 1
+            
+            # Спільні триграми рахуються за один прохід по спискам (Counter.update - цикл у C):
+            # рідкісні списки дають кандидатів, з частих береться тільки перетин з кандидатами
+            # (set.intersection перебирає меншу з двох множин)
+            counts = Counter()
+            for posting in postings[:seeds]:
+                counts.update(posting)
+            if seeds < len(postings):
+                candidates = set(counts)
+                candidates.update(prefixed)
+                for posting in postings[seeds:]:
+                    counts.update(candidates.intersection(posting))
+            
+            # Кандидати за спаданням спільних триграм. Рахунок фільму не більший за частку
+            # знайдених триграм (Жаккар не більший за неї) + бонус, а бонус можливий лише
+            # без щонайбільше трьох крайових триграм (як у _min_shared). Коли ця межа нижча
+            # за гірший з limit найкращих, решта кандидатів вже не потрапить у результат
+            query_size = len(query_grams)
+            best = []  # мін-купа limit найкращих (score, code, title, year)
+            for doc_id, common in counts.most_common():
+                if common < needed:
+                    break
+                if len(best) == limit:
+                    bound = common / query_size + (0.5 if common >= query_size - 3 else 0.0)
+                    if bound < best[0][0]:
+                        break
+                code, title, year, doc_key, doc_grams = self._docs[doc_id]
+                
+                # Яка частка запиту знайдена в назві (головне) + схожість Жаккара
+                # (коротші назви з тим самим збігом вище) + бонус за збіг початку/підрядка
+                coverage = common / query_size
+                jaccard = common / (query_size + doc_grams - common)
+                score = 0.7 * coverage + 0.3 * jaccard
+                if len(best) == limit and score + 0.5 < best[0][0]:
+                    continue
+                if doc_key.startswith(key):
+                    score += 0.5
+                elif key in doc_key:
+                    score += 0.25
+                
+                if score >= min_score:
+                    item = (score, code, title, year)
+                    if len(best) < limit:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+        
+        best.sort(reverse=True)
+        return [
+            {'code': code, 'title': title, 'year': year, 'score': round(score, 3)}
+            for score, code, title, year in best
+        ]
+    
+    def _prefixed_locked(self, key, count):
+        """До count фільмів, ключ назви яких починається з key (за алфавітом ключів)"""
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted((doc[3], doc_id) for doc_id, doc in self._docs.items())
+        
+        start = bisect.bisect_left(self._sorted_keys, (key,))
+        found = []
+        for doc_key, doc_id in self._sorted_keys[start:start + count]:
+            if not doc_key.startswith(key):
+                break
+            found.append(doc_id)
+        return found
+    
+    def stats(self) -> dict:
+        """Розмір індексу для /debug"""
+        with self._lock:
+            return {
+                'titles': len(self._docs),
+                'trigrams': len(self._postings),
+                'queries': self.queries
+            }
+
+
+# Глобальний індекс назв (використовується в database.py та bot.py)
+title_index = TitleIndex()
@@ -0,0 +1,195 @@
+# webhook_server.py - Прийом оновлень Telegram через webhook (замість long polling)
+
+import asyncio
+import hmac
+import json
+import logging
+import signal
+import time
+
+from telegram import Update
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Найбільше тіло запиту: оновлення Telegram значно менші
+MAX_BODY_SIZE = 1024 * 1024
+
+JSON_CONTENT_TYPE = b'application/json'
+METRICS_CONTENT_TYPE = b'text/plain; version=0.0.4; charset=utf-8'
+
+
+class WebhookServer:
+    """
+    Вбудований HTTP-сервер (asyncio, без сторонніх бібліотек) для webhook-режиму.
+
+    - POST {path} - оновлення від Telegram: перевіряється заголовок
+      X-Telegram-Bot-Api-Secret-Token, оновлення кладеться в чергу Application,
+      Telegram одразу отримує 200 (обробка йде паралельно, див. FilmsApplication)
+    - GET /health - стан бота для перевірок деплою (Railway healthcheck);
+      503, щойно почалася зупинка - балансувальник перестає слати сюди запити
+    - GET /metrics - метрики Prometheus на тому ж порту (serve_metrics), окремий METRICS_PORT не потрібен
+    """
+
+    def __init__(self, application, path, secret_token, serve_metrics=False):
+        self.application = application
+        self.path = path.rstrip('/')
+        self.secret_token = secret_token.encode()
+        self.serve_metrics = serve_metrics
+        self.started_at = time.monotonic()
+        self.stopping = False
+        self._server = None
+
+    async def start(self, host, port):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.stopping = True
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        """Обробляє запити одного з'єднання (Telegram тримає з'єднання відкритими - keep-alive)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split(' ')
+                method = parts[0]
+                path = parts[1].split('?', 1)[0] if len(parts) > 1 else '/'
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, b'413 Payload Too Large', close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self._route(method, path, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                content_type = METRICS_CONTENT_TYPE if path == '/metrics' else JSON_CONTENT_TYPE
+                await self._respond(writer, status, payload, close=not keep_alive, content_type=content_type)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, headers, body):
+        if path == '/health':
+            health = self.health()
+            status = b'200 OK' if health['status'] == 'ok' else b'503 Service Unavailable'
+            return status, json.dumps(health).encode()
+        if path == '/metrics' and self.serve_metrics:
+            return b'200 OK', metrics.registry.render().encode()
+
+        if path.rstrip('/') != self.path:
+            return b'404 Not Found', b''
+        if method != 'POST':
+            return b'405 Method Not Allowed', b''
+
+        token = headers.get('x-telegram-bot-api-secret-token', '').encode()
+        if not hmac.compare_digest(token, self.secret_token):
+            metrics.WEBHOOK_REQUESTS.labels('forbidden').inc()
+            logger.warning("⚠️ Webhook: запит з неправильним secret token")
+            return b'403 Forbidden', b''
+
+        try:
+            data = json.loads(body)
+            # null, список чи число - не оновлення (Update.de_json(None) повернув би None у чергу)
+            if not isinstance(data, dict):
+                raise ValueError(f"очікувався об'єкт JSON, отримано {type(data).__name__}")
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            metrics.WEBHOOK_REQUESTS.labels('bad_request').inc()
+            logger.warning(f"⚠️ Webhook: не вдалося розібрати оновлення: {e}")
+            return b'400 Bad Request', b''
+
+        await self.application.update_queue.put(update)
+        metrics.WEBHOOK_REQUESTS.labels('accepted').inc()
+        return b'200 OK', b''
+
+    def health(self) -> dict:
+        return {
+            'status': 'ok' if self.application.running and not self.stopping else 'stopping',
+            'mode': 'webhook',
+            'uptime_seconds': round(time.monotonic() - self.started_at, 1),
+            'queued_updates': self.application.update_queue.qsize(),
+        }
+
+    @staticmethod
+    async def _respond(writer, status, payload=b'', close=False, content_type=JSON_CONTENT_TYPE):
+        writer.write(
+            b'HTTP/1.1 ' + status + b'\r\n'
+            b'Content-Type: ' + content_type + b'\r\n'
+            b'Content-Length: ' + str(len(payload)).encode() + b'\r\n'
+            + (b'Connection: close\r\n' if close else b'') +
+            b'\r\n' + payload
+        )
+        await writer.drain()
+
+
+async def run_webhook(application, allowed_updates):
+    """
+    Запускає бота в webhook-режимі (замість application.run_polling):
+    ініціалізує Application, піднімає HTTP-сервер, реєструє webhook у Telegram
+    і працює до SIGINT/SIGTERM.
+    """
+    url = config.WEBHOOK_URL + config.WEBHOOK_PATH
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+
+    server = WebhookServer(application, config.WEBHOOK_PATH, config.WEBHOOK_SECRET, serve_metrics=config.WEBHOOK_METRICS)
+    port = await server.start(config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+    logger.info(
+        f"🌐 Webhook-сервер: http://{config.WEBHOOK_HOST}:{port}{config.WEBHOOK_PATH} "
+        f"(health: /health{', метрики: /metrics' if config.WEBHOOK_METRICS else ''})"
+    )
+
+    # Помилка реєстрації не зупиняє сервер: його можна перевірити локально POST-запитами
+    try:
+        await application.bot.set_webhook(
+            url=url,
+            secret_token=config.WEBHOOK_SECRET,
+            allowed_updates=allowed_updates,
+            max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(f"✅ Webhook зареєстровано: {url}")
+    except Exception as e:
+        logger.error(f"❌ Не вдалося зареєструвати webhook {url}: {e}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass  # Windows - зупинка через Ctrl+C (KeyboardInterrupt)
+
+    try:
+        await stop_event.wait()
+    finally:
+        # Webhook не видаляємо: при перекритті деплоїв його вже міг зареєструвати новий екземпляр
+        logger.info("🛑 Зупинка webhook-сервера...")
+        await server.stop()
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        await application.shutdown()